@@ -4,7 +4,7 @@ from .population import PopulationDataController
 from .ridership import *  # noqa
 from .route import MMTRouteDataController
 from .shape import MMTShapeDataController, ShapeIdNotFoundError
-from .stop import MMTStopDataController
+from .stop import MMTStopDataController, StopWalkNeighbor
 from .stop_at_cross import MMTStopsAtCrossDataController
 from .stop_schedule import MMTStopScheduleController
 from .trip import MMTTripDataController
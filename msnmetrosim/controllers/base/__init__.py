@@ -1,4 +1,4 @@
 """Controller base classes."""
-from .fromcsv import CSVLoadableController
+from .fromcsv import CSVLoadableController, RowFilter
 from .holder import DataListHolder
 from .locational import LocationalDataController
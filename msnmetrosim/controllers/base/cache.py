@@ -0,0 +1,363 @@
+"""
+On-disk columnar cache of the data parsed from the data files.
+
+Each cache is a directory of ``.npy`` files, one for each column, and a ``meta.json`` recording the source file.
+
+There are 2 kinds of caches:
+
+- Caches of the data entries, which are rebuilt from the columns on load.
+  This only saves the csv parsing and the conversion of the values, rebuilding the data entries still takes time.
+
+- Caches of the columns held by the controllers, see :func:`load_cached_columns()`.
+  The columns are memory-mapped on load, so no data entry is rebuilt.
+
+The cache is keyed by the absolute path, the modification time and the size of the source file,
+and the source code of the function parsing the file. The caches of the data entries are also discarded
+if the source code or the fields of the data entry class are changed.
+"""
+import dataclasses
+import hashlib
+import importlib
+import inspect
+import json
+import os
+import shutil
+import tempfile
+from datetime import date, time
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional, Sequence, Type
+
+import numpy as np
+
+from msnmetrosim.utils import time_to_seconds
+
+__all__ = ("load_cached_entries", "save_cached_entries", "load_cached_columns", "save_cached_columns")
+
+_CACHE_VERSION = 3
+"""Version of the cache format. Caches of the other versions are discarded."""
+
+_META_FILE_NAME = "meta.json"
+
+
+def _get_object_path(obj: Any) -> str:
+    return f"{obj.__module__}:{obj.__qualname__}"
+
+
+def _get_source_hash(obj: Any) -> str:
+    """Get the hash of the source code of ``obj``. Falls back to the qualified name if the source is unavailable."""
+    try:
+        source = inspect.getsource(obj)
+    except (OSError, TypeError):
+        source = _get_object_path(obj)
+
+    return hashlib.sha1(source.encode("utf-8")).hexdigest()
+
+
+def _import_type(type_path: str) -> type:
+    module_name, qual_name = type_path.split(":")
+
+    ret = importlib.import_module(module_name)
+    for name in qual_name.split("."):
+        ret = getattr(ret, name)
+
+    return ret
+
+
+def _get_cache_path(cache_dir: str, key: Dict[str, Any]) -> str:
+    # The cache name is only used to locate the cache, the complete key is checked against ``meta.json``
+    name_hash = hashlib.sha1(f"{key['source']}|{key['loader']}|{key['layout']}".encode("utf-8")).hexdigest()[:16]
+
+    return os.path.join(cache_dir, f"{os.path.basename(key['source'])}-{name_hash}")
+
+
+def _get_cache_key(src_path: str, loader: Callable, options: Dict[str, Any], layout: str) -> Dict[str, Any]:
+    src_path = os.path.realpath(src_path)
+    stat = os.stat(src_path)
+
+    return {
+        "version": _CACHE_VERSION,
+        "layout": layout,
+        "source": src_path,
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "loader": _get_object_path(loader),
+        "loader_hash": _get_source_hash(loader),
+        "options": options
+    }
+
+
+def _get_init_fields(model: Type) -> List[str]:
+    """Get the names of the fields of the dataclass ``model`` initialized by the constructor."""
+    return [field.name for field in dataclasses.fields(model) if field.init]
+
+
+def _get_model_hash(model: Type) -> str:
+    """Get the hash of the source code and the fields of ``model``, which changes if the parsing logic changes."""
+    return hashlib.sha1(f"{_get_source_hash(model)}|{_get_init_fields(model)}".encode("utf-8")).hexdigest()
+
+
+def _encode_column(values: List[Any]) -> Optional[Dict[str, Any]]:
+    """
+    Encode ``values`` to be a column which can be stored in a ``.npy`` file.
+
+    Returns ``None`` if ``values`` cannot be encoded.
+    """
+    # pylint: disable=too-many-return-statements
+
+    value_types = set(map(type, values))
+    if len(value_types) != 1:
+        return None
+
+    value_type = value_types.pop()
+
+    # ``bool`` is a subclass of ``int``, so this is checked first
+    if value_type is bool:
+        return {"kind": "bool", "array": np.array(values, dtype=np.bool_)}
+
+    if value_type is int:
+        try:
+            return {"kind": "int", "array": np.array(values, dtype=np.int64)}
+        except OverflowError:
+            return None
+
+    if value_type is float:
+        return {"kind": "float", "array": np.array(values, dtype=np.float64)}
+
+    if value_type is str:
+        # Trailing null characters are stripped by numpy
+        if any(value.endswith("\0") for value in values):
+            return None
+
+        return {"kind": "str", "array": np.array(values, dtype=np.str_)}
+
+    if value_type is time:
+        if any(value.microsecond or value.tzinfo for value in values):
+            return None
+
+        return {"kind": "time", "array": np.array([time_to_seconds(value) for value in values], dtype=np.int64)}
+
+    if value_type is date:
+        return {"kind": "date", "array": np.array([value.toordinal() for value in values], dtype=np.int64)}
+
+    if issubclass(value_type, Enum):
+        return {"kind": "enum", "type": _get_object_path(value_type),
+                "array": np.array([value.name for value in values], dtype=np.str_)}
+
+    return None
+
+
+def _decode_column(column: Dict[str, Any], array: np.ndarray) -> List[Any]:
+    """Decode ``array`` to be the values of ``column``."""
+    kind = column["kind"]
+
+    if kind in ("bool", "int", "float", "str"):
+        return array.tolist()
+
+    if kind == "time":
+        hours, secs = np.divmod(array, 3600)
+        mins, secs = np.divmod(secs, 60)
+
+        return list(map(time, hours.tolist(), mins.tolist(), secs.tolist()))
+
+    if kind == "date":
+        return list(map(date.fromordinal, array.tolist()))
+
+    if kind == "enum":
+        enum_type = _import_type(column["type"])
+        members = {name: enum_type[name] for name in np.unique(array).tolist()}
+
+        return [members[name] for name in array.tolist()]
+
+    raise ValueError(f"Unknown column kind of the cache: {kind}")
+
+
+def _load_meta(cache_path: str, key: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Load ``meta.json`` of the cache at ``cache_path``. Returns ``None`` if the cache is not made by ``key``.
+
+    :raises OSError: if ``meta.json`` cannot be read
+    :raises ValueError: if ``meta.json`` is corrupted
+    """
+    with open(os.path.join(cache_path, _META_FILE_NAME), encoding="utf-8") as file:
+        meta = json.load(file)
+
+    return meta if meta["key"] == key else None
+
+
+def _save_cache(cache_dir: str, key: Dict[str, Any], arrays: List[np.ndarray], meta: Dict[str, Any]) -> bool:
+    """
+    Save ``arrays`` and ``meta`` to the cache of ``key`` in ``cache_dir``.
+
+    The ``i``-th array is saved as ``{i}.npy``. ``key`` is added to ``meta`` before saving.
+
+    Returns if the cache is saved.
+    """
+    cache_path = _get_cache_path(cache_dir, key)
+
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+
+        # Write to a temporary directory first, so an incomplete cache is never loaded
+        temp_path = tempfile.mkdtemp(dir=cache_dir)
+        try:
+            for idx, array in enumerate(arrays):
+                np.save(os.path.join(temp_path, f"{idx}.npy"), array)
+
+            with open(os.path.join(temp_path, _META_FILE_NAME), "w", encoding="utf-8") as file:
+                json.dump({"key": key, **meta}, file)
+
+            shutil.rmtree(cache_path, ignore_errors=True)
+            os.replace(temp_path, cache_path)
+        finally:
+            shutil.rmtree(temp_path, ignore_errors=True)
+    except OSError:
+        return False
+
+    return True
+
+
+def load_cached_entries(cache_dir: str, src_path: str, loader: Callable, options: Dict[str, Any]) \
+        -> Optional[List[Any]]:
+    """
+    Load the data entries of ``src_path`` from the cache in ``cache_dir``.
+
+    ``loader`` is the function used to parse ``src_path``. ``options`` is the options used for parsing.
+    Both of these are part of the cache key.
+
+    Returns ``None`` if the cache does not exist, is outdated or is corrupted.
+    """
+    key = _get_cache_key(src_path, loader, options, "entries")
+    cache_path = _get_cache_path(cache_dir, key)
+
+    try:
+        meta = _load_meta(cache_path, key)
+        if meta is None:
+            return None
+
+        model = _import_type(meta["model"])
+        # Model could be changed after the cache is made
+        if meta["model_hash"] != _get_model_hash(model):
+            return None
+
+        columns = [
+            _decode_column(column, np.load(os.path.join(cache_path, f"{idx}.npy"), mmap_mode="r"))
+            for idx, column in enumerate(meta["columns"])
+        ]
+    except (OSError, ValueError, KeyError, AttributeError, ImportError):
+        return None
+
+    if any(len(column) != meta["count"] for column in columns):
+        return None
+
+    return [model(*values) for values in zip(*columns)]
+
+
+def _get_model(entries: Sequence[Any]) -> Optional[Type]:
+    """Get the dataclass of all ``entries``. Returns ``None`` if ``entries`` are not of the same dataclass."""
+    if not entries:
+        return None
+
+    model = type(entries[0])
+
+    # Subclasses are not allowed because the data entries are rebuilt using ``model``
+    # pylint: disable=unidiomatic-typecheck
+    if not dataclasses.is_dataclass(model) or any(type(entry) is not model for entry in entries):
+        return None
+
+    return model
+
+
+def save_cached_entries(cache_dir: str, src_path: str, loader: Callable, options: Dict[str, Any],
+                        entries: Sequence[Any]) -> bool:
+    """
+    Save the data entries ``entries`` parsed from ``src_path`` to the cache in ``cache_dir``.
+
+    ``loader`` is the function used to parse ``src_path``. ``options`` is the options used for parsing.
+    Both of these are part of the cache key.
+
+    ``entries`` can only be cached if all of them are instances of the same dataclass,
+    and the fields initialized by the constructor are :class:`int`, :class:`float`, :class:`bool`,
+    :class:`str`, :class:`time`, :class:`date` or :class:`Enum`.
+
+    Returns if ``entries`` are cached.
+    """
+    model = _get_model(entries)
+    if not model:
+        return False
+
+    fields = _get_init_fields(model)
+    columns = [_encode_column([getattr(entry, field) for entry in entries]) for field in fields]
+    if any(column is None for column in columns):
+        return False
+
+    # Ensure that the data entries can be rebuilt by the constructor, for example, no ``InitVar`` is used
+    try:
+        if model(*(getattr(entries[0], field) for field in fields)) != entries[0]:
+            return False
+    except TypeError:
+        return False
+
+    arrays = [column.pop("array") for column in columns]
+    meta = {"model": _get_object_path(model), "model_hash": _get_model_hash(model), "count": len(entries),
+            "columns": columns}
+
+    return _save_cache(cache_dir, _get_cache_key(src_path, loader, options, "entries"), arrays, meta)
+
+
+def load_cached_columns(cache_dir: str, src_path: str, loader: Callable, options: Dict[str, Any],
+                        dtypes: Dict[str, Any]) -> Optional[Dict[str, np.ndarray]]:
+    """
+    Load the columns held by a controller for ``src_path`` from the cache in ``cache_dir``.
+
+    ``loader`` is the function used to parse ``src_path``. ``options`` is the options used for parsing.
+    Both of these are part of the cache key.
+
+    ``dtypes`` is the names of the columns to load and their data types.
+
+    The columns are memory-mapped read-only arrays keyed by their names.
+    The pages of the columns are shared with the other processes loading the same cache.
+
+    Returns ``None`` if the cache does not exist, is outdated, is corrupted
+    or does not have the columns of ``dtypes``.
+    """
+    key = _get_cache_key(src_path, loader, options, "columns")
+    cache_path = _get_cache_path(cache_dir, key)
+
+    try:
+        meta = _load_meta(cache_path, key)
+        if meta is None or meta["columns"] != list(dtypes):
+            return None
+
+        columns = {
+            name: np.load(os.path.join(cache_path, f"{idx}.npy"), mmap_mode="r")
+            for idx, name in enumerate(meta["columns"])
+        }
+    except (OSError, ValueError, KeyError):
+        return None
+
+    if any(column.dtype != np.dtype(dtypes[name]) or column.shape != (meta["count"],)
+           for name, column in columns.items()):
+        return None
+
+    return columns
+
+
+def save_cached_columns(cache_dir: str, src_path: str, loader: Callable, options: Dict[str, Any],
+                        columns: Dict[str, np.ndarray]) -> bool:
+    """
+    Save the columns held by a controller for ``src_path`` to the cache in ``cache_dir``.
+
+    ``loader`` is the function used to parse ``src_path``. ``options`` is the options used for parsing.
+    Both of these are part of the cache key.
+
+    ``columns`` are 1-D arrays of the same length keyed by their names.
+
+    Returns if ``columns`` are cached.
+    """
+    counts = {len(column) for column in columns.values()}
+    if len(counts) > 1:
+        return False
+
+    meta = {"count": counts.pop() if counts else 0, "columns": list(columns)}
+
+    return _save_cache(cache_dir, _get_cache_key(src_path, loader, options, "columns"), list(columns.values()), meta)
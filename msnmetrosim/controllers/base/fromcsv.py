@@ -2,12 +2,20 @@
 import csv
 import os
 from abc import ABC, abstractmethod
-from typing import List
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
 
-from msnmetrosim.static import DATA_DIR
+from msnmetrosim.static import DATA_DIR, DATA_CACHE_DIR
+from .cache import load_cached_entries, save_cached_entries
 from .holder import DataListHolder
 
-__all__ = ("CSVLoadableController",)
+__all__ = ("CSVLoadableController", "RowFilter")
+
+RowFilter = Callable[[List[str]], bool]
+"""Function to check if a row of csv should be loaded, given the row before parsing."""
+
+_CHUNK_SIZE = 10000
+"""Default count of the rows parsed in a chunk."""
 
 
 class CSVLoadableController(DataListHolder, ABC):
@@ -33,23 +41,107 @@ class CSVLoadableController(DataListHolder, ABC):
         raise NotImplementedError()
 
     @classmethod
-    def load_csv(cls, file_path: str, delimiter: str = ",", has_header: bool = True):
+    def iter_csv_chunks(cls, file_path: str, delimiter: str = ",", has_header: bool = True,
+                        chunk_size: int = _CHUNK_SIZE, row_filter: Optional[RowFilter] = None) \
+            -> Iterator[List[object]]:
+        """
+        Parse a csv file in chunks of ``chunk_size`` rows and yield the data entries of each chunk.
+
+        Only the rows which ``row_filter`` returns ``True`` are parsed, so the other rows cost no parsing.
+        ``row_filter`` gets the row before parsing.
+
+        The chunks are consumed by :meth:`from_chunks()` when loading a controller.
+
+        Note that ``file_path`` should be a relative path of the data file under the data directory.
+        """
+        with open(cls.get_csv_file_abs_path(file_path), "r", encoding="utf-8") as file:
+            csv_reader = csv.reader(file, delimiter=delimiter)
+
+            if has_header:
+                next(csv_reader, None)  # Dump header
+
+            rows = filter(row_filter, csv_reader) if row_filter else csv_reader
+
+            while True:
+                chunk = [cls.on_row_read(row) for row in islice(rows, chunk_size)]
+
+                if not chunk:
+                    return
+
+                yield chunk
+
+    @classmethod
+    def from_chunks(cls, chunks: Iterable[List[object]]):
+        """
+        Create a controller from the data entries in ``chunks``.
+
+        By default, this collects all data entries into a list for the constructor.
+        Controllers which store only some fields of the data entries could override this to consume the chunks
+        one by one, so the data entries of only a single chunk are alive at a time.
+        """
+        return cls([entry for chunk in chunks for entry in chunk])
+
+    @classmethod
+    def from_cache(cls, cache_dir: str, src_path: str, options: Dict[str, Any]):
+        """
+        Load the controller of the csv file ``src_path`` from the cache in ``cache_dir``.
+
+        ``options`` is the options used for parsing ``src_path``.
+
+        By default, this rebuilds the data entries cached by :meth:`to_cache()`.
+
+        Returns ``None`` if the cache is not available.
+        """
+        entries = load_cached_entries(cache_dir, src_path, cls.on_row_read, options)
+
+        return None if entries is None else cls(entries)
+
+    def to_cache(self, cache_dir: str, src_path: str, options: Dict[str, Any]) -> bool:
+        """
+        Save this controller loaded from the csv file ``src_path`` to the cache in ``cache_dir``.
+
+        ``options`` is the options used for parsing ``src_path``.
+
+        By default, this caches the data entries. Controllers which store columns could override this
+        with :meth:`from_cache()` to cache the columns instead.
+
+        Returns if this controller is cached.
+        """
+        return save_cached_entries(cache_dir, src_path, self.on_row_read, options, self.all_data)
+
+    @classmethod
+    def load_csv(cls, file_path: str, delimiter: str = ",", has_header: bool = True, use_cache: bool = True,
+                 row_filter: Optional[RowFilter] = None):
         """
         Load a csv file to be a controller.
 
         Note that ``file_path`` should be a relative path of the data file under the data directory.
 
         Data directory can be configured in ``msnmetrosim.static``.
+
+        If ``use_cache`` is ``True``, the controller is cached in the cache directory configured in
+        ``msnmetrosim.static`` by :meth:`to_cache()`. The cache will be used instead of parsing the csv file again,
+        until the csv file is modified.
+
+        If ``row_filter`` is given, only the rows which ``row_filter`` returns ``True`` are loaded.
+        The cache is not used in this case.
+
+        The csv file is parsed in chunks, which are passed to :meth:`from_chunks()` to create the controller.
         """
-        routes = []
+        # pylint: disable=too-many-arguments
 
-        with open(cls.get_csv_file_abs_path(file_path), "r") as file:
-            csv_reader = csv.reader(file, delimiter=delimiter)
+        abs_path = cls.get_csv_file_abs_path(file_path)
+        cache_options = {"delimiter": delimiter, "has_header": has_header}
+        use_cache = use_cache and DATA_CACHE_DIR and not row_filter
 
-            if has_header:
-                next(csv_reader, None)  # Dump header
+        if use_cache:
+            ctrl = cls.from_cache(DATA_CACHE_DIR, abs_path, cache_options)
+            if ctrl is not None:
+                return ctrl
+
+        ctrl = cls.from_chunks(cls.iter_csv_chunks(file_path, delimiter, has_header, row_filter=row_filter))
 
-            for row in csv_reader:
-                routes.append(cls.on_row_read(row))
+        if use_cache:
+            ctrl.to_cache(DATA_CACHE_DIR, abs_path, cache_options)
 
-        return cls(routes)
+        return ctrl
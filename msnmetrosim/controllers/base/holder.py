@@ -13,7 +13,7 @@ class DataListHolder(ABC):
 
     def duplicate(self, condition: Callable[[object], bool]):
         """Duplicate this controller with data matching the ``condition``."""
-        return self.__class__([data for data in self._data if condition(data)])
+        return self.__class__([data for data in self.all_data if condition(data)])
 
     @property
     def all_data(self) -> list:
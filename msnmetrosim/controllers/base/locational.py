@@ -1,17 +1,24 @@
 """Base controller class for locational data."""
 from abc import ABC
 from dataclasses import dataclass, InitVar, field
-from math import isqrt
-from typing import List, Tuple, TypeVar, Optional, Generator, Set
+from heapq import heapify, heappop
+from math import asin, cos, floor, pi, radians, sin, sqrt
+from typing import List, Tuple, TypeVar, Optional, Generator, Dict, Iterable
+
+import numpy as np
 
 from msnmetrosim.models.base import LocationalModelBase
-from msnmetrosim.utils import DataMetrics
+from msnmetrosim.utils import DataMetrics, distance_array
+from msnmetrosim.utils.geo import EARTH_R
 from .holder import DataListHolder
 
 __all__ = ("ClosestDataResult", "LocationalDataController")
 
 T = TypeVar("T", bound=LocationalModelBase)
 
+_BATCH_MAX_ELEMENTS = 2 ** 20
+"""Maximum count of elements in a distance matrix calculated at once in the batch search."""
+
 
 @dataclass
 class ClosestDataResult:
@@ -30,24 +37,38 @@ class ClosestDataResult:
 
 
 class LocationalDataController(DataListHolder, ABC):
-    """Base class location data controller."""
+    """
+    Base class location data controller.
+
+    The data will be indexed by a uniform latitude/longitude grid upon initialization for faster searching.
+    """
+
+    def _init_grid_idx(self):
+        self._coords = np.array([(data.lat, data.lon) for data in self._data], dtype=np.float64).reshape(-1, 2)
+
+        if not self._data:
+            return
+
+        # Let each grid cell to contain ~2 data in average to keep the search cost of a cell low
+        lat_span, lon_span = self._coords.max(axis=0) - self._coords.min(axis=0)
+        self._grid_origin = self._coords.min(axis=0)
+        self._grid_cell = max(sqrt(lat_span * lon_span * 2 / len(self._data)), lat_span / len(self._data),
+                              lon_span / len(self._data), 1E-4)
 
-    def _init_lat_idx(self, interval: int):
-        # Find the starting points and its index
-        starting_points = []
+        # Highest absolute latitude in the data, used for getting the lower bound of the distance
+        self._grid_max_abs_lat = float(np.abs(self._coords[:, 0]).max())
 
-        for idx, stop in enumerate(self._data):
-            if idx % interval == 0:
-                starting_points.append((stop.lat, idx))
+        cells = np.floor((self._coords - self._grid_origin) / self._grid_cell).astype(int)
+        self._grid_bounds = (*cells.min(axis=0).tolist(), *cells.max(axis=0).tolist())
 
-        # Get the starting and ending index for the corresponding starting latitude
-        for idx in range(len(starting_points) - 1):
-            starting_lat, starting_idx = starting_points[idx]
-            _, ending_idx = starting_points[idx + 1]
-            self._lat_idx.append((starting_lat, (starting_idx, ending_idx)))
+        grid: Dict[Tuple[int, int], List[int]] = {}
+        for idx, cell in enumerate(map(tuple, cells.tolist())):
+            if cell not in grid:
+                grid[cell] = []
 
-        last_starting_lat, last_idx = starting_points[-1]
-        self._lat_idx.append((last_starting_lat, (last_idx, len(self._data))))
+            grid[cell].append(idx)
+
+        self._grid = {cell: np.array(indices, dtype=int) for cell, indices in grid.items()}
 
     def __init__(self, data: List[T]):
         # Sort the data by lat, lon
@@ -55,27 +76,82 @@ class LocationalDataController(DataListHolder, ABC):
 
         super().__init__(data)
 
-        # Store the latitude-idx relationship for faster stop searching
-        # elem #1: starting latitude
-        # elem #2-1: starting index of `self._data` (inclusive)
-        # elem #2-2: ending index `self._data` (exclusive)
-        self._lat_idx: List[Tuple[float, Tuple[int, int]]] = []
-
-        # Let the partition size and count to be as close as possible to maximize the efficiency on partitioned search
-        # -------------------------------
-        # Partition on 100 data
-        #
-        # Count # | Size # | Worst count of traversals
-        #     100 |      1 |                       101
-        #      50 |      2 |                        52
-        #      25 |      4 |                        29
-        #      20 |      5 |                        25
-        #      10 |     10 |                        20
-        #       5 |     20 |                        25
-        #       4 |     25 |                        29
-        #       2 |     50 |                        52
-        #       1 |    100 |                       101
-        self._init_lat_idx(isqrt(len(data)))
+        # Coordinates of the data in the same order as ``self._data``
+        self._coords: np.ndarray
+        # Grid index for the data
+        # key: (latitude cell #, longitude cell #)
+        # value: indices of ``self._data`` in the cell
+        self._grid: Dict[Tuple[int, int], np.ndarray] = {}
+        # Minimum and maximum cell # (lat min, lon min, lat max, lon max) of the grid
+        self._grid_bounds: Tuple[int, int, int, int] = (0, 0, -1, -1)
+        # Coordinate of the lower-left corner of the grid
+        self._grid_origin: np.ndarray = np.zeros(2)
+        # Size of a grid cell in degree
+        self._grid_cell: float = 1.0
+        self._grid_max_abs_lat: float = 0.0
+
+        self._init_grid_idx()
+
+    def _get_grid_cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        """Get the grid cell # of the location at ``(lat, lon)``."""
+        return (floor((lat - self._grid_origin[0]) / self._grid_cell),
+                floor((lon - self._grid_origin[1]) / self._grid_cell))
+
+    def _get_grid_indices(self, lat_cells: Iterable[int], lon_cells: Iterable[int]) -> np.ndarray:
+        """Get the indices of the data located in the grid cells of ``lat_cells`` x ``lon_cells``."""
+        lon_cells = list(lon_cells)
+        indices = [self._grid[(lat_cell, lon_cell)] for lat_cell in lat_cells for lon_cell in lon_cells
+                   if (lat_cell, lon_cell) in self._grid]
+
+        if not indices:
+            return np.empty(0, dtype=int)
+
+        return np.concatenate(indices)
+
+    def _get_grid_ring_indices(self, center_cell: Tuple[int, int], ring: int) -> np.ndarray:
+        """
+        Get the indices of the data in the grid cells which are exactly ``ring`` cells away from ``center_cell``.
+
+        Only the cells within the grid bounds will be checked.
+        """
+        lat_min, lon_min, lat_max, lon_max = self._grid_bounds
+        center_lat, center_lon = center_cell
+
+        lat_range = range(max(center_lat - ring, lat_min), min(center_lat + ring, lat_max) + 1)
+        lon_range = range(max(center_lon - ring, lon_min), min(center_lon + ring, lon_max) + 1)
+
+        indices = []
+
+        # Top and bottom rows of the ring
+        for lat_cell in ((center_lat - ring, center_lat + ring) if ring else (center_lat,)):
+            if lat_min <= lat_cell <= lat_max:
+                indices.append(self._get_grid_indices((lat_cell,), lon_range))
+
+        # Left and right columns of the ring (excluding the corners)
+        for lon_cell in ((center_lon - ring, center_lon + ring) if ring else ()):
+            if lon_min <= lon_cell <= lon_max:
+                indices.append(self._get_grid_indices(
+                    (lat_cell for lat_cell in lat_range if abs(lat_cell - center_lat) < ring), (lon_cell,)))
+
+        if not indices:
+            return np.empty(0, dtype=int)
+
+        return np.concatenate(indices)
+
+    def _get_grid_ring_dist_lower_bound(self, lat: float, ring: int) -> float:
+        """
+        Get the lower bound of the distance in km from ``lat`` to any data outside of the grid ``ring``.
+
+        Data outside the ring has either the latitude or the longitude differing by at least ``ring`` cells.
+
+        - Latitude difference: the great-circle distance is at least the distance along the meridian.
+
+        - Longitude difference: the great-circle distance is at least the one at the highest latitude involved.
+        """
+        offset_rad = radians(ring * self._grid_cell)
+        cos_lat = cos(radians(max(abs(lat), self._grid_max_abs_lat)))
+
+        return EARTH_R * min(offset_rad, 2 * asin(min(1.0, cos_lat * sin(min(offset_rad, pi) / 2))))
 
     def get_data_within_range(self, center_lat: float, center_lon: float, search_range: float) -> List[T]:
         """
@@ -85,34 +161,31 @@ class LocationalDataController(DataListHolder, ABC):
 
         Unit of ``search_range`` is degree (in latitude and longitude).
         """
+        # pylint: disable=too-many-locals
+
+        if not self._data:
+            return []
+
         # Calculate the bounds
         lower_lat = center_lat - search_range
         upper_lat = center_lat + search_range
         lower_lon = center_lon - search_range
         upper_lon = center_lon + search_range
 
-        # Get the partitioned data for search
-        data_to_search: List[T] = []
+        # Get the grid cells overlapping with the search box
+        lat_min, lon_min, lat_max, lon_max = self._grid_bounds
+        lower_lat_cell, lower_lon_cell = self._get_grid_cell(lower_lat, lower_lon)
+        upper_lat_cell, upper_lon_cell = self._get_grid_cell(upper_lat, upper_lon)
 
-        for start_lat, idx in self._lat_idx:
-            start_idx, end_idx = idx
-
-            if start_lat >= lower_lat:
-                # Starting latitude fall within the lower latitude of the search box
-                data_to_search.extend(self._data[start_idx:end_idx])
-            elif start_lat > upper_lat:
-                # Early termination of the for-loop because the starting latitude
-                # goes beyond the upper latitude of the search box
-                break
+        indices = self._get_grid_indices(range(max(lower_lat_cell, lat_min), min(upper_lat_cell, lat_max) + 1),
+                                         range(max(lower_lon_cell, lon_min), min(upper_lon_cell, lon_max) + 1))
 
         # Get the data inside the search box
-        data_in_box: List[T] = []
-
-        for stop in data_to_search:
-            if lower_lat <= stop.lat <= upper_lat and lower_lon <= stop.lon <= upper_lon:
-                data_in_box.append(stop)
+        lats = self._coords[indices, 0]
+        lons = self._coords[indices, 1]
+        in_box = (lower_lat <= lats) & (lats <= upper_lat) & (lower_lon <= lons) & (lons <= upper_lon)
 
-        return data_in_box
+        return [self._data[idx] for idx in np.sort(indices[in_box]).tolist()]
 
     def get_distance_metrics_to_closest(self, coords: List[Tuple[float, float]], /,
                                         weights: Optional[List[float]] = None, name: Optional[str] = None) \
@@ -129,21 +202,39 @@ class LocationalDataController(DataListHolder, ABC):
 
         :raises ValueError: if the length of `coords` and `weights` are not the same
         """
-        # Auto-fill weights if not specified
-        if not weights:
-            weights = [1] * len(list(coords))
-        elif len(list(coords)) != len(list(weights)):
-            raise ValueError(f"The length of `coords` ({len(list(coords))}) "
-                             f"is not the same as `weights` ({len(list(weights))})")
+        coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+        weights = self._get_agent_weights(len(coords), weights)
 
         # Get the distances from the coords to the closest location/data
-        distances = []
-
-        for coord, weight in zip(coords, weights):
-            distances.extend([self.find_closest_data(*coord).distance] * round(weight))
+        _, distances = self.find_closest_data_batch(coords)
 
         # Calculate and metrics
-        return DataMetrics(distances, name=name)
+        return self._get_weighted_distance_metrics(distances, weights, name)
+
+    @staticmethod
+    def _get_agent_weights(agent_count: int, weights: Optional[List[float]]) -> np.ndarray:
+        """
+        Get the weights of ``agent_count`` agents as an array.
+
+        If ``weights`` is ``None`` or empty, it will be 1 for all agents.
+
+        :raises ValueError: if `agent_count` and the length of `weights` are not the same
+        """
+        # Auto-fill weights if not specified
+        if weights is None or len(weights) == 0:
+            return np.ones(agent_count)
+
+        if agent_count != len(weights):
+            raise ValueError(f"The length of `coords` ({agent_count}) "
+                             f"is not the same as `weights` ({len(weights)})")
+
+        return np.asarray(weights, dtype=np.float64)
+
+    @staticmethod
+    def _get_weighted_distance_metrics(distances: np.ndarray, weights: np.ndarray, name: Optional[str]) \
+            -> DataMetrics:
+        """Get the metrics of ``distances`` weighted by the rounded ``weights``."""
+        return DataMetrics(distances, name=name, weights=np.rint(weights))
 
     def find_data_order_by_dist(self, lat: float, lon: float) -> Generator[ClosestDataResult, None, None]:
         """
@@ -151,37 +242,42 @@ class LocationalDataController(DataListHolder, ABC):
 
         Immediately stops if the data is not loaded.
         """
+        # pylint: disable=too-many-locals
+
         if not self._data:
             return
 
-        # Set the initial search range to be 0.002 deg of latitude (~0.222 km / ~0.138 mi)
-        search_range = 0.002
+        center_cell = self._get_grid_cell(lat, lon)
 
-        # Find the candidate data
-        candidates: List[T] = self.get_data_within_range(lat, lon, search_range)
-        while not candidates:
-            search_range *= 1.5
-            candidates = self.get_data_within_range(lat, lon, search_range)
+        # Skip the rings that do not overlap with the grid
+        lat_min, lon_min, lat_max, lon_max = self._grid_bounds
+        ring = max(0, lat_min - center_cell[0], center_cell[0] - lat_max,
+                   lon_min - center_cell[1], center_cell[1] - lon_max)
 
-        # Set for preventing returning duplicated data
-        candidate_data_ids: Set[int] = {id(candidate) for candidate in candidates}
+        # Candidates which are found but not yet returned, in (distance, index of the data)
+        candidates: List[Tuple[float, int]] = []
+        searched_count = 0
 
-        # Expand the search range by the 1.5x each iteration
-        while candidates:
-            # Cast to :class:`ClosestDataResult` for later sorting
-            candidates: List[ClosestDataResult] = [ClosestDataResult(data, lat, lon) for data in candidates]
+        # Expand the search ring by 1 cell each iteration
+        while searched_count < len(self._data):
+            indices = self._get_grid_ring_indices(center_cell, ring)
+            if indices.size:
+                dists = distance_array((lat, lon), self._coords[indices])
+                candidates.extend(zip(dists.tolist(), indices.tolist()))
+                heapify(candidates)
+
+                searched_count += indices.size
 
-            # Iterate through data
-            for candidate in sorted(candidates, key=lambda data: data.distance):
-                yield candidate
+            # Data that are not yet searched are guaranteed to be farther than this distance
+            dist_lower_bound = self._get_grid_ring_dist_lower_bound(lat, ring)
 
-            # Expand search range
-            search_range *= 1.5
+            while candidates and candidates[0][0] <= dist_lower_bound:
+                yield ClosestDataResult(self._data[heappop(candidates)[1]], lat, lon)
 
-            # Search for new candidate data
-            candidates: List[T] = [data for data in self.get_data_within_range(lat, lon, search_range)
-                                   if id(data) not in candidate_data_ids]
-            candidate_data_ids.update({id(candidate) for candidate in candidates})
+            ring += 1
+
+        while candidates:
+            yield ClosestDataResult(self._data[heappop(candidates)[1]], lat, lon)
 
     def find_closest_data_num(self, lat: float, lon: float, count: int) -> List[ClosestDataResult]:
         """
@@ -202,3 +298,80 @@ class LocationalDataController(DataListHolder, ABC):
         :raises ValueError: if no locational data is loaded
         """
         return self.find_closest_data_num(lat, lon, 1)[0]
+
+    def find_closest_data_num_batch(self, coords: np.ndarray, count: int, /, chunk_size: Optional[int] = None) \
+            -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the ``count`` closest data to each location in ``coords``.
+
+        ``coords`` is an array in shape ``(N, 2)``, which each row is a ``(lat, lon)``.
+
+        Returns a tuple of 2 arrays in shape ``(N, count)``, ordered by the distance ascendingly for each row:
+
+        - Indices of the closest data in ``all_data``.
+
+        - Distances in km between each location and the corresponding closest data.
+
+        ``count`` will be capped at the count of the data.
+
+        The distances are calculated in vectorized chunks, each chunk contains ``chunk_size`` locations.
+        If ``chunk_size`` is not given, it will be determined by the count of the data.
+
+        :raises ValueError: if no locational data is loaded or `coords` is not in shape (N, 2)
+        """
+        if not self._data:
+            raise ValueError("No locational data loaded")
+
+        coords = np.asarray(coords, dtype=np.float64)
+        if coords.ndim != 2 or coords.shape[1] != 2:
+            raise ValueError(f"`coords` should be in shape (N, 2): {coords.shape}")
+
+        data_count = len(self._data)
+        count = min(count, data_count)
+
+        if not chunk_size:
+            # Keep the distance matrix of a chunk having ~1M elements at max
+            chunk_size = max(1, _BATCH_MAX_ELEMENTS // data_count)
+
+        indices = np.empty((len(coords), count), dtype=int)
+        distances = np.empty((len(coords), count), dtype=np.float64)
+
+        for start in range(0, len(coords), chunk_size):
+            end = start + chunk_size
+
+            dist_matrix = distance_array(coords[start:end, np.newaxis, :], self._coords[np.newaxis, :, :])
+
+            if count < data_count:
+                # Only the ``count`` closest data need to be sorted
+                idx_chunk = np.argpartition(dist_matrix, count - 1, axis=1)[:, :count]
+            else:
+                idx_chunk = np.broadcast_to(np.arange(data_count), dist_matrix.shape)
+
+            dist_chunk = np.take_along_axis(dist_matrix, idx_chunk, axis=1)
+            order = np.argsort(dist_chunk, axis=1, kind="stable")
+
+            indices[start:end] = np.take_along_axis(idx_chunk, order, axis=1)
+            distances[start:end] = np.take_along_axis(dist_chunk, order, axis=1)
+
+        return indices, distances
+
+    def find_closest_data_batch(self, coords: np.ndarray, /, chunk_size: Optional[int] = None) \
+            -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the data closest to each location in ``coords``.
+
+        ``coords`` is an array in shape ``(N, 2)``, which each row is a ``(lat, lon)``.
+
+        Returns a tuple of 2 arrays in shape ``(N,)``:
+
+        - Indices of the closest data in ``all_data``.
+
+        - Distances in km between each location and its closest data.
+
+        Check the documentation of ``find_closest_data_num_batch()`` for ``chunk_size``.
+
+        :raises ValueError: if no locational data is loaded or `coords` is not in shape (N, 2)
+        """
+        indices, distances = self.find_closest_data_num_batch(coords, 1, chunk_size=chunk_size)
+
+        return indices[:, 0], distances[:, 0]
@@ -4,12 +4,35 @@ Controller of the MMT GTFS stop data.
 The complete MMT GTFS dataset can be downloaded here:
 http://transitdata.cityofmadison.com/GTFS/mmt_gtfs.zip
 """
-from typing import List, Dict, Optional
+from dataclasses import dataclass
+from typing import List, Dict, Optional, Tuple
 
 from msnmetrosim.models import MMTStop
-from .base import CSVLoadableController, LocationalDataController
+from msnmetrosim.utils import travel_time
+from .base import CSVLoadableController, LocationalDataController, RowFilter
 
-__all__ = ("MMTStopDataController",)
+__all__ = ("MMTStopDataController", "StopWalkNeighbor")
+
+
+@dataclass
+class StopWalkNeighbor:
+    """
+    A stop that is walkable from another stop.
+
+    ``distance`` is the walking distance in **km**.
+
+    ``walk_time`` is the time spent on walking in **seconds**.
+    """
+
+    stop: MMTStop
+
+    distance: float
+    walk_time: float
+
+    @property
+    def stop_id(self) -> int:
+        """Get the stop ID of the walkable stop."""
+        return self.stop.stop_id
 
 
 class MMTStopDataController(LocationalDataController, CSVLoadableController):
@@ -33,6 +56,9 @@ class MMTStopDataController(LocationalDataController, CSVLoadableController):
         for stop in stops:
             self._init_dict_by_id(stop)
 
+        # (max walk distance, walk speed) -> walk graph
+        self._walk_graphs: Dict[Tuple[float, float], Dict[int, List[StopWalkNeighbor]]] = {}
+
     def get_stops_within_range(self, center_lat: float, center_lon: float, range_km: float) \
             -> List[MMTStop]:
         """
@@ -56,6 +82,40 @@ class MMTStopDataController(LocationalDataController, CSVLoadableController):
         """Get the stop by its ``stop_id``."""
         return self._dict_by_id.get(stop_id)
 
+    def get_walk_graph(self, max_walk_distance: float, walk_speed: float) -> Dict[int, List[StopWalkNeighbor]]:
+        """
+        Get the graph of the stops walkable from each stop.
+
+        The key of the returned :class:`dict` is the stop ID;
+        the value is the stops within ``max_walk_distance`` km from it, ordered by the distance.
+        Stops located at the same coordinate are excluded because the agent does not need to walk.
+
+        ``walk_speed`` is the walking speed in **km/h** for calculating the walk time.
+
+        The graph is built once for each combination of ``max_walk_distance`` and ``walk_speed``, then cached.
+        """
+        cache_key = (max_walk_distance, walk_speed)
+
+        if cache_key not in self._walk_graphs:
+            walk_graph: Dict[int, List[StopWalkNeighbor]] = {}
+
+            for stop in self.all_data:
+                neighbors = walk_graph[stop.stop_id] = []
+
+                for close_data in self.find_data_order_by_dist(*stop.coordinate):
+                    if close_data.distance > max_walk_distance:
+                        break  # Beyond max walking distance
+
+                    if close_data.distance == 0:
+                        continue  # No need to walk
+
+                    neighbors.append(StopWalkNeighbor(close_data.data, close_data.distance,
+                                                      travel_time(walk_speed, close_data.distance)))
+
+            self._walk_graphs[cache_key] = walk_graph
+
+        return self._walk_graphs[cache_key]
+
     def find_closest_stop(self, lat: float, lon: float):
         """Find the closest stop around the location at ``(lat, lon)``."""
         return self.find_closest_data(lat, lon)
@@ -63,3 +123,16 @@ class MMTStopDataController(LocationalDataController, CSVLoadableController):
     @staticmethod
     def on_row_read(row: List[str]) -> object:
         return MMTStop.parse_from_row(row)
+
+    @staticmethod
+    def get_bbox_row_filter(lat_range: Tuple[float, float], lon_range: Tuple[float, float]) -> RowFilter:
+        """
+        Get a row filter of ``mmt_gtfs/stops.csv`` which only loads the stops in the bounding box.
+
+        ``lat_range`` and ``lon_range`` are the inclusive ranges of the latitude and the longitude in the form of
+        ``(min, max)``.
+        """
+        lat_min, lat_max = lat_range
+        lon_min, lon_max = lon_range
+
+        return lambda row: lat_min <= float(row[4]) <= lat_max and lon_min <= float(row[5]) <= lon_max
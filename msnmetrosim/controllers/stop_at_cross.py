@@ -1,15 +1,46 @@
 """Controller of the MMT GTFS stops grouped by its located cross."""
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, Optional, List, Tuple
 
+import numpy as np
+
 from msnmetrosim.models import MMTStop, MMTStopsAtCross
 from msnmetrosim.models.results import CrossStopRemovalResult
-from msnmetrosim.utils import generate_points, Progress
+from msnmetrosim.utils import DataMetrics, generate_points, Progress
 from .base import LocationalDataController
 from .population import PopulationDataController
 from .stop import MMTStopDataController
 
 __all__ = ("MMTStopsAtCrossDataController",)
 
+# Controllers shipped to each worker process once by ``_init_stop_removal_worker()``
+_worker_ctrl: Optional["MMTStopsAtCrossDataController"] = None  # pylint: disable=invalid-name
+_worker_pop_data: Optional[PopulationDataController] = None  # pylint: disable=invalid-name
+
+
+def _init_stop_removal_worker(ctrl: "MMTStopsAtCrossDataController", pop_data: Optional[PopulationDataController]):
+    """Store the controllers to be used by the stop removal evaluations in the worker process."""
+    global _worker_ctrl, _worker_pop_data  # pylint: disable=global-statement
+
+    _worker_ctrl = ctrl
+    _worker_pop_data = pop_data
+
+
+def _get_stop_removal_metrics_in_worker(args: Tuple[int, float, float, bool]) -> Tuple[DataMetrics, DataMetrics]:
+    """
+    Get the metrics before and after removing the stop at index ``args[0]`` in the worker process.
+
+    ``args`` contains the stop index, ``range_km``, ``interval_km`` and ``incremental``.
+
+    Only the metrics are returned, so the stop is not sent back to the main process.
+    """
+    stop_idx, range_km, interval_km, incremental = args
+
+    rm_result = _worker_ctrl.get_single_stop_remove_result(
+        _worker_ctrl.all_data[stop_idx], range_km, interval_km, _worker_pop_data, incremental=incremental)
+
+    return rm_result.metrics_before, rm_result.metrics_after
+
 
 class MMTStopsAtCrossDataController(LocationalDataController):
     """Controller of the MMT GTFS stops grouped by its located cross."""
@@ -35,6 +66,9 @@ class MMTStopsAtCrossDataController(LocationalDataController):
 
         super().__init__(list(self._dict_street.values()))
 
+        # Index of each cross in ``self.all_data``, used for the incremental stop removal
+        self._idx_street: Dict[int, int] = {data.unique_cross_id: idx for idx, data in enumerate(self.all_data)}
+
     def get_grouped_stop_by_street_names(self, street_1: str, street_2: str) -> Optional[MMTStopsAtCross]:
         """
         Get the stop located at the cross of ``street_1`` and ``street_2``.
@@ -43,8 +77,29 @@ class MMTStopsAtCrossDataController(LocationalDataController):
         """
         return self._dict_street.get(MMTStopsAtCross.calculate_hash(street_1, street_2))
 
+    def _get_distances_before_after_removal(self, target_stop: MMTStopsAtCross, agents: np.ndarray) \
+            -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the distances of each agent to its closest stop before and after removing ``target_stop``.
+
+        The 2 closest stops of each agent are found at once.
+        Only the agents whose closest stop is ``target_stop`` are reassigned to their 2nd closest stop after removal.
+
+        :raises ValueError: if there are less than 2 stops
+        """
+        if len(self.all_data) < 2:
+            raise ValueError("No locational data loaded after removing the stop")
+
+        indices, distances = self.find_closest_data_num_batch(agents, 2)
+
+        dist_before = distances[:, 0]
+        dist_after = np.where(indices[:, 0] == self._idx_street[target_stop.unique_cross_id],
+                              distances[:, 1], dist_before)
+
+        return dist_before, dist_after
+
     def get_metrics_of_single_stop_removal(self, street_1: str, street_2: str, agents: List[Tuple[float, float]],
-                                           weights: Optional[List[float]] = None) \
+                                           weights: Optional[List[float]] = None, incremental: bool = True) \
             -> CrossStopRemovalResult:
         """
         Get the accessibility difference metrics of removing a single stop at ``(street_1, street_2)``.
@@ -56,6 +111,10 @@ class MMTStopsAtCrossDataController(LocationalDataController):
 
         If ``agents`` is ``None``, it will be 1 for all ``agents``.
 
+        If ``incremental`` is ``True``, the 2 closest stops of each agent will be found once,
+        then only the agents whose closest stop is the removed one get their distance changed.
+        Otherwise, a controller without the removed stop will be created to calculate the distances.
+
         :raises ValueError: if the length of `coords` and `weights` are not the same
                             or no stop is located at `(street_1, street_2)`
         """
@@ -64,6 +123,19 @@ class MMTStopsAtCrossDataController(LocationalDataController):
         if not target_stop:
             raise ValueError(f"There are no stops located near the cross of {street_1} & {street_2}")
 
+        if incremental:
+            agents = np.asarray(agents, dtype=np.float64).reshape(-1, 2)
+            weights = self._get_agent_weights(len(agents), weights)
+
+            dist_before, dist_after = self._get_distances_before_after_removal(target_stop, agents)
+
+            metrics_before = self._get_weighted_distance_metrics(
+                dist_before, weights, f"Before removing {target_stop.cross_name}")
+            metrics_after = self._get_weighted_distance_metrics(
+                dist_after, weights, f"After removing {target_stop.cross_name}")
+
+            return CrossStopRemovalResult(target_stop, metrics_before, metrics_after)
+
         self_no_target = self.duplicate(lambda data: data.unique_cross_id != target_stop.unique_cross_id)
 
         # Get the distance metrics
@@ -74,8 +146,31 @@ class MMTStopsAtCrossDataController(LocationalDataController):
 
         return CrossStopRemovalResult(target_stop, metrics_before, metrics_after)
 
+    def get_single_stop_remove_result(self, stop: MMTStopsAtCross, range_km: float, interval_km: float,
+                                      pop_data: Optional[PopulationDataController] = None, incremental: bool = True) \
+            -> CrossStopRemovalResult:
+        """
+        Get the result of removing ``stop`` with the agents spawned around it.
+
+        Check the documentation of ``get_all_stop_remove_results()`` for the parameters.
+        """
+        agents: List[Tuple[float, float]]
+        weights: Optional[List[float]]
+
+        if pop_data:
+            lat, lon = stop.coordinate
+
+            agents, weights = pop_data.get_population_points(lat, lon, range_km, interval_km)
+        else:
+            agents = generate_points(stop.coordinate, range_km, interval_km)
+            weights = None
+
+        return self.get_metrics_of_single_stop_removal(stop.primary, stop.secondary, agents, weights,
+                                                       incremental=incremental)
+
     def get_all_stop_remove_results(self, range_km: float, interval_km: float,
-                                    pop_data: Optional[PopulationDataController] = None) \
+                                    pop_data: Optional[PopulationDataController] = None, incremental: bool = True,
+                                    workers: Optional[int] = None) \
             -> List[CrossStopRemovalResult]:
         """
         Try to remove each stops one by one, and return the results of the removal.
@@ -90,36 +185,55 @@ class MMTStopsAtCrossDataController(LocationalDataController):
         Check the documentation of ``msnmetrosim.utils.generate_points()``
         for more information on ``range_km`` and ``interval_km``.
 
-        WARNING: This method could be very expensive.
+        Check the documentation of ``get_metrics_of_single_stop_removal()`` for ``incremental``.
 
-        For 1153 records, it takes ~5 mins to run.
-        """
-        # ThreadPoolExecutor won't help on performance boosting
-        ret: List[CrossStopRemovalResult] = []
+        If ``workers`` is greater than 1, the removals will be evaluated in a process pool with ``workers`` processes.
+        This controller and ``pop_data`` are sent to each process once upon its initialization.
+        The order of the results is always the same as ``all_data``.
+
+        WARNING: This method could be very expensive if ``incremental`` is ``False``.
 
+        For 1153 records, it takes ~5 mins to run if ``incremental`` is ``False``.
+        """
         total_count = len(self.all_data)
         progress = Progress(total_count)
         progress.start()
 
+        # ThreadPoolExecutor won't help on performance boosting because the calculation holds the GIL
+        if workers and workers > 1:
+            return self._get_all_stop_remove_results_parallel(range_km, interval_km, pop_data, incremental,
+                                                              workers=workers, progress=progress)
+
+        ret: List[CrossStopRemovalResult] = []
+
         for stop in self.all_data:
-            stop: MMTStopsAtCross
-            agents: List[Tuple[float, float]]
-            weights: Optional[List[float]]
+            ret.append(self.get_single_stop_remove_result(stop, range_km, interval_km, pop_data, incremental))
 
-            if pop_data:
-                lat, lon = stop.coordinate
+            progress.rec_completed_one()
+            print(progress)
 
-                agents, weights = pop_data.get_population_points(lat, lon, range_km, interval_km)
-            else:
-                agents = generate_points(stop.coordinate, range_km, interval_km)
-                weights = None
+        return ret
 
-            rm_result = self.get_metrics_of_single_stop_removal(stop.primary, stop.secondary, agents, weights)
+    def _get_all_stop_remove_results_parallel(
+            self, range_km: float, interval_km: float, pop_data: Optional[PopulationDataController],
+            incremental: bool, *, workers: int, progress: Progress
+    ) -> List[CrossStopRemovalResult]:
+        """Evaluate the removal of each stop in a process pool. Results are ordered as ``all_data``."""
+        ret: List[CrossStopRemovalResult] = []
 
-            ret.append(rm_result)
+        tasks = [(stop_idx, range_km, interval_km, incremental) for stop_idx in range(len(self.all_data))]
+        # Send the tasks in shards to lower the IPC overhead
+        chunk_size = max(1, len(tasks) // (workers * 4))
 
-            progress.rec_completed_one()
-            print(progress)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_stop_removal_worker,
+                                 initargs=(self, pop_data)) as executor:
+            # `map()` yields the results in the order of the tasks
+            for stop, metrics in zip(self.all_data, executor.map(_get_stop_removal_metrics_in_worker, tasks,
+                                                                  chunksize=chunk_size)):
+                ret.append(CrossStopRemovalResult(stop, *metrics))
+
+                progress.rec_completed_one()
+                print(progress)
 
         return ret
 
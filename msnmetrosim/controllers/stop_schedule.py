@@ -4,131 +4,282 @@ Controller of the MMT GTFS stop schedule data.
 The complete MMT GTFS dataset can be downloaded here:
 http://transitdata.cityofmadison.com/GTFS/mmt_gtfs.zip
 """
-from datetime import timedelta, datetime
-from typing import List, Iterable, Dict, Tuple
+from datetime import date, datetime, time, timedelta
+from typing import Any, List, Iterable, Dict, Optional, Tuple, Union
+
+import numpy as np
 
 from msnmetrosim.models import MMTStopSchedule, MMTStopScheduleSim
-from .base import CSVLoadableController
+from msnmetrosim.utils import time_to_seconds
+from .base import CSVLoadableController, RowFilter
+from .base.cache import load_cached_columns, save_cached_columns
+from .trip import MMTTripDataController, ServiceIdNotFoundError
 
 __all__ = ("MMTStopScheduleController",)
 
 
+def _to_id_array(ids: Optional[Iterable[int]]) -> Optional[np.ndarray]:
+    """Convert ``ids`` to an array for ``np.isin()``. Returns ``None`` if ``ids`` is ``None``."""
+    if ids is None:
+        return None
+
+    return np.fromiter(ids, dtype=np.int64)
+
+
+_FIELD_DTYPES: Dict[str, type] = {
+    "trip_id": np.int64,
+    "stop_sequence": np.int64,
+    "stop_id": np.int64,
+    "arrival_secs": np.int64,
+    "departure_secs": np.int64,
+    "timepoint": np.bool_,
+    "shape_dist_traveled": np.float64,
+}
+"""Fields of :class:`MMTStopSchedule` stored as the columns of the controller, in the order of the constructor."""
+
+
+_ARRIVAL_INDEX_PREFIX = "arrival_index_"
+
+_ARRIVAL_INDEX_DTYPES: Dict[str, type] = {
+    f"{_ARRIVAL_INDEX_PREFIX}{name}": np.int64 for name in ("row", "arrival", "day_offset", "next")
+}
+"""Columns of the index sorted by the arrival time, which are cached with the columns of the fields."""
+
+
+def _to_columns(stop_schedules: List[MMTStopSchedule]) -> Dict[str, np.ndarray]:
+    """Convert ``stop_schedules`` to the columns of their fields."""
+    return {field: np.array([getattr(data, field) for data in stop_schedules], dtype=dtype)
+            for field, dtype in _FIELD_DTYPES.items()}
+
+
 class MMTStopScheduleController(CSVLoadableController):
     """
     MMT stop schedule data controller.
 
     Data file that will use this controller:
     - mmt_gtfs/stop_times.csv
+
+    .. note::
+        The stop schedules are stored as the columns of their fields, which take up to 8 bytes per field per row.
+        The :class:`MMTStopSchedule` entries are only created for the returned stop schedules.
+        ``all_data`` creates all entries once on its first call, which is not needed by the simulations.
+
+        The columns and the index sorted by the arrival time are cached instead of the entries
+        when loaded by :meth:`load_csv()`. The cached columns are memory-mapped,
+        so a warm start neither creates any entry nor sorts the stop schedules again.
     """
 
-    def _init_by_arrival_hr(self, stop_schedules: List[MMTStopSchedule]):
-        """Initialize a :class:`list` which index is the hour of arrival time of the stop schedule."""
-        for stop_schedule in stop_schedules:
-            self._by_arrival_hr[stop_schedule.arrival_time.hour].append(stop_schedule)
+    # pylint: disable=too-many-instance-attributes
+
+    def _init_by_trip_id(self):
+        """
+        Initialize ``self._by_trip_id`` which key is the trip ID and the value is the range of its rows.
+
+        This assumes the rows are already sorted by the trip ID first, then the stop sequence.
+        """
+        trip_id = self._columns["trip_id"]
+
+        starts = np.flatnonzero(np.diff(trip_id, prepend=trip_id[:1] - 1))
+        ends = np.append(starts[1:], len(trip_id))
 
-    def _init_by_trip_id_len(self, stop_schedules: List[MMTStopSchedule]):
+        self._by_trip_id: Dict[int, Tuple[int, int]] = dict(zip(trip_id[starts].tolist(),
+                                                                zip(starts.tolist(), ends.tolist())))
+
+    def _get_arrival_index(self) -> Dict[str, np.ndarray]:
         """
-        Initialize ``self._by_trip_id`` which key is the trip ID and the value is the stops arranged sequentially.
+        Get the index of the stop schedules sorted by the arrival time.
+
+        This assumes the rows are already sorted by the trip ID first, then the stop sequence.
 
-        This assumes ``stop_schedules`` is already sorted by the trip ID first, then the stop sequence.
+        ``row`` is the row of ``self._columns``.
+        ``arrival`` is the arrival time of the day in seconds.
+        ``day_offset`` is the count of days from the service date to the arrival,
+        which is ``1`` for the stops arriving after midnight, for example.
 
-        This also initializes ``self._by_trip_len`` to store the stop count of a trip.
-        The key of this dict is the trip ID, and the value of this dict is the stop count of that trip.
+        ``next`` is the index row of the next stop of the same trip, which is ``-1`` if it is the last stop.
         """
-        for stop_schedule in stop_schedules:
-            trip_id = stop_schedule.trip_id
+        # Only the time of the day is sorted here, the date is determined by the query
+        day_offset, arrival = np.divmod(self._columns["arrival_secs"], 86400)
+        order = np.argsort(arrival, kind="stable").astype(np.int64, copy=False)
 
-            if trip_id not in self._by_trip_id:
-                self._by_trip_id[trip_id] = [stop_schedule]
-                self._by_trip_len[trip_id] = 1
-            else:
-                self._by_trip_id[trip_id].append(stop_schedule)
-                self._by_trip_len[trip_id] += 1
+        # Row of each stop schedule after sorting
+        row_of = np.empty_like(order)
+        row_of[order] = np.arange(len(order))
 
-    def __init__(self, stop_schedules: List[MMTStopSchedule]):
-        super().__init__(stop_schedules)
+        trip_id = self._columns["trip_id"]
 
-        self._by_arrival_hr: List[List[MMTStopSchedule]] = [[] for _ in range(24)]
-        self._init_by_arrival_hr(stop_schedules)
+        # Next stop schedule of the same trip, stop schedules of a trip are consecutive before sorting
+        next_row = np.full(len(order), -1, dtype=np.int64)
+        has_next = np.flatnonzero(trip_id[:-1] == trip_id[1:])
+        next_row[has_next] = row_of[has_next + 1]
 
-        self._by_trip_id: Dict[int, List[MMTStopSchedule]] = {}
-        self._by_trip_len: Dict[int, int] = {}
-        self._init_by_trip_id_len(stop_schedules)
+        return {"row": order, "arrival": arrival[order], "day_offset": day_offset[order], "next": next_row[order]}
 
-    def _get_stop_schedules(self, arrival_hr: int, trip_ids: Iterable[int] = None) -> List[MMTStopSchedule]:
+    def _init_columns(self, arrival_index: Optional[Dict[str, np.ndarray]]):
         """
-        Get the stop schedules which the hour of arrival time is ``arrival_hr``.
+        Initialize the columns of the stop schedules sorted by the arrival time from ``arrival_index``.
 
-        If ``trip_ids`` is given,
-        the return will only contain the stop schedules which trip ID is contained in ``trip_ids``.
+        ``arrival_index`` is made by :meth:`_get_arrival_index()` if it is ``None``.
         """
-        if arrival_hr < 0 or arrival_hr > 23:
-            raise ValueError(f"Invalid `arrival_hr`: {arrival_hr}")
+        if arrival_index is None:
+            arrival_index = self._get_arrival_index()
 
-        ret: List[MMTStopSchedule]
+        self._col_row: np.ndarray = arrival_index["row"]
+        self._col_trip_id: np.ndarray = self._columns["trip_id"][self._col_row]
+        self._col_arrival: np.ndarray = arrival_index["arrival"]
+        self._col_day_offset: np.ndarray = arrival_index["day_offset"]
+        self._col_next: np.ndarray = arrival_index["next"]
 
-        if trip_ids:
-            ret = [data for trip_id in trip_ids
-                   for data in self._by_trip_id[trip_id] if data.arrival_time.hour == arrival_hr]
-        else:
-            ret = [stop_schedule for stop_schedule in self._by_arrival_hr[arrival_hr]
-                   if stop_schedule in trip_ids]
+    def __init__(self, stop_schedules: Union[List[MMTStopSchedule], Dict[str, np.ndarray]], /,
+                 arrival_index: Optional[Dict[str, np.ndarray]] = None):
+        """
+        ``stop_schedules`` could be the stop schedule entries, or the columns of their fields.
 
-        return ret
+        The columns are the arrays of the fields of :class:`MMTStopSchedule`, keyed by the field names.
 
-    def _get_sims_hr(self, start_dt: datetime, time_range: float, /, trip_ids: Iterable[int] = None) \
-            -> List[MMTStopScheduleSim]:
-        # pylint: disable=cell-var-from-loop
-        ret: List[MMTStopScheduleSim] = []
+        ``arrival_index`` is the index made by :meth:`_get_arrival_index()` of the same stop schedules,
+        which is made again if not given.
+        """
+        super().__init__(None)
+
+        self._columns: Dict[str, np.ndarray] = \
+            stop_schedules if isinstance(stop_schedules, dict) else _to_columns(stop_schedules)
+
+        self._init_columns(arrival_index)
+
+        # Service ID -> (rows of the trips in the service, arrival time of the rows)
+        self._by_service_id: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
 
-        for hour in range(start_dt.hour, start_dt.hour + int(time_range // 3600)):
-            # Modding 24 since the start time and the end time is cross-day is possible
-            data_block = self._get_stop_schedules(hour % 24, trip_ids)
+        self._init_by_trip_id()
 
-            start_date = start_dt.date()
-            if hour > 23:
-                start_date += timedelta(days=1)
+    @classmethod
+    def from_chunks(cls, chunks: Iterable[List[MMTStopSchedule]]):
+        columns: Dict[str, List[np.ndarray]] = {field: [] for field in _FIELD_DTYPES}
 
-            # --- Find the next stop and add it if exists
+        for chunk in chunks:
+            for field, column in _to_columns(chunk).items():
+                columns[field].append(column)
 
-            # Cache to store the converted next :class:`MMTStopScheduleSim`
-            # Key is (trip_id, stop_sequence), value is the next stop for the corresponding stop
-            next_cache: Dict[Tuple[int, int]] = {}
+        return cls({field: np.concatenate(columns[field]) if columns[field] else np.empty(0, dtype=dtype)
+                    for field, dtype in _FIELD_DTYPES.items()})
 
-            # In-line function to fill the next stop cache
-            def fill_next_cache(tid, seq):
-                if seq >= self._by_trip_len[tid]:
-                    return None
+    @classmethod
+    def from_cache(cls, cache_dir: str, src_path: str, options: Dict[str, Any]):
+        columns = load_cached_columns(cache_dir, src_path, MMTStopSchedule.parse_from_row, options,
+                                      {**_FIELD_DTYPES, **_ARRIVAL_INDEX_DTYPES})
+        if columns is None:
+            return None
 
-                next_raw = self._by_trip_id[tid][seq]
+        return cls({field: columns[field] for field in _FIELD_DTYPES},
+                   {name[len(_ARRIVAL_INDEX_PREFIX):]: columns[name] for name in _ARRIVAL_INDEX_DTYPES})
 
-                # Check if the arrival time is in the range
-                if next_raw.arrival_time.hour == hour:
-                    next_sim = fill_next_cache(tid, seq + 1)
-                    next_cache[(tid, seq)] = MMTStopScheduleSim.from_raw(next_raw, start_date, next_stop=next_sim)
+    def to_cache(self, cache_dir: str, src_path: str, options: Dict[str, Any]) -> bool:
+        arrival_index = {"row": self._col_row, "arrival": self._col_arrival, "day_offset": self._col_day_offset,
+                         "next": self._col_next}
 
-                    return next_sim
+        return save_cached_columns(cache_dir, src_path, MMTStopSchedule.parse_from_row, options, {
+            **self._columns, **{_ARRIVAL_INDEX_PREFIX + name: column for name, column in arrival_index.items()}
+        })
 
-                return None
+    @property
+    def all_data(self) -> List[MMTStopSchedule]:
+        if self._data is None:
+            self._data = self._get_stop_schedules(slice(None))
 
-            for stop_schedule in data_block:
-                trip_id = stop_schedule.trip_id
-                next_seq = stop_schedule.stop_sequence
-                next_cache_key = (trip_id, stop_schedule.stop_sequence)
+        return self._data
 
-                # If the next stop is not yet generated, generate it and store it to the cache for later use
-                if next_cache_key not in next_cache and next_seq < self._by_trip_len[trip_id]:
-                    fill_next_cache(trip_id, next_seq)
+    def _get_stop_schedules(self, rows: Union[np.ndarray, slice]) -> List[MMTStopSchedule]:
+        """Create the stop schedule entries of ``rows`` of ``self._columns``."""
+        return list(map(MMTStopSchedule, *(self._columns[field][rows].tolist() for field in _FIELD_DTYPES)))
 
-                ret.append(
-                    MMTStopScheduleSim.from_raw(stop_schedule, start_date,
-                                                next_stop=next_cache.get(next_cache_key))
-                )
+    def get_stop_schedules_of_trip(self, trip_id: int) -> List[MMTStopSchedule]:
+        """
+        Get the stop schedules of the trip ``trip_id`` sorted by the stop sequence.
+
+        Returns an empty list if the trip is not found.
+        """
+        if trip_id not in self._by_trip_id:
+            return []
 
-        return ret
+        return self._get_stop_schedules(slice(*self._by_trip_id[trip_id]))
+
+    def index_services(self, ctrl_trips: MMTTripDataController):
+        """
+        Index the stop schedules by the service ID of their trips using the trip data ``ctrl_trips``.
+
+        This is required for filtering the stop schedules by the service IDs.
+        Each service ID will only be indexed once.
+        """
+        for service_id in ctrl_trips.get_all_service_ids():
+            if service_id in self._by_service_id:
+                continue
+
+            rows = np.flatnonzero(np.isin(self._col_trip_id, _to_id_array(ctrl_trips.get_trip_ids(service_id))))
+            self._by_service_id[service_id] = (rows, self._col_arrival[rows])
+
+    def _get_rows_by_arrival(self, start_secs: float, end_secs: float, trip_ids: Optional[np.ndarray],
+                             service_ids: Optional[Iterable[str]]) -> np.ndarray:
+        """
+        Get the row indices of the columns which arrival time is between ``start_secs`` and ``end_secs`` inclusively.
+
+        Both ``start_secs`` and ``end_secs`` are the seconds since the start of the day.
+
+        If ``trip_ids`` is not ``None``, only the rows which trip ID is in ``trip_ids`` will be returned.
+
+        If ``service_ids`` is not ``None``, only the rows which trip is in any of ``service_ids`` will be returned.
+
+        The returned rows are sorted by the arrival time.
+
+        :raises ServiceIdNotFoundError: if any of `service_ids` is not indexed
+        """
+        if service_ids is None:
+            idx_start = np.searchsorted(self._col_arrival, start_secs, side="left")
+            idx_end = np.searchsorted(self._col_arrival, end_secs, side="right")
+
+            rows = np.arange(idx_start, idx_end)
+        else:
+            rows_of_services: List[np.ndarray] = []
+
+            for service_id in service_ids:
+                if service_id not in self._by_service_id:
+                    raise ServiceIdNotFoundError(service_id)
+
+                service_rows, service_arrival = self._by_service_id[service_id]
+
+                rows_of_services.append(service_rows[np.searchsorted(service_arrival, start_secs, side="left"):
+                                                     np.searchsorted(service_arrival, end_secs, side="right")])
+
+            # Rows are in the order of the arrival time, a trip only belongs to a single service
+            rows = np.sort(np.concatenate(rows_of_services)) if rows_of_services else np.empty(0, dtype=np.int64)
+
+        if trip_ids is not None:
+            rows = rows[np.isin(self._col_trip_id[rows], trip_ids)]
+
+        return rows
+
+    def get_stop_schedules_by_arrival(self, start_time: time, end_time: time, /,
+                                      trip_ids: Optional[Iterable[int]] = None,
+                                      service_ids: Optional[Iterable[str]] = None) -> List[MMTStopSchedule]:
+        """
+        Get all stop schedules which arrival time is between ``start_time`` and ``end_time`` inclusively.
+
+        The return will be sorted by the arrival time.
+
+        If ``trip_ids`` is set, only stop schedules which trip ID is in ``trip_ids`` will be returned.
+
+        If ``service_ids`` is set, only stop schedules which trip is in any of ``service_ids`` will be returned.
+        ``index_services()`` must be called before filtering by the service IDs.
+
+        :raises ServiceIdNotFoundError: if any of `service_ids` is not indexed
+        """
+        rows = self._get_rows_by_arrival(time_to_seconds(start_time), time_to_seconds(end_time),
+                                         _to_id_array(trip_ids), service_ids)
+
+        return self._get_stop_schedules(self._col_row[rows])
 
     def get_stop_schedule_sim_by_arrival(self, start_dt: datetime, time_range: float, /,
-                                         trip_ids: Iterable[int] = None) \
+                                         trip_ids: Optional[Iterable[int]] = None,
+                                         service_ids: Optional[Iterable[str]] = None) \
             -> List[MMTStopScheduleSim]:
         """
         Get all stop schedules which arrival time is between ``start_dt`` and ``(start_dt + time_range)``.
@@ -138,44 +289,70 @@ class MMTStopScheduleController(CSVLoadableController):
         The return will be sorted by the arrival time.
 
         If ``trip_ids`` is set, only stop schedules which trip ID is in ``trip_ids`` will be returned.
+
+        If ``service_ids`` is set, only stop schedules which trip is in any of ``service_ids`` will be returned.
+        ``index_services()`` must be called before filtering by the service IDs.
+
+        ``next_stop`` of each returned stop schedule is the next stop of the same trip.
+        If the next stop is also returned, ``next_stop`` will be the returned one.
+
+        :raises ServiceIdNotFoundError: if any of `service_ids` is not indexed
         """
-        # Blocks to "include all"
-        ret: List[MMTStopScheduleSim] = self._get_sims_hr(start_dt, time_range, trip_ids=trip_ids)
+        # pylint: disable=too-many-locals
+
+        end_dt = start_dt + timedelta(seconds=time_range)
 
-        # Blocks to selectively included
-        end_time = start_dt + timedelta(seconds=time_range)
+        trip_ids = _to_id_array(trip_ids)
+        if service_ids is not None:
+            service_ids = list(service_ids)  # Used for each date
 
-        # --- Find the next stop and add it if exists
+        # Rows of each date in the time range, the stop schedules arrive at different dates if crossing the day
+        rows_by_date: List[Tuple[date, np.ndarray]] = []
 
-        # Cache to store the converted next :class:`MMTStopScheduleSim`
-        # Key is (trip_id, stop_sequence), value is the next stop for the corresponding stop
-        next_cache: Dict[Tuple[int, int]] = {}
+        current_date = start_dt.date()
+        while (day_start := datetime.combine(current_date, time())) <= end_dt:
+            rows_by_date.append((current_date, self._get_rows_by_arrival(
+                max((start_dt - day_start).total_seconds(), 0), (end_dt - day_start).total_seconds(), trip_ids,
+                service_ids)))
 
-        # In-line function to fill the next stop cache
-        def fill_next_cache(tid, seq):
-            if seq >= self._by_trip_len[tid]:
-                return None
+            current_date += timedelta(days=1)
 
-            next_raw = self._by_trip_id[tid][seq]
+        # (arrival date, row) -> converted stop schedule
+        sims: Dict[Tuple[date, int], MMTStopScheduleSim] = {}
 
-            # Check if the arrival time is in the range
-            next_sim = fill_next_cache(tid, seq + 1)
-            next_cache[(tid, seq)] = MMTStopScheduleSim.from_raw(next_raw, start_dt.date(), next_stop=next_sim)
+        # Converted from the latest one, so the next stop of a stop schedule is always converted first
+        for arrival_date, rows in reversed(rows_by_date):
+            stop_schedules = self._get_stop_schedules(self._col_row[rows])
 
-            return next_sim
+            for row, stop_schedule in zip(reversed(rows.tolist()), reversed(stop_schedules)):
+                next_stop = None
 
-        for data in self._get_stop_schedules(end_time.hour, trip_ids):
-            cache_key = (data.trip_id, data.stop_sequence)
+                if (next_row := self._col_next[row]) >= 0:
+                    # Next stop arrives on a later day if the trip runs across midnight
+                    next_date = arrival_date + timedelta(
+                        days=int(self._col_day_offset[next_row] - self._col_day_offset[row]))
 
-            if cache_key not in next_cache:
-                fill_next_cache(data.trip_id, data.stop_sequence)
+                    next_stop = sims.get((next_date, next_row))
+                    if not next_stop:
+                        next_stop = MMTStopScheduleSim.from_raw(
+                            self._get_stop_schedules(self._col_row[next_row:next_row + 1])[0], next_date)
 
-            schedule_sim = MMTStopScheduleSim.from_raw(data, end_time.date(), next_stop=next_cache.get(cache_key))
-            if schedule_sim.arrival_time <= end_time:
-                ret.append(schedule_sim)
+                sims[(arrival_date, row)] = MMTStopScheduleSim.from_raw(stop_schedule, arrival_date,
+                                                                        next_stop=next_stop)
 
-        return list(sorted(ret, key=lambda s_sim: s_sim.arrival_time))
+        return [sims[(arrival_date, row)] for arrival_date, rows in rows_by_date for row in rows.tolist()]
 
     @staticmethod
     def on_row_read(row: List[str]) -> object:
         return MMTStopSchedule.parse_from_row(row)
+
+    @staticmethod
+    def get_trips_row_filter(trip_ids: Iterable[int]) -> RowFilter:
+        """
+        Get a row filter of ``mmt_gtfs/stop_times.csv`` which only loads the stop schedules of ``trip_ids``.
+
+        The trip IDs of a service plan can be obtained by :meth:`MMTTripDataController.get_trip_ids()`.
+        """
+        trip_ids = set(trip_ids)
+
+        return lambda row: int(row[0]) in trip_ids
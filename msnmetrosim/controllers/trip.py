@@ -4,9 +4,9 @@ Controller of the MMT GTFS trip data.
 The complete MMT GTFS dataset can be downloaded here:
 http://transitdata.cityofmadison.com/GTFS/mmt_gtfs.zip
 """
-from typing import List, Dict, Set, Union
+from typing import Iterable, List, Dict, Set, Union
 
-from msnmetrosim.controllers.base import CSVLoadableController
+from msnmetrosim.controllers.base import CSVLoadableController, RowFilter
 from msnmetrosim.models import MMTTrip
 from msnmetrosim.utils import temporary_func
 
@@ -101,3 +101,10 @@ class MMTTripDataController(CSVLoadableController):
     @staticmethod
     def on_row_read(row: List[str]) -> object:
         return MMTTrip.parse_from_row(row)
+
+    @staticmethod
+    def get_services_row_filter(service_ids: Iterable[str]) -> RowFilter:
+        """Get a row filter of ``mmt_gtfs/trips.csv`` which only loads the trips of ``service_ids``."""
+        service_ids = set(service_ids)
+
+        return lambda row: row[2] in service_ids
@@ -12,6 +12,9 @@ __all__ = ("LocationalModelBase",)
 class LocationalModelBase(ABC):
     """Interface for the data entry which contains coordinates."""
 
+    # Allows the subclasses to have no ``__dict__`` by declaring ``lat`` and ``lon`` in their ``__slots__``
+    __slots__ = ()
+
     lat: float
     lon: float
 
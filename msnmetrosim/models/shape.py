@@ -23,6 +23,8 @@ class MMTShape(LocationalModelBase):
         There will be some cases that the two different ``shape_id`` are sharing the same ``shape_code``.
     """
 
+    __slots__ = ("lat", "lon", "shape_id", "shape_code", "seq_num", "dist_traveled")
+
     lat: float
     lon: float
 
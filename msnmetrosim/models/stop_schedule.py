@@ -8,6 +8,8 @@ from dataclasses import dataclass
 from datetime import datetime, time, date
 from typing import List, Optional
 
+from msnmetrosim.utils import time_from_seconds
+
 __all__ = ("MMTStopSchedule", "MMTStopScheduleSim")
 
 
@@ -18,47 +20,63 @@ class MMTStopSchedule:
 
     .. note::
         `timepoint` means that the bus will depart at the scheduled time if it arrives earlier.
+
+        ``arrival_secs`` and ``departure_secs`` are the seconds since the start of the service day.
+        These could be > 86400 (a day) for the stops after midnight.
     """
 
+    __slots__ = ("trip_id", "stop_sequence", "stop_id", "arrival_secs", "departure_secs", "timepoint",
+                 "shape_dist_traveled")
+
     trip_id: int
 
     stop_sequence: int
     stop_id: int
 
-    arrival_time: time
-    departure_time: time
+    arrival_secs: int
+    departure_secs: int
 
     timepoint: bool
 
     shape_dist_traveled: float
 
+    @property
+    def arrival_time(self) -> time:
+        """Scheduled arrival time of the stop."""
+        return time_from_seconds(self.arrival_secs)
+
+    @property
+    def departure_time(self) -> time:
+        """Scheduled departure time of the stop."""
+        return time_from_seconds(self.departure_secs)
+
     @staticmethod
     def parse_from_row(row: List[str]):
         """Parse a single entry into :class:`MMTStopSchedule` from a row of ``mmt_gtfs/stop_times.csv``."""
         def parse_time(time_str: str):
             hour, minute, second = time_str.split(":", 2)
 
-            return time(int(hour) % 24, int(minute), int(second))
+            return int(hour) * 3600 + int(minute) * 60 + int(second)
 
         trip_id = int(row[0])
 
         stop_sequence = int(row[1])
         stop_id = int(row[2])
 
-        arrival_time = parse_time(row[5])
-        departure_time = parse_time(row[6])
+        arrival_secs = parse_time(row[5])
+        departure_secs = parse_time(row[6])
 
         timepoint = bool(int(row[7]))
 
         shape_dist_traveled = float(row[9])
 
         return MMTStopSchedule(
-            trip_id, stop_sequence, stop_id, arrival_time, departure_time, timepoint, shape_dist_traveled
+            trip_id, stop_sequence, stop_id, arrival_secs, departure_secs, timepoint, shape_dist_traveled
         )
 
 
 @dataclass
-class MMTStopScheduleSim(MMTStopSchedule):
+class MMTStopScheduleSim:
     """
     Same as :class:`MMTStopSchedule` with ``arrival_time`` and ``departure_time`` being :class:`datetime`.
 
@@ -66,9 +84,23 @@ class MMTStopScheduleSim(MMTStopSchedule):
     causing issues when handling the cross-day travel.
     """
 
+    # pylint: disable=too-many-instance-attributes
+
+    __slots__ = ("trip_id", "stop_sequence", "stop_id", "arrival_time", "departure_time", "timepoint",
+                 "shape_dist_traveled", "next_stop")
+
+    trip_id: int
+
+    stop_sequence: int
+    stop_id: int
+
     arrival_time: datetime
     departure_time: datetime
 
+    timepoint: bool
+
+    shape_dist_traveled: float
+
     next_stop: "MMTStopScheduleSim"
 
     @staticmethod
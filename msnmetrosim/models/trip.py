@@ -91,23 +91,29 @@ class MMTTrip:
 
         - Also will be as same as the field name of :class:`MMTShape`.
 
-        ``trip_sort`` in the original data file / ``trip_departure`` after parse is the scheduled departure time.
+        ``trip_sort`` in the original data file / ``trip_departure_secs`` after parse is the scheduled departure time.
 
         - ``trip_sort`` scheduled departure time counting from 12 AM in seconds
 
-        - ``trip_departure`` is the parsed ``trip_sort`` in :class:`datetime.time`.
+        - ``trip_departure_secs`` is ``trip_sort``, which could be > 86400 (a day) for the trips after midnight.
+
+        - ``trip_departure`` is ``trip_sort`` in :class:`datetime.time`.
 
         Currently not sure about the meaning of ``block_id``. Awaiting investigation.
     """
 
     # pylint: disable=too-many-instance-attributes
 
+    __slots__ = ("route_id", "route_short_name", "service_id", "trip_id", "trip_headsign",
+                 "trip_direction_id", "trip_direction_name", "block_id", "shape_id", "shape_code",
+                 "trip_type", "trip_departure_secs")
+
     route_id: int
     route_short_name: str
 
     service_id: str
 
-    trip_id: id
+    trip_id: int
     trip_headsign: str
 
     trip_direction_id: int
@@ -118,7 +124,12 @@ class MMTTrip:
     shape_code: str
 
     trip_type: MMTTripType
-    trip_departure: time
+    trip_departure_secs: int
+
+    @property
+    def trip_departure(self) -> time:
+        """Scheduled departure time of the trip."""
+        return time_from_seconds(self.trip_departure_secs)
 
     @staticmethod
     def parse_from_row(row: List[str]):
@@ -139,8 +150,8 @@ class MMTTrip:
         shape_code = row[9]
 
         trip_type = MMTTripType.parse_from_data(row[10])
-        trip_departure = time_from_seconds(int(row[11]))
+        trip_departure_secs = int(row[11])
 
         return MMTTrip(route_id, route_short_name, service_id, trip_id, trip_headsign,
                        trip_direction_id, trip_direction_name, block_id, shape_id, shape_code,
-                       trip_type, trip_departure)
+                       trip_type, trip_departure_secs)
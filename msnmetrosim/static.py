@@ -19,3 +19,10 @@ CONTROL_SCALE = True
 
 DATA_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "data")
 """Directory of all data."""
+
+DATA_CACHE_DIR = os.path.join(DATA_DIR, ".cache")
+"""
+Directory of the cache of the parsed data files.
+
+Set this to ``None`` to disable the cache.
+"""
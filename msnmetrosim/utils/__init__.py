@@ -2,8 +2,8 @@
 from .calc import normalize_vector, normalize_cumulate_vector
 from .colorgen import get_color
 from .deco_warning import temporary_func
-from .dt_convert import time_from_seconds
-from .geo import distance, offset, generate_points, travel_time
+from .dt_convert import time_from_seconds, time_to_seconds
+from .geo import distance, distance_array, offset, generate_points, travel_time
 from .mixin import TimeableMixin
 from .perf import time_function
 from .plane import get_plane, Plane
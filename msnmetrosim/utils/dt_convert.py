@@ -1,7 +1,8 @@
 """Conversion functions related to datetime."""
-from datetime import time
+from datetime import datetime, time
+from typing import Union
 
-__all__ = ("time_from_seconds",)
+__all__ = ("time_from_seconds", "time_to_seconds")
 
 
 def time_from_seconds(seconds: int) -> time:
@@ -14,3 +15,8 @@ def time_from_seconds(seconds: int) -> time:
     hours, secs = divmod(seconds, 3600)
     mins, secs = divmod(secs, 60)
     return time(hours, mins, secs)
+
+
+def time_to_seconds(time_: Union[time, datetime]) -> int:
+    """Convert the time of ``time_`` to the seconds since the start of the day."""
+    return time_.hour * 3600 + time_.minute * 60 + time_.second
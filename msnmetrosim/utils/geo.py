@@ -3,7 +3,9 @@ from decimal import Decimal
 from math import asin, sin, cos, sqrt, atan2, radians, degrees
 from typing import Tuple, List, Set
 
-__all__ = ("distance", "offset", "generate_points", "travel_time")
+import numpy as np
+
+__all__ = ("distance", "distance_array", "offset", "generate_points", "travel_time")
 
 EARTH_R = 6378.137
 """Approximate radius of earth in km. Used to calculate the distance."""
@@ -37,6 +39,33 @@ def distance(p1: Tuple[float, float], p2: Tuple[float, float]):  # pylint: disab
     return EARTH_R * c
 
 
+def distance_array(p1: np.ndarray, p2: np.ndarray) -> np.ndarray:  # pylint: disable=invalid-name
+    """
+    Vectorized version of ``distance()``. Get the distances between the coordinates ``p1`` and ``p2`` in **km**.
+
+    Both ``p1`` and ``p2`` should be arrays which the last dimension is ``(lat, lon)``.
+    These two arrays will be broadcast against each other.
+
+    For example, passing an array in shape ``(N, 1, 2)`` and an array in shape ``(1, M, 2)``
+    gives a distance matrix in shape ``(N, M)``.
+    """
+    p1 = np.radians(np.asarray(p1, dtype=np.float64))
+    p2 = np.radians(np.asarray(p2, dtype=np.float64))
+
+    lat_1 = p1[..., 0]
+    lon_1 = p1[..., 1]
+    lat_2 = p2[..., 0]
+    lon_2 = p2[..., 1]
+
+    d_lon = lon_2 - lon_1
+    d_lat = lat_2 - lat_1
+
+    a = np.sin(d_lat / 2) ** 2 + np.cos(lat_1) * np.cos(lat_2) * np.sin(d_lon / 2) ** 2  # pylint: disable=invalid-name
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))  # pylint: disable=invalid-name
+
+    return EARTH_R * c
+
+
 def travel_time(speed: float, dist: float) -> float:
     """
     Calculate the travel time in seconds with ``speed`` in km/h and distance (``dist``) in km.
@@ -1,38 +1,155 @@
 """Stats object of the data."""
 from dataclasses import dataclass, field
-from statistics import fmean, median, quantiles
-from typing import List, Optional, Tuple, Callable
+from functools import cached_property
+from math import ceil, floor, fsum
+from statistics import StatisticsError
+from typing import Dict, List, Optional, Tuple, Callable, Sequence
+
+import numpy as np
 
 __all__ = ("DataMetrics",)
 
 
-@dataclass
+@dataclass(eq=False)
 class DataMetrics:
     """
     Get the metrics of a series of the data with some extra functionalities.
 
+    ``data`` is kept as given. The statistics are calculated on a sorted ``float64`` copy of it.
+    Each statistic is calculated lazily upon the first access and then cached.
+
+    ``weights``, if given, is the weight of each data and must have the same length as ``data``.
+    A weighted data behaves as if it is repeated by its weight, but it never gets expanded.
+    Data with non-positive weights does not affect the statistics.
+
+    If ``weights`` is ``None``, the weight of each data will be 1.
+
+    The statistics are consistent with the ones in ``statistics``.
+
     .. note::
         https://docs.python.org/3/library/statistics.html
     """
 
-    data: List[float]
+    data: Sequence[float]
 
     name: Optional[str] = None
 
-    average: float = field(init=False)
-    median: float = field(init=False)
-    minimum: float = field(init=False)
-    maximum: float = field(init=False)
+    weights: Optional[Sequence[float]] = None
+
+    # Data with positive weights, sorted by the data
+    _data: np.ndarray = field(init=False, repr=False)
+    _weights: np.ndarray = field(init=False, repr=False)
+    _cum_weights: Optional[np.ndarray] = field(init=False, repr=False)
+    _quantiles: Dict[int, List[float]] = field(init=False, repr=False)
 
     def __post_init__(self):
-        self.average = fmean(self.data)  # Faster than `mean()` according to the doc
-        self.median = median(self.data)
-        self.maximum = max(self.data)
-        self.minimum = min(self.data)
+        data = np.asarray(self.data, dtype=np.float64)
+
+        weighted = self.weights is not None
+
+        if not weighted:
+            weights = np.ones(len(data))
+        else:
+            weights = np.asarray(self.weights, dtype=np.float64)
+
+            if len(weights) != len(data):
+                raise ValueError(f"The length of `weights` ({len(weights)}) "
+                                 f"is not the same as `data` ({len(data)})")
+
+            # Data with no weight does not affect the metrics
+            positive = weights > 0
+            data = data[positive]
+            weights = weights[positive]
+
+        if not len(data):  # pylint: disable=len-as-condition
+            raise StatisticsError("no data points")
+
+        order = np.argsort(data, kind="stable")
+        self._data = data[order]
+        self._weights = weights[order]
+
+        # Positions of the weighted data are located by the cumulative weights
+        self._cum_weights = np.cumsum(self._weights) if weighted else None
+
+        self._quantiles = {}
+
+    @cached_property
+    def count(self) -> float:
+        """Total weight of the data, which is the count of the data if not weighted."""
+        if self._cum_weights is None:
+            return float(len(self._data))
+
+        return float(self._cum_weights[-1])
+
+    @cached_property
+    def average(self) -> float:
+        """Average of the data."""
+        if self._cum_weights is None:
+            return fsum(self._data) / self.count
+
+        return fsum(self._data * self._weights) / self.count
+
+    @cached_property
+    def median(self) -> float:
+        """Median of the data."""
+        half = self.count / 2
+
+        low, high = self._get_at_positions(np.array([ceil(half) - 1, floor(half)]))
+
+        return float((low + high) / 2)
+
+    @cached_property
+    def minimum(self) -> float:
+        """Minimum of the data."""
+        return float(self._data[0])
+
+    @cached_property
+    def maximum(self) -> float:
+        """Maximum of the data."""
+        return float(self._data[-1])
+
+    @cached_property
+    def cut_points(self) -> List[float]:
+        """Cut points that divide the data into 10 intervals (deciles)."""
+        return self.get_quantile(10)
+
+    def _get_at_positions(self, positions: np.ndarray) -> np.ndarray:
+        """Get the data at 0-based ``positions`` of the sorted data as if the data is repeated by its weight."""
+        if self._cum_weights is None:
+            return self._data[positions.astype(int)]
+
+        return self._data[np.searchsorted(self._cum_weights, positions, side="right")]
 
     def get_quantile(self, n: int) -> List[float]:  # pylint: disable=invalid-name
-        """Call ``statistics.quantiles()`` on the data with count ``n``, and return it."""
-        return quantiles(self.data, n=n)
+        """
+        Get the ``n`` quantiles of the data.
+
+        This is equivalent to calling ``statistics.quantiles()`` on the data with count ``n``.
+
+        The quantiles of each ``n`` are cached.
+
+        :raises StatisticsError: if `n` < 1 or the total weight of the data < 2
+        """
+        if n in self._quantiles:
+            return list(self._quantiles[n])
+
+        if n < 1:
+            raise StatisticsError("n must be at least 1")
+
+        count = self.count
+        if count < 2:
+            raise StatisticsError("must have at least two data points")
+
+        # Same as the exclusive method in ``statistics.quantiles()``
+        m = count + 1  # pylint: disable=invalid-name
+        i = np.arange(1, n, dtype=np.float64)
+        j = np.clip(i * m // n, 1, count - 1)
+        delta = i * m - j * n
+
+        quantile = ((self._get_at_positions(j - 1) * (n - delta) + self._get_at_positions(j) * delta) / n).tolist()
+        self._quantiles[n] = quantile
+
+        return list(quantile)
 
     def get_quantile_cdf(self, n: int) -> Tuple[List[float], List[float]]:  # pylint: disable=invalid-name
         """
@@ -40,7 +157,7 @@ class DataMetrics:
 
         Y will be 0 <= x <= 1, and it will always starts from 0 and ends at 1.
         """
-        x_array = [min(self.data)] + self.get_quantile(n) + [max(self.data)]
+        x_array = [self.minimum] + self.get_quantile(n) + [self.maximum]
         y_array = [i / n for i in range(n)] + [1]
 
         return x_array, y_array
@@ -49,15 +166,19 @@ class DataMetrics:
         """
         Returns a :class:`DataMetrics` which data has been filtered by ``condition``.
 
-        Only the data which passes the test of :class:`condition` will be kept.
+        Only the data which passes the test of :class:`condition` will be kept along with its weight.
         """
-        return DataMetrics([data for data in self.data if condition(data)], name or self.name)
+        passed = [condition(data) for data in self.data]
+
+        return DataMetrics([data for data, keep in zip(self.data, passed) if keep], name or self.name,
+                           weights=None if self.weights is None
+                           else [weight for weight, keep in zip(self.weights, passed) if keep])
 
     def print_stats(self):
         """Print the stats of this metric object to ``sys.stdout``."""
         print(f"Data metrics - {self.name or '(No name)'}")
         print("================================")
-        print(f"# Data: {len(self.data)}")
+        print(f"# Data: {self.count:g}")
         print(f"Average: {self.average} / Median: {self.median}")
         print(f"Min: {self.minimum} / Max: {self.maximum}")
         print(f"Decile: {self.get_quantile(10)}")
@@ -4,6 +4,7 @@ from .mapgen import (
     generate_92_wkd_routes, generate_92_wkd_routes_and_stops, generate_92_wkd_routes_and_grouped_stops
 )
 from .rm_stop import *  # noqa
+from .sim_batch import *  # noqa
 from .sim_benchmark import *  # noqa
 from .sim_graph import SimulationMap
 from .simulate import test_run
@@ -1,4 +1,19 @@
-"""Controllers that is ready for use to generate the data views.."""
+"""
+Controllers that is ready for use to generate the data views..
+
+Each controller is loaded upon the first access, so only the data actually used is loaded.
+Access the controllers via this module (for example, ``controllers.ctrl_stops``) at the time of use,
+because ``from msnmetrosim.views.controllers import ctrl_stops`` loads the controller immediately.
+
+Call :func:`prewarm` to load the controllers in the background before they are used.
+"""
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from functools import partial
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Type
+
 from msnmetrosim.controllers import (
     # MMT GTFS data controllers
     MMTRouteDataController, MMTShapeDataController, MMTStopDataController, MMTStopsAtCrossDataController,
@@ -8,24 +23,184 @@ from msnmetrosim.controllers import (
     # Population data controllers
     PopulationDataController
 )
+from msnmetrosim.controllers.base import CSVLoadableController, DataListHolder
 
 __all__ = ("ctrl_calendar", "ctrl_routes", "ctrl_shapes", "ctrl_stops", "ctrl_stops_cross", "ctrl_stop_schedule",
            "ctrl_trips", "ctrl_ridership_stop",
-           "ctrl_population")
+           "ctrl_population",
+           "load_all", "prewarm")
 
-# Load the controllers for use
+# Controllers for use, which are only declared here for type hints. Loaded upon the first access.
 
 # ---- Others
 
-ctrl_population = PopulationDataController.load_csv("population.csv")
-ctrl_ridership_stop = RidershipByStopController.load_csv("ridership/by_stop.csv")
+ctrl_population: PopulationDataController
+ctrl_ridership_stop: RidershipByStopController
 
 # ---- MMT GTFS
 
-ctrl_calendar = MMTCalendarController.load_csv("mmt_gtfs/calendar.csv")
-ctrl_routes = MMTRouteDataController.load_csv("mmt_gtfs/routes.csv")
-ctrl_shapes = MMTShapeDataController.load_csv("mmt_gtfs/shapes.csv")
-ctrl_stops = MMTStopDataController.load_csv("mmt_gtfs/stops.csv")
-ctrl_stops_cross = MMTStopsAtCrossDataController.from_stop_controller(ctrl_stops)
-ctrl_stop_schedule = MMTStopScheduleController.load_csv("mmt_gtfs/stop_times.csv")
-ctrl_trips = MMTTripDataController.load_csv("mmt_gtfs/trips.csv")
+ctrl_calendar: MMTCalendarController
+ctrl_routes: MMTRouteDataController
+ctrl_shapes: MMTShapeDataController
+ctrl_stops: MMTStopDataController
+ctrl_stops_cross: MMTStopsAtCrossDataController
+ctrl_stop_schedule: MMTStopScheduleController
+ctrl_trips: MMTTripDataController
+
+# Sources of the controllers loaded from the csv files
+
+_csv_sources: Dict[str, Tuple[Type[CSVLoadableController], str]] = {
+    # ---- Others
+    "ctrl_population": (PopulationDataController, "population.csv"),
+    "ctrl_ridership_stop": (RidershipByStopController, "ridership/by_stop.csv"),
+    # ---- MMT GTFS
+    "ctrl_calendar": (MMTCalendarController, "mmt_gtfs/calendar.csv"),
+    "ctrl_routes": (MMTRouteDataController, "mmt_gtfs/routes.csv"),
+    "ctrl_shapes": (MMTShapeDataController, "mmt_gtfs/shapes.csv"),
+    "ctrl_stops": (MMTStopDataController, "mmt_gtfs/stops.csv"),
+    "ctrl_stop_schedule": (MMTStopScheduleController, "mmt_gtfs/stop_times.csv"),
+    "ctrl_trips": (MMTTripDataController, "mmt_gtfs/trips.csv"),
+}
+
+# Loaders of the controllers
+
+_loaders: Dict[str, Callable[[], DataListHolder]] = {
+    **{name: partial(ctrl_type.load_csv, file_path) for name, (ctrl_type, file_path) in _csv_sources.items()},
+    "ctrl_stops_cross": lambda: MMTStopsAtCrossDataController.from_stop_controller(_get_controller("ctrl_stops")),
+}
+
+# Prevents a controller from being loaded more than once if accessed by multiple threads at the same time
+_locks: Dict[str, threading.Lock] = {name: threading.Lock() for name in _loaders}
+
+# Thread pools of ``prewarm()``, which should be joined before forking the process
+_prewarm_executors: List[ThreadPoolExecutor] = []
+
+
+def _get_controller(name: str, loader: Optional[Callable[[], DataListHolder]] = None) -> DataListHolder:
+    """Get the controller of ``name``. If not loaded, load it using ``loader`` or its default loader."""
+    with _locks[name]:
+        if name not in globals():
+            # Stored as a module attribute, so ``__getattr__()`` is not called for the later accesses
+            globals()[name] = (loader or _loaders[name])()
+
+    return globals()[name]
+
+
+def __getattr__(name: str) -> DataListHolder:
+    if name not in _loaders:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    return _get_controller(name)
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(_loaders))
+
+
+def prewarm(names: Optional[Iterable[str]] = None, max_workers: Optional[int] = None) -> List[Future]:
+    """
+    Load the controllers of ``names`` in the background using a thread pool with ``max_workers`` threads.
+
+    ``names`` are the attribute names of the controllers, for example, ``ctrl_stops``.
+    If ``names`` is not given, all controllers will be loaded.
+
+    Returns the futures of the loaded controllers in the order of ``names``.
+    Accessing a controller which is being loaded waits until it is loaded.
+
+    :raises AttributeError: if any of `names` is not a controller
+    """
+    names = list(_loaders if names is None else names)
+
+    for name in names:
+        if name not in _loaders:
+            raise AttributeError(f"module {__name__!r} has no controller {name!r}")
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ctrl-prewarm")
+    futures = [executor.submit(_get_controller, name) for name in names]
+    _prewarm_executors.append(executor)
+
+    # Threads exit once all controllers are loaded without blocking the caller
+    executor.shutdown(wait=False)
+
+    return futures
+
+
+def _load_csv_controller(name: str) -> Tuple[CSVLoadableController, float]:
+    """Load the controller of ``name`` from its csv file. Returns the controller and the loading time in seconds."""
+    ctrl_type, file_path = _csv_sources[name]
+
+    start = time.time()
+    ctrl = ctrl_type.load_csv(file_path)
+
+    return ctrl, time.time() - start
+
+
+def _get_csv_abs_path(name: str) -> str:
+    return CSVLoadableController.get_csv_file_abs_path(_csv_sources[name][1])
+
+
+def _join_prewarm():
+    """Wait until the threads of ``prewarm()`` exit, because forking with other threads running is unsafe."""
+    while _prewarm_executors:
+        _prewarm_executors.pop().shutdown(wait=True)
+
+
+def load_all(parallel: bool = True, max_workers: Optional[int] = None) -> Dict[str, DataListHolder]:
+    """
+    Load all controllers which are not loaded yet and print the loading time of each data file.
+
+    If ``parallel`` is ``True``, the largest data file is loaded in this process,
+    and the others are loaded in a process pool with ``max_workers`` processes at the same time.
+    The process pool is created by forking, so this waits for the loading started by :func:`prewarm` first.
+
+    ``ctrl_stops_cross`` is loaded once ``ctrl_stops`` is loaded.
+
+    The data files which do not exist are skipped, and their controllers are not loaded.
+
+    Returns the loaded controllers using the attribute names as the keys, for example, ``ctrl_stops``.
+    The controllers can also be accessed as the module attributes afterwards.
+    """
+    start = time.time()
+
+    names = []
+    for name, (_, file_path) in _csv_sources.items():
+        if name in globals():
+            continue
+
+        if not os.path.exists(_get_csv_abs_path(name)):
+            print(f"Skipped {file_path} because the file does not exist")
+            continue
+
+        names.append(name)
+
+    names.sort(key=lambda name: os.path.getsize(_get_csv_abs_path(name)), reverse=True)
+
+    def on_loaded(name: str, ctrl: CSVLoadableController, load_time: float):
+        print(f"Loaded {_csv_sources[name][1]} in {load_time:.3f} s")
+        _get_controller(name, lambda: ctrl)
+
+        if name == "ctrl_stops":
+            _get_controller("ctrl_stops_cross")
+
+    if parallel and len(names) > 1:
+        _join_prewarm()
+
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(_load_csv_controller, name): name for name in names[1:]}
+
+            # The largest data file is loaded in this process,
+            # because sending its controller back from the worker process costs more than loading it
+            on_loaded(names[0], *_load_csv_controller(names[0]))
+
+            for future in as_completed(futures):
+                on_loaded(futures[future], *future.result())
+    else:
+        for name in names:
+            on_loaded(name, *_load_csv_controller(name))
+
+    print(f"Loaded all data in {time.time() - start:.3f} s")
+
+    if "ctrl_stops" in globals():
+        _get_controller("ctrl_stops_cross")
+
+    return {name: globals()[name] for name in _loaders if name in globals()}
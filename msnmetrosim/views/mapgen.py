@@ -11,7 +11,7 @@ from folium.plugins import MarkerCluster
 from msnmetrosim.models import MMTStopsAtCross
 from msnmetrosim.static import MAP_MADISON_CENTER_COORD, MAP_TILE, MAP_ZOOM_START, CONTROL_SCALE
 from msnmetrosim.utils import temporary_func
-from .controllers import ctrl_ridership_stop, ctrl_routes, ctrl_shapes, ctrl_stops, ctrl_stops_cross, ctrl_trips
+from . import controllers
 
 __all__ = ("generate_clean_map", "generate_map_with_points", "generate_map_given_stops_with_color",
            "generate_92_wkd_routes", "generate_92_wkd_routes_and_stops", "generate_92_wkd_routes_and_grouped_stops",)
@@ -33,7 +33,7 @@ def plot_stops_by_cross(folium_map: FoliumMap, /, clustered: bool = True, use_ma
     else:
         parent = folium_map
 
-    for stop in ctrl_stops_cross.all_data:
+    for stop in controllers.ctrl_stops_cross.all_data:
         popup = Popup(f"{stop.primary} & {stop.secondary}<br>{stop.name_list_html}",
                       min_width=250, max_width=800)
 
@@ -63,8 +63,8 @@ def plot_stops(folium_map: FoliumMap, clustered: bool = True):
     else:
         parent = folium_map
 
-    for stop in ctrl_stops.all_data:
-        ridership = ctrl_ridership_stop.get_stop_data_by_id(stop.stop_id)
+    for stop in controllers.ctrl_stops.all_data:
+        ridership = controllers.ctrl_ridership_stop.get_stop_data_by_id(stop.stop_id)
 
         popup = Popup(f"{stop.name}<br>Weekday ridership: {ridership.weekday if ridership else '(unavailable)'}"
                       f"<br>Wheelchair Accessible: {stop.wheelchair_accessible}",
@@ -106,7 +106,7 @@ def plot_shape(folium_map: FoliumMap, shape_id: int, shape_popup: str, shape_col
 
     ``shape_color`` can be any strings that represents color in CSS.
     """
-    shape_coords = ctrl_shapes.get_shape_coords_by_id(shape_id)
+    shape_coords = controllers.ctrl_shapes.get_shape_coords_by_id(shape_id)
     PolyLine(shape_coords, color=shape_color, popup=shape_popup).add_to(folium_map)
 
 
@@ -118,11 +118,11 @@ def plot_point(folium_map: FoliumMap, coord: Tuple[float, float]):
 @temporary_func
 def plot_92_wkd_routes(folium_map: FoliumMap):
     """Plot all the routes (shapes) available under service ID ``92_WKD`` (Batch #92, weekday plan, presumably)."""
-    serv_shapes = ctrl_trips.get_shapes_available_in_service("92_WKD")
+    serv_shapes = controllers.ctrl_trips.get_shapes_available_in_service("92_WKD")
 
     for shape_id, last_trip in serv_shapes.items():
         shape_popup = f"{last_trip.route_short_name}<br><b>{last_trip.trip_headsign}</b>"
-        shape_color = ctrl_routes.get_route_by_route_id(last_trip.route_id).route_color
+        shape_color = controllers.ctrl_routes.get_route_by_route_id(last_trip.route_id).route_color
 
         plot_shape(folium_map, shape_id, shape_popup, shape_color)
 
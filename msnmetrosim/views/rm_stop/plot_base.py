@@ -5,7 +5,7 @@ import matplotlib.pyplot as plt
 
 from msnmetrosim.models import MMTStopsAtCross
 from msnmetrosim.models.results import CrossStopRemovalResult
-from msnmetrosim.views.controllers import ctrl_stops_cross
+from msnmetrosim.views import controllers
 
 __all__ = ("get_stops_at_cross", "generate_accessibility_plot_canvas")
 
@@ -17,7 +17,7 @@ def get_stops_at_cross(stops_name: List[Tuple[str, str]]) -> List[MMTStopsAtCros
 
     for primary, secondary in stops_name:
         print(f"Getting the stop of {primary} & {secondary}")
-        grouped_stop = ctrl_stops_cross.get_grouped_stop_by_street_names(primary, secondary)
+        grouped_stop = controllers.ctrl_stops_cross.get_grouped_stop_by_street_names(primary, secondary)
         if not grouped_stop:
             raise ValueError(f"Grouped stop of {primary} & {secondary} not found")
 
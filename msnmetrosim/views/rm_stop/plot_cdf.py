@@ -4,7 +4,7 @@ from typing import List, Tuple
 from matplotlib.pyplot import Subplot
 
 from msnmetrosim.models.results import CrossStopRemovalResult
-from msnmetrosim.views.controllers import ctrl_stops_cross, ctrl_population
+from msnmetrosim.views import controllers
 from .plot_base import get_stops_at_cross, generate_accessibility_plot_canvas
 from .static import TOP_12_POSITIVE_POP_DENSITY, TOP_12_NEGATIVE_POP_DENSITY
 
@@ -52,9 +52,10 @@ def plot_accessibility_impact_cdf(stops_name: List[Tuple[str, str]], plot_x: int
 
     for stop in get_stops_at_cross(stops_name):
         print(f"Getting the metrics of {stop.cross_name}")
-        agents, weights = ctrl_population.get_population_points(stop.lat, stop.lon, range_km, interval_km)
+        agents, weights = controllers.ctrl_population.get_population_points(stop.lat, stop.lon, range_km, interval_km)
 
-        result = ctrl_stops_cross.get_metrics_of_single_stop_removal(stop.primary, stop.secondary, agents, weights)
+        result = controllers.ctrl_stops_cross.get_metrics_of_single_stop_removal(stop.primary, stop.secondary,
+                                                                                 agents, weights)
         results.append(result)
 
     # Plot the data
@@ -5,7 +5,7 @@ from matplotlib.pyplot import Subplot
 
 from msnmetrosim.models.results import CrossStopRemovalResult
 from msnmetrosim.utils import generate_points
-from msnmetrosim.views.controllers import ctrl_stops_cross
+from msnmetrosim.views import controllers
 from .plot_base import get_stops_at_cross, generate_accessibility_plot_canvas
 from .static import TOP_12_POSITIVE_DUMMY, TOP_12_NEGATIVE_DUMMY
 
@@ -21,8 +21,10 @@ def plot_stop_accessibility_hist(subplot: Subplot, result: CrossStopRemovalResul
     subplot.set_title(f"Distance to stop between before and after removing {result.stop_removed.cross_name}")
 
     # Plot histograms
-    subplot.hist(result.metrics_before.data, bins=20, alpha=0.5, label="Before")
-    subplot.hist(result.metrics_after.data, bins=20, alpha=0.5, label="After")
+    subplot.hist(result.metrics_before.data, weights=result.metrics_before.weights,
+                 bins=20, alpha=0.5, label="Before")
+    subplot.hist(result.metrics_after.data, weights=result.metrics_after.weights,
+                 bins=20, alpha=0.5, label="After")
 
     # Post-configure the plot
     subplot.legend(loc="upper right")
@@ -51,7 +53,7 @@ def plot_accessibility_impact_histograms(stops_name: List[Tuple[str, str]], plot
         print(f"Getting the metrics of {stop.cross_name}")
         agents = generate_points(stop.coordinate, range_km, interval_km)
 
-        result = ctrl_stops_cross.get_metrics_of_single_stop_removal(stop.primary, stop.secondary, agents)
+        result = controllers.ctrl_stops_cross.get_metrics_of_single_stop_removal(stop.primary, stop.secondary, agents)
         results.append(result)
 
     # Plot the data
@@ -1,9 +1,9 @@
 """Functions for generating the stop removal reports."""
 import csv
 from datetime import datetime
-from typing import List, Tuple, Dict
+from typing import List, Tuple, Dict, Optional
 
-from msnmetrosim.views.controllers import ctrl_population, ctrl_stops_cross
+from msnmetrosim.views import controllers
 from .static import IMPACT_REPORT_HEADER
 
 
@@ -11,12 +11,15 @@ from .static import IMPACT_REPORT_HEADER
 
 
 def generate_stop_removal_report(range_km: float, interval_km: float, /,
-                                 report_path: str = "stop-rm-report.csv", use_population_data: bool = True):
+                                 report_path: str = "stop-rm-report.csv", use_population_data: bool = True,
+                                 workers: Optional[int] = None):
     """
     Generate a stop removal report in csv and output it to ``report_path``.
 
     Both ``range_km`` and ``interval_km`` will be used for agent spawning.
 
+    If ``workers`` is greater than 1, the stop removals will be evaluated in ``workers`` processes.
+
     The header of the generated report contains:
 
     - `cross_hash`: Hash code of the cross
@@ -29,8 +32,10 @@ def generate_stop_removal_report(range_km: float, interval_km: float, /,
     - `agent_interval`: Interval in km used for agent spawning
     """
     # Get a list of results of removing each stops
-    results = ctrl_stops_cross.get_all_stop_remove_results(range_km, interval_km,
-                                                           ctrl_population if use_population_data else None)
+    results = controllers.ctrl_stops_cross.get_all_stop_remove_results(range_km, interval_km,
+                                                                       controllers.ctrl_population
+                                                                       if use_population_data else None,
+                                                                       workers=workers)
 
     # Generate the report to `report_path`
     with open(report_path, "w", newline="") as f:
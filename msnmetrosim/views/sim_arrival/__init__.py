@@ -0,0 +1,6 @@
+"""Implementations of the earliest arrival calculation on the service timetable."""
+from .csa import ArrivalProfile
+from .isochrone import Isochrone, get_isochrone
+from .raptor import get_earliest_arrivals
+from .result import EarliestArrivalResult
+from .timetable import ServiceTimetable
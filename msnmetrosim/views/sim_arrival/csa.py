@@ -0,0 +1,314 @@
+"""Arrival profiles over a range of departure times using the connection scan algorithm (CSA)."""
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from msnmetrosim.views.sim_graph import SimulationConfig, StaticPointConfig
+from .result import EarliestArrivalResult
+from .timetable import ServiceTimetable
+
+__all__ = ("ArrivalProfile",)
+
+# Pareto set of a stop as ``(arrival times, departure times)``.
+# Both are sorted ascendingly, so a later departure always arrives later.
+_ParetoSet = Tuple[List[float], List[float]]
+
+
+def _is_dominated(pareto_set: _ParetoSet, departure: float, arrival: float) -> bool:
+    """Check if the journey departing at ``departure`` and arriving at ``arrival`` is dominated by ``pareto_set``."""
+    arrivals, departures = pareto_set
+
+    # Latest departure arriving no later than the journey
+    pos = bisect_right(arrivals, arrival)
+
+    return bool(pos) and departures[pos - 1] >= departure
+
+
+def _insert_pareto(pareto_set: _ParetoSet, departure: float, arrival: float) -> bool:
+    """
+    Insert the journey departing at ``departure`` and arriving at ``arrival`` to ``pareto_set``.
+
+    The journeys dominated by the inserted journey will be removed.
+
+    Returns ``False`` if the journey is dominated by a journey in the set and not inserted.
+    """
+    if _is_dominated(pareto_set, departure, arrival):
+        return False
+
+    arrivals, departures = pareto_set
+    pos = bisect_right(arrivals, arrival)
+
+    # Remove the journeys arriving no earlier but departing no later
+    start = bisect_left(arrivals, arrival)
+    end = pos
+    while end < len(arrivals) and departures[end] <= departure:
+        end += 1
+
+    arrivals[start:end] = [arrival]
+    departures[start:end] = [departure]
+
+    return True
+
+
+class ArrivalProfile:
+    """
+    Earliest arrivals of each stop from ``config.start_coord`` for all departure times in a range.
+
+    The departure times are from ``config_points.start_dt`` to ``departure_end_dt``.
+    Each departure is limited to travel ``config_points.max_travel_time`` seconds.
+
+    All connections of the timetable are scanned once in the order of the boarding time.
+    For each stop and trip count, the Pareto set of the journeys (later departure, earlier arrival) is kept,
+    so the earliest arrival of any departure time in the range and
+    the Pareto set of (arrival time, trip count) can be queried without scanning again.
+
+    ``config`` is used in the same way as :func:`get_earliest_arrivals`:
+
+    - Agents walk to the stops within ``config.max_walk_distance`` from the starting location first.
+
+    - There is no wait time limit for boarding the first bus.
+
+    - Wait time for a transfer must be within ``config.max_wait_time``.
+
+    - Agents walk once to the stops within ``config.max_walk_distance`` after alighting a bus.
+
+    - At most ``config.max_transfer + 1`` trips are taken. ``-1`` means unlimited.
+
+    .. note::
+        The wait time for a transfer is checked against the journeys in the Pareto set only.
+        A transfer which is only possible by a journey dominated by the others is not considered.
+
+        Unlike :func:`get_earliest_arrivals`, a journey may depart later than the queried departure time,
+        so a transfer which exceeds the max wait time if departing right away can still be made.
+        Therefore, the arrivals could be earlier if ``config.max_wait_time`` is binding.
+
+    .. note::
+        The classic profile CSA scans the connections backward to get the profiles to a single target.
+        The profiles here are from a single origin to all stops, which is the same scan on the time-reversed network,
+        therefore the connections are scanned forward.
+
+    :raises ValueError: if `departure_end_dt` is earlier than `config_points.start_dt`,
+                        or the departure times are not on the service date of `timetable`
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    def _init_origin(self, config: SimulationConfig):
+        origin_idx, origin_walk_time = self._timetable.get_origin_walks(
+            config.start_coord, config.max_walk_distance, config.walk_speed)
+
+        # Stop index -> walk time from the starting location
+        self._origin_walks: Dict[int, float] = dict(zip(origin_idx.tolist(), origin_walk_time.tolist()))
+
+    def _get_latest_departure(self, trip_count: int, stop_idx: int, board_time: float) -> float:
+        """
+        Get the latest departure time to board a bus at ``board_time`` at the stop ``stop_idx``.
+
+        ``trip_count`` is the count of the trips taken before boarding.
+
+        Returns ``-inf`` if the bus is not boardable.
+        """
+        if not trip_count:
+            if stop_idx not in self._origin_walks:
+                return -np.inf
+
+            departure = min(board_time - self._origin_walks[stop_idx], self._dep_end)
+
+            return departure if departure >= self._dep_start else -np.inf
+
+        pareto_set = self._pareto[trip_count - 1].get(stop_idx)
+        if not pareto_set:
+            return -np.inf
+
+        arrivals, departures = pareto_set
+
+        pos = bisect_right(arrivals, board_time)
+        if not pos or board_time - arrivals[pos - 1] > self._max_wait_time:
+            return -np.inf
+
+        return departures[pos - 1]
+
+    def _insert_journey(self, paretos: List[Dict[int, _ParetoSet]], trip_count: int, stop_idx: int,
+                        departure: float, arrival: float) -> bool:
+        """
+        Insert the journey taking ``trip_count`` trips to the Pareto set of the stop ``stop_idx`` in ``paretos``.
+
+        Returns ``False`` if the journey is dominated by any journey taking the same or fewer trips.
+        """
+        for pareto in paretos[:trip_count - 1]:
+            if (pareto_set := pareto.get(stop_idx)) and _is_dominated(pareto_set, departure, arrival):
+                return False
+
+        return _insert_pareto(paretos[trip_count - 1].setdefault(stop_idx, ([], [])), departure, arrival)
+
+    def _add_alight(self, trip_count: int, stop_idx: int, departure: float, arrival: float):
+        if not self._insert_journey(self._pareto_bus, trip_count, stop_idx, departure, arrival):
+            return  # Dominated by alighting another bus at the stop
+
+        self._insert_journey(self._pareto, trip_count, stop_idx, departure, arrival)
+
+        for walk_dst, walk_time in self._walk_graph.get(stop_idx, []):
+            self._insert_journey(self._pareto, trip_count, walk_dst, departure, arrival + walk_time)
+
+    def _init_walk_graph(self, config: SimulationConfig):
+        walk_src, walk_dst, walk_time = self._timetable.get_walk_arrays(config.max_walk_distance, config.walk_speed)
+
+        # Stop index -> [(stop index, walk time), ...]
+        self._walk_graph: Dict[int, List[Tuple[int, float]]] = {}
+
+        for src, dst, time_ in zip(walk_src.tolist(), walk_dst.tolist(), walk_time.tolist()):
+            self._walk_graph.setdefault(src, []).append((dst, time_))
+
+    def _init_scan(self, max_trip_count: int):
+        # pylint: disable=too-many-locals
+
+        conn_board_stop, conn_alight_stop, conn_board_time, conn_alight_time, conn_trip = \
+            self._timetable.get_connections()
+
+        idx_start = np.searchsorted(conn_board_time, self._dep_start, side="left")
+        idx_end = np.searchsorted(conn_board_time, self._dep_end + self._max_travel_time, side="right")
+
+        # Trip count - 1 -> trip index -> latest departure time to be on the trip
+        trip_departures: List[Dict[int, float]] = []
+
+        for board_stop, alight_stop, board_time, alight_time, trip_idx in zip(
+                conn_board_stop[idx_start:idx_end].tolist(), conn_alight_stop[idx_start:idx_end].tolist(),
+                conn_board_time[idx_start:idx_end].tolist(), conn_alight_time[idx_start:idx_end].tolist(),
+                conn_trip[idx_start:idx_end].tolist()
+        ):
+            # Trips can only be taken once more than the current max trip count
+            for trip_count in range(1, min(len(trip_departures) + 1, max_trip_count) + 1):
+                if trip_count > len(trip_departures):
+                    if not self._get_latest_departure(trip_count - 1, board_stop, board_time) > -np.inf:
+                        break
+
+                    trip_departures.append({})
+                    self._pareto.append({})
+                    self._pareto_bus.append({})
+
+                departures = trip_departures[trip_count - 1]
+
+                departure = max(departures.get(trip_idx, -np.inf),
+                                self._get_latest_departure(trip_count - 1, board_stop, board_time))
+                if departure == -np.inf:
+                    continue
+
+                departures[trip_idx] = departure
+
+                if alight_time - departure > self._max_travel_time:
+                    continue  # Beyond max travel time even for the latest departure
+
+                self._add_alight(trip_count, alight_stop, departure, alight_time)
+
+    def __init__(self, timetable: ServiceTimetable, config: SimulationConfig, config_points: StaticPointConfig,
+                 departure_end_dt: datetime):
+        if departure_end_dt < config_points.start_dt:
+            raise ValueError(f"Departure range ends ({departure_end_dt}) before it starts ({config_points.start_dt})")
+
+        for dt in (config_points.start_dt, departure_end_dt):  # pylint: disable=invalid-name
+            if dt.date() != timetable.service_date:
+                raise ValueError(f"The departure time {dt} is not on the service date of the timetable "
+                                 f"({timetable.service_date})")
+
+        self._timetable = timetable
+
+        self._dep_start: float = timetable.get_seconds(config_points.start_dt)
+        self._dep_end: float = timetable.get_seconds(departure_end_dt)
+        self._max_travel_time: float = config_points.max_travel_time
+        self._max_wait_time: float = config.max_wait_time
+
+        # Trip count - 1 -> stop index -> Pareto set of the journeys arriving at the stop
+        self._pareto: List[Dict[int, _ParetoSet]] = []
+        # Same as ``self._pareto``, but only the journeys alighting a bus at the stop
+        self._pareto_bus: List[Dict[int, _ParetoSet]] = []
+
+        self._init_origin(config)
+        self._init_walk_graph(config)
+        self._init_scan(config.max_transfer + 1 if config.max_transfer >= 0 else timetable.event_count)
+
+    @property
+    def max_trip_count(self) -> int:
+        """Get the max count of the trips taken by any journey in the profile."""
+        return len(self._pareto)
+
+    def _get_arrivals(self, stop_idx: int, departure: float, bus_only: bool = False) -> List[float]:
+        """
+        Get the earliest arrival at the stop ``stop_idx`` by each trip count departing at ``departure``.
+
+        If ``bus_only`` is ``True``, only the arrivals by alighting a bus are included,
+        so the arrival of trip count ``0`` is always ``inf``.
+        """
+        ret: List[float] = [np.inf if bus_only else departure + self._origin_walks.get(stop_idx, np.inf)]
+
+        for pareto in self._pareto_bus if bus_only else self._pareto:
+            if not (pareto_set := pareto.get(stop_idx)):
+                ret.append(np.inf)
+                continue
+
+            arrivals, departures = pareto_set
+
+            pos = bisect_left(departures, departure)
+            ret.append(arrivals[pos] if pos < len(arrivals) else np.inf)
+
+        return [arrival if arrival - departure <= self._max_travel_time else np.inf for arrival in ret]
+
+    def _get_departure_secs(self, start_dt: datetime) -> float:
+        departure = self._timetable.get_seconds(start_dt)
+
+        if not self._dep_start <= departure <= self._dep_end:
+            raise ValueError(f"The departure time {start_dt} is not in the range of the profile")
+
+        return departure
+
+    def get_earliest_arrivals(self, start_dt: datetime) -> EarliestArrivalResult:
+        """
+        Get the earliest arrival time of each stop departing at ``start_dt``.
+
+        The trip count of each stop is the minimum trip count to arrive at the stop at the earliest time.
+
+        :raises ValueError: if `start_dt` is not in the departure range of the profile
+        """
+        departure = self._get_departure_secs(start_dt)
+
+        travel_times = np.full(self._timetable.stop_count, np.inf)
+        trip_counts = np.full(self._timetable.stop_count, -1, dtype=np.int64)
+        bus_travel_times = np.full(self._timetable.stop_count, np.inf)
+
+        for stop_idx in range(self._timetable.stop_count):
+            arrivals = self._get_arrivals(stop_idx, departure)
+            trip_count = int(np.argmin(arrivals))
+
+            if np.isfinite(arrivals[trip_count]):
+                travel_times[stop_idx] = arrivals[trip_count] - departure
+                trip_counts[stop_idx] = trip_count
+
+            bus_travel_times[stop_idx] = min(self._get_arrivals(stop_idx, departure, bus_only=True)) - departure
+
+        return EarliestArrivalResult(start_dt, self._timetable.stop_ids.copy(), travel_times, trip_counts,
+                                     bus_travel_times)
+
+    def get_pareto_arrivals(self, stop_id: int, start_dt: datetime) -> List[Tuple[datetime, int]]:
+        """
+        Get the Pareto set of (arrival time, trip count) to arrive at the stop ``stop_id`` departing at ``start_dt``.
+
+        The transfer count is the trip count - 1. Trip count ``0`` means that the stop is reached by walking only.
+
+        The returned list is sorted by the trip count ascendingly, therefore the arrival time descendingly.
+        An empty list will be returned if the stop is unreachable.
+
+        :raises KeyError: if the stop is not found
+        :raises ValueError: if `start_dt` is not in the departure range of the profile
+        """
+        departure = self._get_departure_secs(start_dt)
+
+        ret: List[Tuple[datetime, int]] = []
+        earliest = np.inf
+
+        for trip_count, arrival in enumerate(self._get_arrivals(self._timetable.get_stop_idx(stop_id), departure)):
+            if arrival < earliest:
+                earliest = arrival
+                ret.append((start_dt + timedelta(seconds=arrival - departure), trip_count))
+
+        return ret
@@ -0,0 +1,110 @@
+"""Travel time surface around the starting location and the population reachable in time."""
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from msnmetrosim.controllers import PopulationDataController
+from msnmetrosim.utils import distance_array, generate_points
+from msnmetrosim.views.sim_graph import SimulationConfig
+from .result import EarliestArrivalResult
+from .timetable import ServiceTimetable
+
+__all__ = ("Isochrone", "get_isochrone")
+
+_CHUNK_MAX_ELEMENTS = 2 ** 20
+"""Max count of the elements of the distance matrix between the points and the stops computed at once."""
+
+
+@dataclass
+class Isochrone:
+    """
+    Earliest travel time to each point around the starting location.
+
+    ``points`` is an array of the coordinates in shape ``(N, 2)``.
+
+    ``travel_times`` is the earliest time in seconds to arrive at each point. This is ``inf`` if unreachable.
+
+    ``population`` is the population density around each point. This is ``None`` if not provided.
+    """
+
+    points: np.ndarray
+
+    travel_times: np.ndarray
+
+    population: Optional[np.ndarray] = None
+
+    def get_reachable_mask(self, max_travel_time: float) -> np.ndarray:
+        """Get a boolean mask aligned with ``points`` of the points reachable within ``max_travel_time`` seconds."""
+        return self.travel_times <= max_travel_time
+
+    def get_reachable_ratio(self, max_travel_time: float) -> float:
+        """Get the ratio of the points reachable within ``max_travel_time`` seconds."""
+        return float(np.count_nonzero(self.get_reachable_mask(max_travel_time)) / len(self.points))
+
+    def get_reachable_population(self, max_travel_time: float) -> float:
+        """
+        Get the total population density of the points reachable within ``max_travel_time`` seconds.
+
+        :raises ValueError: if the population is not provided
+        """
+        if self.population is None:
+            raise ValueError("Population is not provided for the isochrone")
+
+        return float(self.population[self.get_reachable_mask(max_travel_time)].sum())
+
+
+def get_isochrone(timetable: ServiceTimetable, result: EarliestArrivalResult, config: SimulationConfig,
+                  range_km: float, interval_km: float, *,
+                  ctrl_population: Optional[PopulationDataController] = None) -> Isochrone:
+    """
+    Get the travel time surface of ``result`` on the points generated around ``config.start_coord``.
+
+    The points are generated by ``generate_points()`` using ``range_km`` and ``interval_km``.
+    If ``ctrl_population`` is given, the population density of each point will also be included.
+
+    Agents arrive at a point by walking from the starting location or any stop where a bus is alighted
+    within ``config.max_walk_distance`` of the point.
+    Agents do not walk again from the stops reached by walking only.
+    The walking speed is ``config.walk_speed``.
+
+    ``result`` should come from ``timetable`` and ``config``,
+    for example, using :func:`get_earliest_arrivals` or :class:`ArrivalProfile`.
+
+    :raises ValueError: if the stops of `result` are not the ones of `timetable`
+    """
+    # pylint: disable=too-many-arguments,too-many-locals
+
+    if not np.array_equal(result.stop_ids, timetable.stop_ids):
+        raise ValueError("Stops of the earliest arrival result are not the ones of the timetable")
+
+    population = None
+    if ctrl_population:
+        points, population = ctrl_population.get_population_points(*config.start_coord, range_km, interval_km)
+        population = np.array(population, dtype=np.float64)
+    else:
+        points = generate_points(config.start_coord, range_km, interval_km)
+
+    points = np.array(points, dtype=np.float64)
+
+    # Walking from the starting location
+    walk_dist = distance_array(points, np.array(config.start_coord))
+    travel_times = np.where(walk_dist <= config.max_walk_distance, walk_dist / config.walk_speed * 3600, np.inf)
+
+    # Walking from the stops after alighting a bus
+    alighted = np.isfinite(result.bus_travel_times)
+    stop_coords = timetable.stop_coords[alighted]
+    stop_travel_times = result.bus_travel_times[alighted]
+
+    if len(stop_coords):
+        chunk_size = max(1, _CHUNK_MAX_ELEMENTS // len(stop_coords))
+
+        for start in range(0, len(points), chunk_size):
+            walk_dist = distance_array(points[start:start + chunk_size, np.newaxis, :], stop_coords[np.newaxis, :, :])
+            egress_times = np.where(walk_dist <= config.max_walk_distance,
+                                    stop_travel_times + walk_dist / config.walk_speed * 3600, np.inf)
+
+            np.minimum(travel_times[start:start + chunk_size], egress_times.min(axis=1),
+                       out=travel_times[start:start + chunk_size])
+
+    return Isochrone(points, travel_times, population)
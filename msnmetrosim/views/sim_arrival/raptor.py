@@ -0,0 +1,128 @@
+"""Round-based earliest arrival calculation (RAPTOR) on the service timetable."""
+from typing import Tuple
+
+import numpy as np
+
+from msnmetrosim.views.sim_graph import SimulationConfig, StaticPointConfig
+from .result import EarliestArrivalResult
+from .timetable import ServiceTimetable
+
+__all__ = ("get_earliest_arrivals",)
+
+
+def _get_trip_arrivals(timetable: ServiceTimetable, arrivals: np.ndarray, marked: np.ndarray,
+                       end_secs: float, max_wait_time: float) -> np.ndarray:
+    """
+    Get the earliest arrival of each stop by taking exactly one more bus trip from the ``marked`` stops.
+
+    ``arrivals`` is the earliest arrival of each stop in seconds since the start of the service date.
+
+    ``max_wait_time`` in seconds limits the wait time before boarding. ``inf`` means unlimited.
+    """
+    ev_stop = timetable.ev_stop
+    ev_arr = timetable.ev_arr
+
+    # Agents board the bus when the bus arrives
+    ev_wait = ev_arr - arrivals[ev_stop]
+    can_board = marked[ev_stop] & (ev_wait >= 0) & (ev_wait <= max_wait_time)
+
+    # Latest boardable stop event before each stop event, then check if it belongs to the same trip
+    board_pos = np.maximum.accumulate(np.where(can_board, np.arange(timetable.event_count), -1))
+    board_pos_prev = np.concatenate(([-1], board_pos[:-1]))
+    can_alight = (board_pos_prev >= timetable.trip_start[timetable.ev_trip]) & (ev_arr <= end_secs)
+
+    trip_arrivals = np.full(timetable.stop_count, np.inf)
+    np.minimum.at(trip_arrivals, ev_stop[can_alight], ev_arr[can_alight])
+
+    return trip_arrivals
+
+
+def _get_walk_arrivals(walk_arrays: Tuple[np.ndarray, np.ndarray, np.ndarray], arrivals: np.ndarray,
+                       improved: np.ndarray, end_secs: float) -> np.ndarray:
+    """Get the earliest arrival of each stop by walking from the ``improved`` stops once."""
+    walk_src, walk_dst, walk_time = walk_arrays
+
+    walk_from = improved[walk_src]
+    walk_arrival = arrivals[walk_src[walk_from]] + walk_time[walk_from]
+    in_time = walk_arrival <= end_secs
+
+    walk_arrivals = np.full(len(arrivals), np.inf)
+    np.minimum.at(walk_arrivals, walk_dst[walk_from][in_time], walk_arrival[in_time])
+
+    return walk_arrivals
+
+
+def get_earliest_arrivals(timetable: ServiceTimetable, config: SimulationConfig,
+                          config_points: StaticPointConfig) -> EarliestArrivalResult:
+    """
+    Get the earliest arrival time of each stop starting from ``config.start_coord`` at ``config_points.start_dt``.
+
+    Each round takes one more bus trip from the stops improved in the previous round,
+    then walks once to the stops within ``config.max_walk_distance`` of the alighting stops.
+    The rounds stop once no stop is improved, or the trip count exceeds ``config.max_transfer + 1``.
+    Arrivals beyond ``config_points.end_dt`` are discarded.
+
+    Consistent with :class:`SimulationMap`:
+
+    - Agents walk to the stops within ``config.max_walk_distance`` from the starting location first.
+
+    - There is no wait time limit for boarding the first bus.
+
+    - Wait time for a transfer must be within ``config.max_wait_time``.
+
+    .. note::
+        The wait time for a transfer is checked against the earliest arrival at the stop only.
+        A transfer which is only possible by arriving at the stop later is not considered.
+
+    :raises ValueError: if the date of `config_points.start_dt` is not the service date of `timetable`
+    """
+    # pylint: disable=too-many-locals
+
+    if config_points.start_dt.date() != timetable.service_date:
+        raise ValueError(f"The simulation starts on {config_points.start_dt.date()}, "
+                         f"which is not the service date of the timetable ({timetable.service_date})")
+
+    start_secs = timetable.get_seconds(config_points.start_dt)
+    end_secs = timetable.get_seconds(config_points.end_dt)
+
+    arrivals = np.full(timetable.stop_count, np.inf)
+    trip_counts = np.full(timetable.stop_count, -1, dtype=np.int64)
+
+    # Earliest arrival of each stop by alighting a bus.
+    # This is tracked separately because agents only walk to the other stops after alighting a bus.
+    bus_arrivals = np.full(timetable.stop_count, np.inf)
+
+    # Agents walk to the stops close to the starting location
+    origin_idx, origin_walk_time = timetable.get_origin_walks(config.start_coord, config.max_walk_distance,
+                                                              config.walk_speed)
+    in_time = start_secs + origin_walk_time <= end_secs
+    arrivals[origin_idx[in_time]] = start_secs + origin_walk_time[in_time]
+    trip_counts[origin_idx[in_time]] = 0
+
+    walk_arrays = timetable.get_walk_arrays(config.max_walk_distance, config.walk_speed)
+
+    marked = np.isfinite(arrivals)
+    trip_count = 0
+
+    while marked.any() and (config.max_transfer < 0 or trip_count <= config.max_transfer):
+        trip_count += 1
+
+        max_wait_time = np.inf if trip_count == 1 else config.max_wait_time
+
+        trip_arrivals = _get_trip_arrivals(timetable, arrivals, marked, end_secs, max_wait_time)
+        improved_bus = trip_arrivals < bus_arrivals
+        bus_arrivals[improved_bus] = trip_arrivals[improved_bus]
+
+        improved = trip_arrivals < arrivals
+        arrivals[improved] = trip_arrivals[improved]
+        trip_counts[improved] = trip_count
+
+        walk_arrivals = _get_walk_arrivals(walk_arrays, bus_arrivals, improved_bus, end_secs)
+        improved_walk = walk_arrivals < arrivals
+        arrivals[improved_walk] = walk_arrivals[improved_walk]
+        trip_counts[improved_walk] = trip_count
+
+        marked = improved | improved_walk
+
+    return EarliestArrivalResult(config_points.start_dt, timetable.stop_ids.copy(), arrivals - start_secs,
+                                 trip_counts, bus_arrivals - start_secs)
@@ -0,0 +1,101 @@
+"""Result of the earliest arrival calculation."""
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+
+__all__ = ("EarliestArrivalResult",)
+
+
+@dataclass
+class EarliestArrivalResult:
+    """
+    Earliest arrival time of each stop starting from a location at ``start_dt``.
+
+    ``stop_ids`` are the IDs of the stops. The other arrays are aligned with it.
+
+    ``travel_times`` is the earliest time in seconds to arrive at the stop since ``start_dt``.
+    This is ``inf`` if the stop is unreachable.
+
+    ``trip_counts`` is the count of the bus trips taken to arrive at the stop at the earliest time.
+    ``0`` means that the stop is reached by walking only. This is ``-1`` if the stop is unreachable.
+
+    ``bus_travel_times`` is the earliest time in seconds to arrive at the stop by alighting a bus since ``start_dt``.
+    This is ``inf`` if no bus is alighted at the stop.
+    Agents only walk to the other places after alighting a bus, so this is used for walking from the stops.
+    """
+
+    start_dt: datetime
+
+    stop_ids: np.ndarray
+
+    travel_times: np.ndarray
+
+    trip_counts: np.ndarray
+
+    bus_travel_times: np.ndarray
+
+    _stop_idx: Dict[int, int] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self._stop_idx = {stop_id: idx for idx, stop_id in enumerate(self.stop_ids.tolist())}
+
+    @property
+    def reachable_count(self) -> int:
+        """Get the count of the reachable stops."""
+        return int(np.count_nonzero(np.isfinite(self.travel_times)))
+
+    def get_reachable_mask(self, max_travel_time: Optional[float] = None) -> np.ndarray:
+        """
+        Get a boolean mask aligned with ``stop_ids`` of the stops reachable within ``max_travel_time`` seconds.
+
+        If ``max_travel_time`` is ``None``, the mask of all reachable stops will be returned.
+        """
+        if max_travel_time is None:
+            return np.isfinite(self.travel_times)
+
+        return self.travel_times <= max_travel_time
+
+    def get_reachable_stop_ids(self, max_travel_time: Optional[float] = None) -> List[int]:
+        """
+        Get the IDs of the stops reachable within ``max_travel_time`` seconds.
+
+        If ``max_travel_time`` is ``None``, the IDs of all reachable stops will be returned.
+        """
+        return self.stop_ids[self.get_reachable_mask(max_travel_time)].tolist()
+
+    def get_travel_time(self, stop_id: int) -> float:
+        """
+        Get the earliest travel time in seconds to arrive at the stop ``stop_id``.
+
+        Returns ``inf`` if the stop is unreachable.
+
+        :raises KeyError: if the stop is not found
+        """
+        return float(self.travel_times[self._stop_idx[stop_id]])
+
+    def get_trip_count(self, stop_id: int) -> int:
+        """
+        Get the count of the bus trips taken to arrive at the stop ``stop_id`` at the earliest time.
+
+        Returns ``-1`` if the stop is unreachable.
+
+        :raises KeyError: if the stop is not found
+        """
+        return int(self.trip_counts[self._stop_idx[stop_id]])
+
+    def get_arrival_dt(self, stop_id: int) -> Optional[datetime]:
+        """
+        Get the earliest arrival time at the stop ``stop_id``.
+
+        Returns ``None`` if the stop is unreachable.
+
+        :raises KeyError: if the stop is not found
+        """
+        travel_time = self.get_travel_time(stop_id)
+
+        if not np.isfinite(travel_time):
+            return None
+
+        return self.start_dt + timedelta(seconds=travel_time)
@@ -0,0 +1,187 @@
+"""Timetable of a service date stored in flat arrays for the earliest arrival calculation."""
+from datetime import datetime, date, time
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from msnmetrosim.controllers import (
+    MMTCalendarController, MMTStopDataController, MMTStopScheduleController, MMTTripDataController
+)
+from msnmetrosim.utils import distance, travel_time
+
+__all__ = ("ServiceTimetable",)
+
+
+class ServiceTimetable:
+    """
+    Timetable of all trips in service on a date.
+
+    Each stop schedule of the trips is a stop event. The stop events are stored in arrays,
+    sorted by the trip first, then the stop sequence:
+
+    - ``ev_trip``: index of the trip in ``trip_ids``
+    - ``ev_stop``: index of the stop in ``stop_ids``
+    - ``ev_arr`` / ``ev_dep``: arrival / departure time in seconds since the start of the service date
+
+    Times of a trip are made non-decreasing, so a trip running across midnight has its times beyond ``86400``.
+
+    ``trip_start[i]:trip_start[i + 1]`` of the stop event arrays are the events of the trip at ``trip_ids[i]``.
+
+    Stops that are not visited by any trip on the date are also indexed in ``stop_ids`` for walking.
+
+    :raises ValueError: if no service plan is found on the date or a stop of a stop schedule is not found
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    def _init_stops(self, ctrl_stop: MMTStopDataController):
+        self.stop_ids: np.ndarray = np.array([stop.stop_id for stop in ctrl_stop.all_data], dtype=np.int64)
+        self.stop_coords: np.ndarray = np.array([stop.coordinate for stop in ctrl_stop.all_data], dtype=np.float64)
+
+        self._stop_idx: Dict[int, int] = {stop_id: idx for idx, stop_id in enumerate(self.stop_ids.tolist())}
+
+    def _init_events(self, ctrl_stop_schedule: MMTStopScheduleController, trip_ids: List[int]):
+        ev_trip: List[int] = []
+        ev_stop: List[int] = []
+        ev_arr: List[int] = []
+        ev_dep: List[int] = []
+        trip_start: List[int] = [0]
+
+        for trip_idx, trip_id in enumerate(trip_ids):
+            for stop_schedule in ctrl_stop_schedule.get_stop_schedules_of_trip(trip_id):
+                if stop_schedule.stop_id not in self._stop_idx:
+                    raise ValueError(f"Stop data of ID {stop_schedule.stop_id} not found")
+
+                # Seconds since the midnight of the service date, which exceed a day after midnight as in GTFS
+                ev_trip.append(trip_idx)
+                ev_stop.append(self._stop_idx[stop_schedule.stop_id])
+                ev_arr.append(stop_schedule.arrival_secs)
+                ev_dep.append(stop_schedule.departure_secs)
+
+            trip_start.append(len(ev_trip))
+
+        self.ev_trip: np.ndarray = np.array(ev_trip, dtype=np.int64)
+        self.ev_stop: np.ndarray = np.array(ev_stop, dtype=np.int64)
+        self.ev_arr: np.ndarray = np.array(ev_arr, dtype=np.float64)
+        self.ev_dep: np.ndarray = np.array(ev_dep, dtype=np.float64)
+        self.trip_start: np.ndarray = np.array(trip_start, dtype=np.int64)
+
+    def __init__(self, service_date: Union[date, datetime], ctrl_calendar: MMTCalendarController,
+                 ctrl_stop: MMTStopDataController, ctrl_stop_schedule: MMTStopScheduleController,
+                 ctrl_trips: MMTTripDataController):
+        if isinstance(service_date, datetime):
+            service_date = service_date.date()
+
+        self.service_date: date = service_date
+
+        # Get the running service on the date
+        services = ctrl_calendar.get_services_by_date(service_date)
+        if not services:
+            raise ValueError(f"No service plan found on {service_date}")
+
+        # Get the available trip IDs of the service plan
+        self.trip_ids: np.ndarray = np.array(
+            sorted(ctrl_trips.get_trip_ids([service.service_id for service in services])), dtype=np.int64)
+
+        self._ctrl_stop = ctrl_stop
+        self._init_stops(ctrl_stop)
+        self._init_events(ctrl_stop_schedule, self.trip_ids.tolist())
+
+        self._connections: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = None
+
+        # (max walk distance, walk speed) -> walk graph arrays
+        self._walk_arrays: Dict[Tuple[float, float], Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+
+    @property
+    def stop_count(self) -> int:
+        """Get the count of the stops."""
+        return len(self.stop_ids)
+
+    @property
+    def event_count(self) -> int:
+        """Get the count of the stop events."""
+        return len(self.ev_stop)
+
+    def get_stop_idx(self, stop_id: int) -> int:
+        """
+        Get the index of the stop ``stop_id`` in ``stop_ids``.
+
+        :raises KeyError: if the stop is not found
+        """
+        return self._stop_idx[stop_id]
+
+    def get_seconds(self, dt: datetime) -> float:  # pylint: disable=invalid-name
+        """Get the seconds of ``dt`` since the start of the service date."""
+        return (dt - datetime.combine(self.service_date, time())).total_seconds()
+
+    def get_connections(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Get the connections of the timetable sorted by the boarding time, then the alighting time.
+
+        A connection is a bus moving from a stop to the next stop of a trip.
+        Each connection is boarded when the bus arrives at the stop to be consistent with :class:`SimulationMap`.
+
+        Returns 5 arrays aligned with each other:
+        boarding stop indices, alighting stop indices, boarding times, alighting times and trip indices.
+
+        The connections are sorted once then cached.
+        """
+        if self._connections is None:
+            # Stop events followed by another stop event of the same trip
+            has_next = np.flatnonzero(self.ev_trip[:-1] == self.ev_trip[1:])
+
+            board_time = self.ev_arr[has_next]
+            alight_time = self.ev_arr[has_next + 1]
+
+            order = np.lexsort((alight_time, board_time))
+            has_next = has_next[order]
+
+            self._connections = (self.ev_stop[has_next], self.ev_stop[has_next + 1],
+                                 board_time[order], alight_time[order], self.ev_trip[has_next])
+
+        return self._connections
+
+    def get_origin_walks(self, coord: Tuple[float, float], max_walk_distance: float, walk_speed: float) \
+            -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the stops that an agent at ``coord`` can walk to within ``max_walk_distance`` km.
+
+        Returns the stop indices and the walk time in seconds to each of the stops.
+        """
+        stop_idx: List[int] = []
+        walk_time: List[float] = []
+
+        for stop in self._ctrl_stop.get_stops_within_range(*coord, max_walk_distance):
+            stop_idx.append(self._stop_idx[stop.stop_id])
+            walk_time.append(travel_time(walk_speed, distance(coord, stop.coordinate)))
+
+        return np.array(stop_idx, dtype=np.int64), np.array(walk_time, dtype=np.float64)
+
+    def get_walk_arrays(self, max_walk_distance: float, walk_speed: float) \
+            -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Get the walk graph of the stops as 3 arrays of the walkable stop pairs.
+
+        The arrays are the source stop indices, the destination stop indices and the walk time in seconds.
+
+        Check the documentation of ``MMTStopDataController.get_walk_graph()`` for the walk graph.
+        """
+        cache_key = (max_walk_distance, walk_speed)
+
+        if cache_key not in self._walk_arrays:
+            walk_src: List[int] = []
+            walk_dst: List[int] = []
+            walk_time: List[float] = []
+
+            for stop_id, neighbors in self._ctrl_stop.get_walk_graph(max_walk_distance, walk_speed).items():
+                src_idx = self._stop_idx[stop_id]
+
+                for neighbor in neighbors:
+                    walk_src.append(src_idx)
+                    walk_dst.append(self._stop_idx[neighbor.stop_id])
+                    walk_time.append(neighbor.walk_time)
+
+            self._walk_arrays[cache_key] = (np.array(walk_src, dtype=np.int64), np.array(walk_dst, dtype=np.int64),
+                                            np.array(walk_time, dtype=np.float64))
+
+        return self._walk_arrays[cache_key]
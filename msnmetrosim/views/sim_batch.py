@@ -0,0 +1,170 @@
+"""Scripts to run the simulation from a batch of starting locations."""
+import csv
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from dataclasses import dataclass, replace
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from . import controllers
+from .sim_graph import (
+    StaticPointConfig, SimulationConfig, PathDiscoveryConfig,
+    SimulationStaticPoints, SimulationMap, PathDiscoveryResult
+)
+
+__all__ = ("OriginSummary", "run_batch_simulation")
+
+# Shared simulation inputs of the batch, inherited by forking the main process
+_worker_batch: Optional[Tuple[SimulationStaticPoints, SimulationConfig, Optional[PathDiscoveryConfig]]] = \
+    None  # pylint: disable=invalid-name
+
+
+@dataclass
+class OriginSummary:
+    """Summary of the simulation starting from a single location."""
+
+    # pylint: disable=too-many-instance-attributes
+
+    origin: Tuple[float, float]
+
+    point_count: int
+    path_count: int
+    pruned_count: int
+    detoured_count: int
+    max_trip_count: int
+
+    distance_avg: float
+    distance_median: float
+    displacement_avg: float
+    displacement_median: float
+
+    t_proc: float
+    """Time spent on generating the map and discovering the paths in seconds."""
+
+    CSV_HEADER = ("lat", "lon", "point_count", "path_count", "pruned_count", "detoured_count", "max_trip_count",
+                  "distance_avg", "distance_median", "displacement_avg", "displacement_median", "t_proc")
+
+    @staticmethod
+    def from_discovery_result(origin: Tuple[float, float], point_count: int, result: PathDiscoveryResult,
+                              t_proc: float) -> "OriginSummary":
+        """Create a summary from the path discovery ``result`` of the simulation map starting from ``origin``."""
+        if result.count_discovered:
+            metrics_dist = result.distance_metrics()
+            metrics_disp = result.displacement_metrics()
+
+            dist_avg, dist_median = metrics_dist.average, metrics_dist.median
+            disp_avg, disp_median = metrics_disp.average, metrics_disp.median
+        else:
+            dist_avg = dist_median = disp_avg = disp_median = float("nan")
+
+        return OriginSummary(
+            origin, point_count, result.count_discovered, result.total_pruned, result.total_detoured,
+            max(result.trip_count_distribution, default=0),
+            dist_avg, dist_median, disp_avg, disp_median, t_proc
+        )
+
+    def to_row(self) -> List[object]:
+        """Get the summary as a row in the order of ``CSV_HEADER``."""
+        return [*self.origin, self.point_count, self.path_count, self.pruned_count, self.detoured_count,
+                self.max_trip_count, self.distance_avg, self.distance_median,
+                self.displacement_avg, self.displacement_median, self.t_proc]
+
+
+def _simulate_origin(origin: Tuple[float, float], static_points: SimulationStaticPoints,
+                     config_sim: SimulationConfig, config_discovery: Optional[PathDiscoveryConfig]) -> OriginSummary:
+    """Run the simulation starting from ``origin`` on ``static_points`` and summarize it."""
+    start = time.time()
+
+    # Progress of each map is not printed, there could be thousands of them
+    with open(os.devnull, "w", encoding="utf-8") as devnull, redirect_stdout(devnull):
+        sim_map = SimulationMap(replace(config_sim, start_coord=origin), static_points, controllers.ctrl_stops)
+
+        discovery_result = PathDiscoveryResult()
+        try:
+            # Copied because the discovery config is updated with the simulation config of the map
+            for _ in sim_map.iter_possible_paths(
+                    None if config_discovery is None else replace(config_discovery), discovery_result
+            ):
+                pass
+        finally:
+            # The map attached its movement events to the static points, which are reused by the next origin
+            sim_map.clear_next_points()
+
+    return OriginSummary.from_discovery_result(origin, sim_map.point_count, discovery_result, time.time() - start)
+
+
+def _simulate_origin_in_worker(origin: Tuple[float, float]) -> OriginSummary:
+    """Run the simulation starting from ``origin`` in the worker process."""
+    return _simulate_origin(origin, *_worker_batch)
+
+
+def _iter_summaries(origins: List[Tuple[float, float]], static_points: SimulationStaticPoints,
+                    config_sim: SimulationConfig, config_discovery: Optional[PathDiscoveryConfig],
+                    workers: Optional[int]) -> Iterator[OriginSummary]:
+    global _worker_batch  # pylint: disable=global-statement
+
+    if not workers or workers <= 1 or "fork" not in multiprocessing.get_all_start_methods():
+        for origin in origins:
+            yield _simulate_origin(origin, static_points, config_sim, config_discovery)
+
+        return
+
+    # Each worker has its own copy of the static points by forking
+    _worker_batch = (static_points, config_sim, config_discovery)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork")) as executor:
+            # `map()` yields the results in the order of the origins
+            yield from executor.map(_simulate_origin_in_worker, origins,
+                                    chunksize=max(1, len(origins) // (workers * 4)))
+    finally:
+        _worker_batch = None
+
+
+def run_batch_simulation(origins: Iterable[Tuple[float, float]], config_points: StaticPointConfig,
+                         config_sim: SimulationConfig, output_path: str, /, *,
+                         config_discovery: Optional[PathDiscoveryConfig] = None,
+                         workers: Optional[int] = None) -> int:
+    """
+    Run the simulation starting from each of ``origins`` and write the summary of each origin to ``output_path``.
+
+    ``config_sim`` is the template of the simulation config. ``start_coord`` will be replaced by each origin.
+
+    The static points and the stop walk graph are generated once and shared by all origins.
+
+    If ``workers`` is greater than 1, the origins will be simulated in a process pool with ``workers`` processes.
+    The shared data is passed to the processes by forking, so this falls back to a single process
+    if forking is not available on the platform.
+
+    The summaries are written to ``output_path`` as CSV in the order of ``origins`` once each of them is available,
+    so the summaries are not held in the memory.
+
+    Returns the count of the simulated origins.
+    """
+    # pylint: disable=too-many-arguments
+
+    origins = list(origins)
+
+    print("Generating the points...")
+    static_points = SimulationStaticPoints(config_points, controllers.ctrl_calendar, controllers.ctrl_stops,
+                                           controllers.ctrl_stop_schedule, controllers.ctrl_trips)
+
+    # Cached in the controller, so all origins share it
+    controllers.ctrl_stops.get_walk_graph(config_sim.max_walk_distance, config_sim.walk_speed)
+
+    count = 0
+
+    with open(output_path, "w", newline="", encoding="utf-8") as output:
+        writer = csv.writer(output)
+        writer.writerow(OriginSummary.CSV_HEADER)
+
+        for summary in _iter_summaries(origins, static_points, config_sim, config_discovery, workers):
+            writer.writerow(summary.to_row())
+            output.flush()
+
+            count += 1
+            if count % 20 == 0:  # Report every 20 origins
+                print(f"Simulating the origins... ({count} / {len(origins)})")
+
+    return count
@@ -6,7 +6,7 @@ from datetime import datetime
 from typing import Tuple, List, Callable, Optional, Iterable
 
 from msnmetrosim.utils import plot_twin_y, plot_single, plot_multiple, plot_discrete_distribution_normalized
-from .controllers import ctrl_calendar, ctrl_stops, ctrl_stop_schedule, ctrl_trips
+from . import controllers
 from .sim_graph import (
     StaticPointConfig, SimulationConfig,
     SimulationStaticPoints, SimulationMap,
@@ -140,13 +140,14 @@ def benchmark_map_construction(start_dt: datetime, travel_time_list: Iterable[fl
         # Point generation
         _start = time.time()
         print("Generating the points...")
-        sim_points = SimulationStaticPoints(config_points, ctrl_calendar, ctrl_stops, ctrl_stop_schedule, ctrl_trips)
+        sim_points = SimulationStaticPoints(config_points, controllers.ctrl_calendar, controllers.ctrl_stops,
+                                            controllers.ctrl_stop_schedule, controllers.ctrl_trips)
         _gen_static = time.time() - _start
 
         # Map generation
         _start = time.time()
         print("Generating the map...")
-        sim_map = SimulationMap(config_sim, sim_points, ctrl_stops)
+        sim_map = SimulationMap(config_sim, sim_points, controllers.ctrl_stops)
         _gen_map = time.time() - _start
 
         # Path generation
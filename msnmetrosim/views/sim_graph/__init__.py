@@ -1,5 +1,6 @@
 """Implementations of the simulation graph."""
 from .config import SimulationConfig, PathDiscoveryConfig, StaticPointConfig
+from .csr import SimulationMapCSR
 from .event_move import MoveEventType
 from .map_points import SimulationStaticPoints
 from .map_sim import SimulationMap, PathDiscoveryResult
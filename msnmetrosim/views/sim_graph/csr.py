@@ -0,0 +1,168 @@
+"""Compact graph representation of a simulation map in NumPy arrays."""
+from dataclasses import dataclass, fields
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .event_move import MoveEvent
+from .event_static import StaticPoint, ScheduledStop, StopBase, StopWait
+
+__all__ = ("SimulationMapCSR", "NODE_TYPE_POINT", "NODE_TYPE_SCHEDULED_STOP", "NODE_TYPE_STOP_WAIT", "EDGE_TYPE_NONE")
+
+NODE_TYPE_POINT = 0
+"""Node type code of a plain :class:`StaticPoint`, such as the starting point."""
+NODE_TYPE_SCHEDULED_STOP = 1
+"""Node type code of a :class:`ScheduledStop`."""
+NODE_TYPE_STOP_WAIT = 2
+"""Node type code of a :class:`StopWait`."""
+
+EDGE_TYPE_NONE = 0
+"""Edge type code of a transition without a movement event. Other codes are the values of :class:`MoveEventType`."""
+
+
+def _get_node_type(point: StaticPoint) -> int:
+    if isinstance(point, ScheduledStop):
+        return NODE_TYPE_SCHEDULED_STOP
+    if isinstance(point, StopWait):
+        return NODE_TYPE_STOP_WAIT
+
+    return NODE_TYPE_POINT
+
+
+@dataclass
+class SimulationMapCSR:
+    """
+    Simulation map stored in the compressed sparse row (CSR) format.
+
+    Nodes are indexed in the order of the traversal starting from the root, so the root is always at index ``0``.
+
+    Node arrays (in shape ``(node count,)``):
+
+    - ``node_type``: type code of the node (``NODE_TYPE_*``)
+    - ``node_dt_in`` / ``node_dt_out``: seconds from ``start_dt`` that an agent gets in / out of the node
+    - ``node_stop_id`` / ``node_trip_id``: stop / trip ID of the node. ``-1`` if the node is not a stop
+    - ``node_lat`` / ``node_lon``: coordinate of the node
+
+    Edge arrays (in shape ``(edge count,)``):
+
+    - ``edge_target``: index of the node that the edge transitions to
+    - ``edge_type``: type code of the edge (``EDGE_TYPE_NONE`` or the value of :class:`MoveEventType`)
+    - ``edge_time``: time spent on the edge in seconds
+    - ``edge_distance``: distance traveled on the edge in km
+
+    The edges of the node at index ``i`` are located at ``edge_offset[i]:edge_offset[i + 1]``
+    of the edge arrays, in the same order as ``StaticPoint.next_points``.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    start_dt: datetime
+
+    node_type: np.ndarray
+    node_dt_in: np.ndarray
+    node_dt_out: np.ndarray
+    node_stop_id: np.ndarray
+    node_trip_id: np.ndarray
+    node_lat: np.ndarray
+    node_lon: np.ndarray
+
+    edge_offset: np.ndarray
+    edge_target: np.ndarray
+    edge_type: np.ndarray
+    edge_time: np.ndarray
+    edge_distance: np.ndarray
+
+    @property
+    def node_count(self) -> int:
+        """Get the count of the nodes."""
+        return len(self.node_type)
+
+    @property
+    def edge_count(self) -> int:
+        """Get the count of the edges."""
+        return len(self.edge_target)
+
+    def get_edge_slice(self, node_idx: int) -> slice:
+        """Get the slice of the edge arrays for the edges of the node at ``node_idx``."""
+        return slice(self.edge_offset[node_idx], self.edge_offset[node_idx + 1])
+
+    def save(self, file_path: str):
+        """
+        Save the map to ``file_path`` using ``np.savez()``.
+
+        Check the documentation of ``np.savez()`` for the naming of ``file_path``.
+        """
+        arrays = {fld.name: getattr(self, fld.name) for fld in fields(self) if fld.name != "start_dt"}
+
+        np.savez(file_path, start_dt=np.datetime64(self.start_dt), **arrays)
+
+    @staticmethod
+    def load(file_path: str) -> "SimulationMapCSR":
+        """Load the map saved by ``save()`` from ``file_path``."""
+        with np.load(file_path) as data:
+            arrays = {fld.name: data[fld.name] for fld in fields(SimulationMapCSR) if fld.name != "start_dt"}
+
+            return SimulationMapCSR(start_dt=data["start_dt"].item(), **arrays)  # pylint: disable=no-member
+
+    @staticmethod
+    def from_root(root: StaticPoint, start_dt: Optional[datetime] = None) -> "SimulationMapCSR":
+        """
+        Create a :class:`SimulationMapCSR` from the nodes reachable from ``root``.
+
+        If ``start_dt`` is not given, ``dt_in`` of ``root`` will be used.
+        """
+        # pylint: disable=too-many-locals
+
+        start_dt = start_dt or root.dt_in
+
+        # Index the nodes - point ID -> node index
+        node_idx: Dict[int, int] = {id(root): 0}
+        nodes: List[StaticPoint] = [root]
+
+        # BFS, ``nodes`` also serves as the queue
+        idx_queue = 0
+        while idx_queue < len(nodes):
+            for _, next_pt in nodes[idx_queue].next_points:
+                if id(next_pt) not in node_idx:
+                    node_idx[id(next_pt)] = len(nodes)
+                    nodes.append(next_pt)
+
+            idx_queue += 1
+
+        # Edges
+        edge_offset = np.zeros(len(nodes) + 1, dtype=np.int64)
+        edges: List[tuple] = []
+
+        for idx, node in enumerate(nodes):
+            for event, next_pt in node.next_points:
+                event: Optional[MoveEvent]
+
+                target_idx = node_idx[id(next_pt)]
+
+                if event:
+                    edges.append((target_idx, event.event_type.value, event.event_time, event.traveled_dist))
+                else:
+                    edges.append((target_idx, EDGE_TYPE_NONE, 0, 0))
+
+            edge_offset[idx + 1] = len(edges)
+
+        edge_target, edge_type, edge_time, edge_distance = zip(*edges) if edges else ((), (), (), ())
+
+        return SimulationMapCSR(
+            start_dt=start_dt,
+            node_type=np.array([_get_node_type(node) for node in nodes], dtype=np.int8),
+            node_dt_in=np.array([(node.dt_in - start_dt).total_seconds() for node in nodes], dtype=np.float64),
+            node_dt_out=np.array([(node.dt_out - start_dt).total_seconds() for node in nodes], dtype=np.float64),
+            node_stop_id=np.array([node.stop_id if isinstance(node, StopBase) else -1 for node in nodes],
+                                  dtype=np.int64),
+            node_trip_id=np.array([node.trip_id if isinstance(node, StopBase) else -1 for node in nodes],
+                                  dtype=np.int64),
+            node_lat=np.array([node.coordinate[0] for node in nodes], dtype=np.float64),
+            node_lon=np.array([node.coordinate[1] for node in nodes], dtype=np.float64),
+            edge_offset=edge_offset,
+            edge_target=np.array(edge_target, dtype=np.int64),
+            edge_type=np.array(edge_type, dtype=np.int8),
+            edge_time=np.array(edge_time, dtype=np.float64),
+            edge_distance=np.array(edge_distance, dtype=np.float64),
+        )
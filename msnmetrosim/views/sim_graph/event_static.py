@@ -60,6 +60,10 @@ class StaticPoint(TimeableMixin):
         """Add the next :class:`StaticPoint` transitioned by the movement event ``event_move``."""
         self._next_points.append((event_move, point))
 
+    def clear_next_points(self):
+        """Remove all the next points of this point."""
+        self._next_points.clear()
+
 
 class StopBase(StaticPoint):
     """
@@ -1,6 +1,7 @@
 """Classes for the simluation map containing stop schedules at a moment."""
-from datetime import datetime, timedelta
-from typing import List, Optional
+from bisect import bisect_left
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
 
 from msnmetrosim.controllers import (
     MMTCalendarController, MMTStopScheduleController, MMTTripDataController, MMTStopDataController
@@ -46,12 +47,12 @@ class SimulationStaticPoints:
         if not services:
             raise ValueError(f"No service plan found on {config.start_dt}")
 
-        # Get the available trip IDs of the service plan
-        trip_ids = ctrl_trips.get_trip_ids([service.service_id for service in services])
+        # Index the trips of each service plan, this only happens once for each controller
+        ctrl_stop_schedule.index_services(ctrl_trips)
 
-        # Get the stop schedules as :class:`ScheduledStop` (nodes)
+        # Get the stop schedules of the service plans as :class:`ScheduledStop` (nodes)
         stop_schedules_sim = ctrl_stop_schedule.get_stop_schedule_sim_by_arrival(
-            config.start_dt, config.max_travel_time, trip_ids=trip_ids)
+            config.start_dt, config.max_travel_time, service_ids=[service.service_id for service in services])
 
         for stop_schedule_sim in stop_schedules_sim:
             stop_data = ctrl_stop.get_stop_by_id(stop_schedule_sim.stop_id)
@@ -60,16 +61,20 @@ class SimulationStaticPoints:
 
             self._static_points.append(ScheduledStop.from_stop_schedule_sim(stop_schedule_sim, stop_data.coordinate))
 
-    def _init_stop_by_arrival_hr(self):
-        # Put the data into the "boxes"
+    def _init_stop_arrival_idx(self):
+        # Group the scheduled stops by its stop ID
+        stops_by_id: Dict[int, List[ScheduledStop]] = {}
+
         for static_point in self._static_points:
             if isinstance(static_point, ScheduledStop):
-                self._stop_by_arrival_hr[static_point.stop_sim.arrival_time.hour].append(static_point)
+                stops_by_id.setdefault(static_point.stop_id, []).append(static_point)
+
+        # Sort the scheduled stops of each stop by its arrival time
+        for stop_id, scheduled_stops in stops_by_id.items():
+            scheduled_stops.sort(key=lambda data: data.stop_sim.arrival_time)
 
-        # Sort the data in the "boxes"
-        for hour in range(24):
-            self._stop_by_arrival_hr[hour] = list(sorted(self._stop_by_arrival_hr[hour],
-                                                         key=lambda data: data.stop_sim.arrival_time))
+            self._stop_arrival_idx[stop_id] = ([data.stop_sim.arrival_time for data in scheduled_stops],
+                                               scheduled_stops)
 
     def __init__(self, config: StaticPointConfig, ctrl_calendar: MMTCalendarController,
                  ctrl_stop: MMTStopDataController, ctrl_stop_schedule: MMTStopScheduleController,
@@ -79,8 +84,9 @@ class SimulationStaticPoints:
         self._static_points: List[StaticPoint] = []
         self._init_static_points(config, ctrl_calendar, ctrl_stop, ctrl_stop_schedule, ctrl_trips)
 
-        self._stop_by_arrival_hr: List[List[ScheduledStop]] = [[] for _ in range(24)]
-        self._init_stop_by_arrival_hr()
+        # Stop ID -> (sorted arrival times, scheduled stops in the same order)
+        self._stop_arrival_idx: Dict[int, Tuple[List[datetime], List[ScheduledStop]]] = {}
+        self._init_stop_arrival_idx()
 
     def __str__(self):
         return f"<Sim Static Points: {len(self._static_points)}>"
@@ -88,19 +94,35 @@ class SimulationStaticPoints:
     def __repr__(self):
         return self.__str__()
 
+    def clear_next_points(self):
+        """
+        Remove the movement events attached to the static points.
+
+        :class:`SimulationMap` attaches the movement events to the static points when it is generated.
+        Call this before generating another :class:`SimulationMap` from the same static points.
+
+        This walks through all static points.
+        Use ``SimulationMap.clear_next_points()`` to only clear the static points attached by a map.
+
+        .. note::
+            Any :class:`SimulationMap` generated earlier from these static points will be invalidated.
+        """
+        for static_point in self._static_points:
+            static_point.clear_next_points()
+
     def get_next_scheduled_stop(self, start_dt: datetime, end_dt: datetime, stop_id: int) -> Optional[ScheduledStop]:
         """
         Get the next scheduled stop that arrives between ``start_dt`` and ``end_dt`` at ``stop_id``.
 
         Returns ``None`` if not found with the given conditions.
         """
-        current_dt = start_dt
+        if stop_id not in self._stop_arrival_idx:
+            return None
 
-        while current_dt <= end_dt:
-            for scheduled_stop in self._stop_by_arrival_hr[current_dt.hour]:
-                if start_dt <= scheduled_stop.stop_sim.arrival_time <= end_dt and scheduled_stop.stop_id == stop_id:
-                    return scheduled_stop
+        arrival_times, scheduled_stops = self._stop_arrival_idx[stop_id]
 
-            current_dt += timedelta(hours=1)
+        idx = bisect_left(arrival_times, start_dt)
+        if idx < len(arrival_times) and arrival_times[idx] <= end_dt:
+            return scheduled_stops[idx]
 
         return None
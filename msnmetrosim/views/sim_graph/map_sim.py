@@ -1,13 +1,17 @@
 """Main simulation map."""
+import multiprocessing
+from array import array
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, wait
 from dataclasses import dataclass, field
 from datetime import timedelta, datetime
-from typing import Set, Dict, List, Optional, Counter as CounterType
+from typing import Any, Callable, Set, Dict, List, Optional, Generator, Tuple, Counter as CounterType
 
 from msnmetrosim.controllers import MMTStopDataController
 from msnmetrosim.models import MMTStop
 from msnmetrosim.utils import travel_time, distance, normalize_cumulate_vector, DataMetrics
 from .config import SimulationConfig, PathDiscoveryConfig
+from .csr import SimulationMapCSR
 from .event_move import MoveEvent, MoveEventType
 from .event_static import StaticPoint, ScheduledStop, StopWait
 from .map_points import SimulationStaticPoints
@@ -15,6 +19,15 @@ from .path import SimPath, PathDiscoveryResult as SimPathDiscoveryResult
 
 __all__ = ("SimulationMap", "PathDiscoveryResult")
 
+# Map to be discovered in the worker processes, inherited by forking the main process
+_worker_map: Optional["SimulationMap"] = None  # pylint: disable=invalid-name
+# Values shared with the worker processes: position of the next subtree to discover,
+# and the discovered and pruned counts for printing the progress
+_worker_shared: Optional[Tuple[Any, Any]] = None  # pylint: disable=invalid-name
+
+_PROGRESS_INTERVAL_SECS = 1
+"""Interval in seconds to print the progress of the path discovery in the worker processes."""
+
 
 @dataclass
 class PathDiscoveryResult:
@@ -30,11 +43,17 @@ class PathDiscoveryResult:
     count_frontier: int = 0
 
     total_pruned: int = 0
-    total_detoured: int = -1  # -1 means not completed. This will only being updated upon completed (attach_path)
+    total_detoured: int = -1  # -1 means not completed. This will only being updated upon completed (complete)
 
     prev_discovered: int = field(init=False, default=0)
     prev_frontier: int = field(init=False, default=0)
 
+    # Stats of each discovered path, recorded on the fly so the paths do not need to be held.
+    # These are O(paths), but only take 8 bytes per path each, because the medians need all of them.
+    traveled_distances: array = field(init=False, default_factory=lambda: array("d"), repr=False)
+    displacements: array = field(init=False, default_factory=lambda: array("d"), repr=False)
+    count_detoured: int = field(init=False, default=0)
+
     @property
     def trip_count_distribution_cdf(self):
         """Get the trip count distribution as CDF data in ``(X_ARRAY, Y_ARRAY)`` for plotting."""
@@ -74,24 +93,64 @@ class PathDiscoveryResult:
         """Print method to be called if the discovery is completed."""
         print(self)
 
-    def complete(self, paths: List[SimPath]):
+    def record_path(self, path: SimPath):
+        """
+        Record ``path`` as a newly discovered path.
+
+        Only the stats of ``path`` will be recorded. ``path`` itself will not be held.
+
+        The traveled distance and the displacement of ``path`` are kept as 2 floats,
+        so the memory of this result still grows with the count of the paths, but much slower than the paths.
+        """
+        self.count_discovered += 1
+
+        # Update path moving structure
+        self.path_move_distribution.update(path.event_counter)
+        self.trip_count_distribution[path.trip_count] += 1
+
+        # Update the path stats
+        self.traveled_distances.append(path.traveled_distance)
+        self.displacements.append(path.displacement)
+        self.count_detoured += path.detouring
+
+    def complete(self, paths: Optional[List[SimPath]] = None):
         """
         Method to be called upon completion.
 
-        This method will record the ``paths`` discovered and update some statistical parameters.
+        This method will attach the ``paths`` discovered if given and finalize some statistical parameters.
+
+        The stats of each path should already be recorded by ``record_path()``.
         """
-        self.paths = paths
+        self.paths = paths or []
 
-        self.count_discovered = len(paths)
         self.count_frontier = 0
 
-        # Update path moving structure
-        for path in paths:
-            self.path_move_distribution.update(path.event_counter)
-            self.trip_count_distribution[path.trip_count] += 1
-
         # Update detouring count
-        self.total_detoured = sum(path.detouring for path in self.paths)
+        self.total_detoured = self.count_detoured
+
+    def merge(self, other: "PathDiscoveryResult"):
+        """
+        Merge the stats of ``other`` into this result.
+
+        The paths of ``other`` will **not** be merged.
+        """
+        self.path_move_distribution.update(other.path_move_distribution)
+        self.trip_count_distribution.update(other.trip_count_distribution)
+
+        self.count_discovered += other.count_discovered
+        self.total_pruned += other.total_pruned
+        self.count_detoured += other.count_detoured
+
+        self.traveled_distances.extend(other.traveled_distances)
+        self.displacements.extend(other.displacements)
+
+    def distance_metrics(self, /, name: Optional[str] = None) -> DataMetrics:
+        """Get the metrics of the traveled distance of the discovered paths."""
+        return DataMetrics(self.traveled_distances, name)
+
+    def displacement_metrics(self, /, name: Optional[str] = None) -> DataMetrics:
+        """Get the metrics of the displacements of the discovered paths."""
+        return DataMetrics(self.displacements, name)
 
     def update(self, result: SimPathDiscoveryResult):
         """
@@ -101,7 +160,7 @@ class PathDiscoveryResult:
         """
         self.total_pruned += result.pruned
 
-    def update_print(self, discovered: int, frontier: int, result: SimPathDiscoveryResult):
+    def update_print(self, discovered: int, frontier: int):
         """
         Update the path discovery result and print the result.
 
@@ -116,8 +175,6 @@ class PathDiscoveryResult:
         self.count_discovered = discovered
         self.count_frontier = frontier
 
-        self.total_pruned += result.pruned
-
         self.print_result(in_progress=True)
 
     @property
@@ -162,6 +219,21 @@ class SimulationMap:
         """Get the estimated count of points in the map."""
         return self._point_count
 
+    @property
+    def visited_count(self) -> int:
+        """Get the count of the scheduled stops ever added to the frontier during the map generation."""
+        return self._visited_count
+
+    @property
+    def expanded_count(self) -> int:
+        """Get the count of the points popped from the frontier during the map generation."""
+        return self._expanded_count
+
+    @property
+    def frontier_peak_count(self) -> int:
+        """Get the maximum count of the points in the frontier during the map generation."""
+        return self._frontier_peak_count
+
     def _init_frontier_sequential(self, start_dt: datetime, end_dt: datetime, stop: ScheduledStop,
                                   static_points: SimulationStaticPoints, ctrl_stop: MMTStopDataController) \
             -> Dict[int, ScheduledStop]:
@@ -217,18 +289,14 @@ class SimulationMap:
 
         ret: Dict[int, ScheduledStop] = {}
 
-        for stop_dist_data in ctrl_stop.find_data_order_by_dist(*stop.coordinate):
-            if stop_dist_data.distance > config.max_walk_distance:
-                break  # Beyond max walking distance
-
-            if stop_dist_data.distance == 0:
-                continue  # No need to walk
+        walk_graph = ctrl_stop.get_walk_graph(config.max_walk_distance, config.walk_speed)
 
-            scheduled_stop = static_points.get_next_scheduled_stop(start_dt, end_dt, stop_dist_data.data.stop_id)
+        for neighbor in walk_graph.get(stop.stop_id, []):
+            scheduled_stop = static_points.get_next_scheduled_stop(start_dt, end_dt, neighbor.stop_id)
             if not scheduled_stop:
                 continue  # Next scheduled stop unavailable
 
-            walk_time = travel_time(config.walk_speed, stop_dist_data.distance)
+            walk_time = neighbor.walk_time
 
             # Time of the agent arrived at the closest stop
             stop_arrival_dt = stop.stop_sim.departure_time + timedelta(seconds=walk_time)
@@ -253,7 +321,7 @@ class SimulationMap:
                                      scheduled_stop.stop_sim, scheduled_stop.coordinate)
 
                 parent_pt = stop_wait
-                stop.add_next_point(MoveEvent(MoveEventType.WALK, walk_time, stop_dist_data.distance), stop_wait)
+                stop.add_next_point(MoveEvent(MoveEventType.WALK, walk_time, neighbor.distance), stop_wait)
                 self._point_count += 1
 
             parent_pt.add_next_point(wait_event, scheduled_stop)
@@ -327,28 +395,48 @@ class SimulationMap:
 
         # Get the starting stops of the simulation
         frontier: Dict[int, StaticPoint] = self._init_starting_frontier(config, static_points, ctrl_stop)
-        frontier_past: Set[int] = set(frontier.keys())
 
-        counter: int = 0  # For progress reporting
+        # For statistical purpose only
+        self._visited_count: int = len(frontier)
+        self._expanded_count: int = 0
+        self._frontier_peak_count: int = len(frontier)
+
+        # Scheduled stops of ``static_points`` which the movement events are attached to
+        self._expanded_stops: List[ScheduledStop] = []
+
+        try:
+            self._init_expand_frontier(frontier, config, static_points, ctrl_stop)
+        except BaseException:
+            # Static points may be reused by another map
+            self.clear_next_points()
+            raise
+
+    def _init_expand_frontier(self, frontier: Dict[int, StaticPoint], config: SimulationConfig,
+                              static_points: SimulationStaticPoints, ctrl_stop: MMTStopDataController):
+        visited: Set[int] = set(frontier.keys())
 
         # Generate other edges
         while frontier:
-            if counter % 20 == 0:  # Report every 20 iterations
-                print(f"Generating the map... (#{counter} / {len(frontier)} in frontier)")
+            if self._expanded_count % 20 == 0:  # Report every 20 iterations
+                print(f"Generating the map... (#{self._expanded_count} / {len(frontier)} in frontier)")
 
             _, stop = frontier.popitem()
 
             if isinstance(stop, ScheduledStop):
+                self._expanded_stops.append(stop)
                 frontiers = self._init_handle_frontier_stop(stop, config, static_points, ctrl_stop)
 
-                # Remove already-traversed entries
-                for id_past in frontier_past:
-                    frontiers.pop(id_past, None)
+                # Only check the new candidates against the traversed entries
+                for id_next, next_stop in frontiers.items():
+                    if id_next not in visited:
+                        visited.add(id_next)  # Record that the frontier is traversed
+                        frontier[id_next] = next_stop
 
-                frontier_past.update(frontiers.keys())  # Record that the frontiers are traversed
-                frontier.update(frontiers)
+                self._frontier_peak_count = max(self._frontier_peak_count, len(frontier))
 
-            counter += 1
+            self._expanded_count += 1
+
+        self._visited_count = len(visited)
 
     def __str__(self):
         return f"<Simulation map: {self._point_count}>"
@@ -356,57 +444,308 @@ class SimulationMap:
     def __repr__(self):
         return str(self)
 
-    def get_possible_paths_top_down(self, /, config: Optional[PathDiscoveryConfig] = None) \
-            -> PathDiscoveryResult:
+    def clear_next_points(self):
         """
-        Get all possible paths of the map.
+        Remove the movement events attached to the static points by this map.
 
-        Path discovery will be executed top-down, which means that the path discovery starts from the root.
+        Only the scheduled stops expanded during the map generation are cleared,
+        so this is cheaper than ``SimulationStaticPoints.clear_next_points()`` if only a part of them is reached.
+        Call this before generating another :class:`SimulationMap` from the same static points.
 
-        Advantages:
-
-        - All paths are guaranteed to be found.
+        .. note::
+            This map will be invalidated.
+        """
+        for stop in self._expanded_stops:
+            stop.clear_next_points()
 
-        Disadvantages:
+        self._expanded_stops.clear()
 
-        - Expensive.
+    def to_csr(self) -> SimulationMapCSR:
+        """
+        Export this map as a :class:`SimulationMapCSR`, which stores the nodes and the edges in NumPy arrays.
 
-        :param config: path discovery config
+        The exported map can be saved by ``SimulationMapCSR.save()`` and loaded by ``SimulationMapCSR.load()``.
         """
-        discovery_result = PathDiscoveryResult()
+        return SimulationMapCSR.from_root(self._start)
 
-        # Build config
+    def _get_discovery_config(self, config: Optional[PathDiscoveryConfig]) -> PathDiscoveryConfig:
         if not config:
             config = PathDiscoveryConfig()
         config.update_with_sim_config(self._config)
 
-        # BFS is used
-        ret: List[SimPath] = []
-        cur: List[SimPath] = [SimPath.from_single_point(self._start)]
+        return config
+
+    @staticmethod
+    def _get_child_indices(path: SimPath, children: List[SimPath]) -> List[int]:
+        """
+        Get the index of each of ``children`` in the next points of the last point of ``path``.
+
+        ``children`` should be the possible next paths of ``path``, which are in the order of the next points.
+        """
+        next_points = path.point.next_points
+
+        ret: List[int] = []
+        idx = 0
 
+        for child in children:
+            while next_points[idx][0] is not child.event or next_points[idx][1] is not child.point:
+                idx += 1
+
+            ret.append(idx)
+            idx += 1
+
+        return ret
+
+    @classmethod
+    def _iter_paths_from(cls, stack: List[Tuple[SimPath, Optional[Tuple[int, ...]]]], config: PathDiscoveryConfig,
+                         discovery_result: PathDiscoveryResult,
+                         on_progress: Optional[Callable[[PathDiscoveryResult, int], None]] = None) \
+            -> Generator[Tuple[SimPath, Optional[Tuple[int, ...]]], None, None]:
+        """
+        Discover the paths depth-first from the paths in ``stack`` and yield each discovered path.
+
+        Each element of ``stack`` is a path and the indices of the next points taken at each point of the path.
+        If the indices are ``None``, the indices of the discovered paths will not be tracked either.
+
+        ``on_progress`` is called with ``discovery_result`` and the count of the paths in the frontier periodically.
+        """
         counter = 0  # Iteration counter
 
-        while cur:
-            cur_path = cur.pop(0)
+        while stack:
+            cur_path, cur_indices = stack.pop()
 
             # Find paths
             result = cur_path.get_possible_next_paths(config)
 
-            # Add paths
-            if result.paths:
-                cur.extend(result.paths)
+            # Add paths, reversed to pop the paths in the order of discovery
+            if not result.paths:
+                discovery_result.record_path(cur_path)
+                yield cur_path, cur_indices
+            elif cur_indices is None:
+                stack.extend((path, None) for path in reversed(result.paths))
             else:
-                ret.append(cur_path)
+                stack.extend(reversed([(path, cur_indices + (idx,)) for path, idx
+                                       in zip(result.paths, cls._get_child_indices(cur_path, result.paths))]))
 
             # Progress reporting
             discovery_result.update(result)
 
-            if counter % 2000 == 0:
-                discovery_result.update_print(len(ret), len(cur), result)
+            if on_progress and counter % 2000 == 0:
+                on_progress(discovery_result, len(stack))
             counter += 1
 
+    def iter_possible_paths(self, /, config: Optional[PathDiscoveryConfig] = None,
+                            discovery_result: Optional[PathDiscoveryResult] = None) \
+            -> Generator[SimPath, None, None]:
+        """
+        Yield all possible paths of the map one by one.
+
+        Path discovery will be executed depth-first starting from the root,
+        so only the paths on the current branches are held in the memory.
+
+        If ``discovery_result`` is given, the stats of each yielded path will be recorded into it on the fly.
+        Check ``PathDiscoveryResult.record_path()`` for the memory used by the recorded stats.
+        ``discovery_result`` will be completed without the paths attached once all paths are yielded.
+
+        :param config: path discovery config
+        :param discovery_result: result object to record the stats of the discovery
+        """
+        if discovery_result is None:
+            discovery_result = PathDiscoveryResult()
+
+        config = self._get_discovery_config(config)
+
+        def on_progress(result: PathDiscoveryResult, frontier: int):
+            result.update_print(result.count_discovered, frontier)
+
+        # DFS is used
+        for path, _ in self._iter_paths_from([(SimPath.from_single_point(self._start), None)], config,
+                                             discovery_result, on_progress):
+            yield path
+
+        discovery_result.complete()
+
+    def _discover_subtrees(self, subtree_indices: List[int], config: PathDiscoveryConfig, with_paths: bool) \
+            -> Tuple[PathDiscoveryResult, Dict[int, List[Tuple[int, ...]]]]:
+        """
+        Discover the paths starting from the possible next paths of the root in the worker process.
+
+        ``subtree_indices`` are the indices of the possible next paths of the root in its next points.
+        The subtrees are taken one by one from the counter shared by the worker processes,
+        so the stats of all subtrees discovered by a worker process are merged in the process.
+
+        If ``with_paths`` is ``True``, the discovered paths of each subtree will also be returned
+        as the indices of the next points taken at each point of the path,
+        so the points of the map are not transferred between the processes.
+        The key of the returned :class:`dict` is the position of the subtree in ``subtree_indices``.
+        """
+        # pylint: disable=too-many-locals
+
+        next_subtree, progress = _worker_shared
+
+        root = SimPath.from_single_point(self._start)
+
+        discovery_result = PathDiscoveryResult()
+        paths: Dict[int, List[Tuple[int, ...]]] = {}
+
+        # Discovered and pruned counts reported to the main process
+        reported = [0, 0]
+
+        def on_progress(result: PathDiscoveryResult, _: int):
+            with progress.get_lock():
+                progress[0] += result.count_discovered - reported[0]
+                progress[1] += result.total_pruned - reported[1]
+
+            reported[0] = result.count_discovered
+            reported[1] = result.total_pruned
+
+        while True:
+            with next_subtree.get_lock():
+                subtree_pos = next_subtree.value
+                next_subtree.value += 1
+
+            if subtree_pos >= len(subtree_indices):
+                break
+
+            subtree_idx = subtree_indices[subtree_pos]
+            event, point = self._start.next_points[subtree_idx]
+            subtree_root = (root.extend(point, event), (subtree_idx,) if with_paths else None)
+
+            subtree_paths = self._iter_paths_from([subtree_root], config, discovery_result, on_progress)
+
+            if with_paths:
+                paths[subtree_pos] = [path_indices for _, path_indices in subtree_paths]
+            else:
+                for _ in subtree_paths:
+                    pass
+
+        on_progress(discovery_result, 0)
+
+        return discovery_result, paths
+
+    def _get_possible_paths_top_down_parallel(self, config: PathDiscoveryConfig, workers: int, with_paths: bool) \
+            -> Optional[PathDiscoveryResult]:
+        """
+        Discover the paths in a process pool, each process discovers the paths of the possible next paths of the root.
+
+        The progress is printed in this process.
+
+        Returns ``None`` if the root does not have any possible next paths,
+        which the root itself is the only path and nothing can be parallelized.
+        """
+        # pylint: disable=too-many-locals
+        global _worker_map, _worker_shared  # pylint: disable=global-statement
+
+        discovery_result = PathDiscoveryResult()
+
+        # The root is expanded here; its possible next paths are discovered in the workers
+        root = SimPath.from_single_point(self._start)
+        root_result = root.get_possible_next_paths(config)
+        if not root_result.paths:
+            return None
+
+        discovery_result.update(root_result)
+
+        subtree_indices = self._get_child_indices(root, root_result.paths)
+
+        mp_context = multiprocessing.get_context("fork")
+        # Position of the next subtree to be discovered, and the discovered and pruned counts for the progress
+        next_subtree, progress = mp_context.Value("q", 0), mp_context.Array("q", 2)
+
+        paths_by_subtree: Dict[int, List[Tuple[int, ...]]] = {}
+
+        _worker_map = self
+        _worker_shared = (next_subtree, progress)
+        try:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context) as executor:
+                futures = [executor.submit(_discover_subtrees_in_worker, subtree_indices, config, with_paths)
+                           for _ in range(min(workers, len(subtree_indices)))]
+
+                while not wait(futures, timeout=_PROGRESS_INTERVAL_SECS).done == set(futures):
+                    PathDiscoveryResult(
+                        count_discovered=progress[0], total_pruned=discovery_result.total_pruned + progress[1],
+                        count_frontier=max(len(subtree_indices) - next_subtree.value, 0)
+                    ).print_in_progress()
+
+                for future in futures:
+                    worker_result, worker_paths = future.result()
+
+                    discovery_result.merge(worker_result)
+                    paths_by_subtree.update(worker_paths)
+        finally:
+            _worker_map = None
+            _worker_shared = None
+
+        # Stats of the paths are recorded in the order of the discovery by the workers, not the DFS order,
+        # the paths are rebuilt in the DFS order
+        paths: List[SimPath] = []
+        # (ID of the parent path, index of the next point) -> rebuilt path, to share the prefixes
+        rebuilt: Dict[Tuple[int, int], SimPath] = {}
+
+        for subtree_pos in sorted(paths_by_subtree):
+            for path_indices in paths_by_subtree[subtree_pos]:
+                path = root
+                for idx in path_indices:
+                    if (key := (id(path), idx)) not in rebuilt:
+                        event, point = path.point.next_points[idx]
+                        rebuilt[key] = path.extend(point, event)
+
+                    path = rebuilt[key]
+
+                paths.append(path)
+
+        discovery_result.complete(paths)
+
+        return discovery_result
+
+    def get_possible_paths_top_down(self, /, config: Optional[PathDiscoveryConfig] = None,
+                                    workers: Optional[int] = None, with_paths: bool = True) \
+            -> PathDiscoveryResult:
+        """
+        Get all possible paths of the map.
+
+        Path discovery will be executed top-down, which means that the path discovery starts from the root.
+
+        If ``workers`` is greater than 1, the paths starting from the possible next paths of the root
+        will be discovered in a process pool with ``workers`` processes.
+        The map is shared with the processes by forking, so this falls back to a single process
+        if forking is not available on the platform.
+        The paths and the stats are the same as discovering them in a single process,
+        except that the stats of each path (for example, ``traveled_distances``) may be in a different order.
+
+        If ``with_paths`` is ``False``, only the stats will be returned without the paths attached.
+        This also saves the cost of sending the paths back from the worker processes.
+
+        Advantages:
+
+        - All paths are guaranteed to be found.
+
+        Disadvantages:
+
+        - Expensive.
+
+        - All paths are held in the memory if ``with_paths`` is ``True``.
+          Use ``iter_possible_paths()`` instead if the paths are only used one by one.
+
+        :param config: path discovery config
+        :param workers: count of the processes to discover the paths
+        :param with_paths: if the discovered paths should be attached to the result
+        """
+        if workers and workers > 1 and "fork" in multiprocessing.get_all_start_methods():
+            config = self._get_discovery_config(config)
+
+            if discovery_result := self._get_possible_paths_top_down_parallel(config, workers, with_paths):
+                return discovery_result
+
+        discovery_result = PathDiscoveryResult()
+
+        paths: List[SimPath] = []
+        for path in self.iter_possible_paths(config, discovery_result):
+            if with_paths:
+                paths.append(path)
+
         # Attach paths to the result to be returned
-        discovery_result.complete(ret)
+        discovery_result.complete(paths)
 
         return discovery_result
 
@@ -435,3 +774,9 @@ class SimulationMap:
             Demo image: https://i.imgur.com/gORT9Sy.png
         """
         return DataMetrics([path.displacement for path in paths], name)
+
+
+def _discover_subtrees_in_worker(subtree_indices: List[int], config: PathDiscoveryConfig, with_paths: bool) \
+        -> Tuple[PathDiscoveryResult, Dict[int, List[Tuple[int, ...]]]]:
+    """Discover the paths of the subtrees of the root of the map in the worker process."""
+    return _worker_map._discover_subtrees(subtree_indices, config, with_paths)  # pylint: disable=protected-access
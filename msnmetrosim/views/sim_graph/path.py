@@ -1,7 +1,7 @@
 """Implementations of a simulated path on the map."""
 from collections import Counter
 from dataclasses import dataclass, field
-from typing import List, Optional, Tuple
+from typing import Dict, FrozenSet, Generator, List, Optional, Tuple
 
 from msnmetrosim.utils import distance
 from .config import PathDiscoveryConfig
@@ -11,6 +11,92 @@ from .event_static import StaticPoint, ScheduledStop, StopBase
 __all__ = ("SimPath", "PathDiscoveryResult")
 
 
+class _PathContext:
+    """
+    States shared by the paths extended from the same root.
+
+    This holds the coordinate of the path head and the bits of the stop IDs for the stop ID bitsets.
+    Bits are assigned in the order of appearance to keep the bitsets small.
+    """
+
+    __slots__ = ("head_coord", "_bits")
+
+    def __init__(self, head_coord: Tuple[float, float]):
+        self.head_coord: Tuple[float, float] = head_coord
+        # Stop ID -> bit of the stop
+        self._bits: Dict[int, int] = {}
+
+    def get_stop_bit(self, stop_id: int) -> int:
+        """Get the bit of ``stop_id``. A new bit is assigned if ``stop_id`` does not have one."""
+        if (bit := self._bits.get(stop_id)) is None:
+            bit = self._bits[stop_id] = 1 << len(self._bits)
+
+        return bit
+
+    def has_stop(self, stop_bits: int, stop_id: int) -> bool:
+        """Check if ``stop_id`` is in the bitset ``stop_bits``."""
+        return bool(stop_bits & self._bits.get(stop_id, 0))
+
+
+class _PathSummary:
+    """
+    Stats of a path for checking its extensions.
+
+    The summary of an extended path is derived from the summary of its parent in O(1).
+    Unchanged trip ID sets are shared with the parent.
+    """
+
+    __slots__ = ("context", "traveled_distance", "trip_ids", "stop_bits")
+
+    def __init__(self, context: _PathContext, traveled_distance: float, trip_ids: FrozenSet[int], stop_bits: int):
+        self.context = context
+        self.traveled_distance = traveled_distance
+        self.trip_ids = trip_ids
+        self.stop_bits = stop_bits
+
+    def extend(self, point: StaticPoint, event: Optional[MoveEvent]) -> "_PathSummary":
+        """Get the summary of the path extended to ``point`` via ``event``."""
+        traveled_distance = self.traveled_distance
+        if event and event.traveled_dist:
+            traveled_distance += event.traveled_dist
+
+        trip_ids = self.trip_ids
+        stop_bits = self.stop_bits
+
+        if isinstance(point, StopBase):
+            if point.trip_id not in trip_ids:
+                trip_ids = trip_ids | {point.trip_id}
+
+            if isinstance(point, ScheduledStop):
+                stop_bits |= self.context.get_stop_bit(point.stop_id)
+
+        return _PathSummary(self.context, traveled_distance, trip_ids, stop_bits)
+
+    def has_stop(self, stop_id: int) -> bool:
+        """Check if the scheduled stop of ``stop_id`` is included in the path."""
+        return self.context.has_stop(self.stop_bits, stop_id)
+
+    def get_next_trip_count(self, next_pt: StaticPoint) -> int:
+        """Get the trip count of the path extended to ``next_pt``."""
+        if isinstance(next_pt, StopBase) and next_pt.trip_id not in self.trip_ids:
+            return len(self.trip_ids) + 1
+
+        return len(self.trip_ids)
+
+    def is_next_detouring(self, transition_evt: Optional[MoveEvent], next_pt: StaticPoint) -> bool:
+        """Check if the path extended to ``next_pt`` via ``transition_evt`` is detouring."""
+        traveled_distance = self.traveled_distance
+        if transition_evt and transition_evt.traveled_dist:
+            traveled_distance += transition_evt.traveled_dist
+
+        return traveled_distance > distance(self.context.head_coord, next_pt.coordinate) * 3
+
+    @staticmethod
+    def from_root(point: StaticPoint) -> "_PathSummary":
+        """Get the summary of the path only having ``point``."""
+        return _PathSummary(_PathContext(point.coordinate), 0, frozenset(), 0).extend(point, None)
+
+
 @dataclass
 class PathDiscoveryResult:
     """Result of a path discovery."""
@@ -35,18 +121,36 @@ class SimPath:
     For example, an agent can **walk** from a random :class:`StaticPoint` to a stop as :class:`StaticPoint`.
 
     Check the corresponding documnetations for further details.
+
+    .. note::
+        A path is a node holding the last point, the event transitioned to it and the parent path.
+        These never change once the path is created.
+        Therefore, extending a path is O(1) and the extended paths share the same prefix.
+
+        A path node exists for each point of the discovered paths, so no stats of the path are stored in it.
+        The stats of the path (length, event counts, traveled distance, trip IDs and stop IDs)
+        are obtained by walking through the path upon access.
+
+        For checking the extensions in O(1), the paths returned by ``get_possible_next_paths()``
+        hold a summary of their stats derived from this path, until any extension of their own is returned.
+        Therefore, only the paths not checked yet (for example, the frontier of a discovery)
+        and the paths without any extension (leaves) hold a summary, which also serves their stats.
+        The states shared by the paths of the same root (for example, the head coordinate) are held once by them.
     """
 
-    def __init__(self, pts: List[StaticPoint], events: List[Optional[MoveEvent]]):
-        self._points: List[StaticPoint] = pts
-        self._events: List[Optional[MoveEvent]] = events
+    __slots__ = ("_parent", "_point", "_event", "_summary")
 
-        self._counter_evt = Counter([event.event_type for event in events if event])
+    def __init__(self, point: StaticPoint, event: Optional[MoveEvent] = None, parent: Optional["SimPath"] = None,
+                 summary: Optional[_PathSummary] = None):
+        self._parent: Optional[SimPath] = parent
+        self._point: StaticPoint = point
+        self._event: Optional[MoveEvent] = event
+        self._summary: Optional[_PathSummary] = summary
 
     def __str__(self):
         ret: List[str] = []
 
-        for point, event in zip(self._points, self._events):
+        for point, event in zip(self.points, self.events):
             ret.extend((str(point), str(event)))
 
         return " -> ".join(ret)
@@ -54,6 +158,13 @@ class SimPath:
     def __repr__(self):
         return str(self)
 
+    def __len__(self):
+        return sum(1 for _ in self._iter_reversed())
+
+    def extend(self, point: StaticPoint, event: Optional[MoveEvent]) -> "SimPath":
+        """Get a new path which extends this path to ``point`` via ``event``."""
+        return SimPath(point, event, self)
+
     def get_possible_next_paths(self, config: PathDiscoveryConfig) \
             -> PathDiscoveryResult:
         """
@@ -63,13 +174,18 @@ class SimPath:
         """
         result: PathDiscoveryResult = PathDiscoveryResult()
 
-        last_pt: StaticPoint = self._points[-1]
-        last_evt: MoveEvent = self._events[-1]
+        last_pt: StaticPoint = self._point
+        last_evt: MoveEvent = self._event
+
+        if not last_pt.next_points:
+            return result
+
+        summary = self._get_summary()
 
         for transition_evt, next_pt in last_pt.next_points:
             # Prune non-sense paths
             if config.prune_non_sense:
-                if last_evt:  # Root point does not have previous event
+                if last_evt and transition_evt:  # Root point does not have previous event
                     if transition_evt.event_type == MoveEventType.WAIT and last_evt.event_type == MoveEventType.WAIT:
                         # Waiting at the bus stop twice doesn't make sense
                         result.pruned += 1
@@ -82,52 +198,109 @@ class SimPath:
                         # Walk to the closest stop but then walk to the next closest doesn't make sense
                         result.pruned += 1
                         continue
-                if any(isinstance(pt, ScheduledStop) and pt.is_same_stop(next_pt) for pt in self._points):
+                if isinstance(next_pt, StopBase) and summary.has_stop(next_pt.stop_id):
                     # Same stop appearing twice in the path
                     result.pruned += 1
                     continue
 
-            path = SimPath(self._points + [next_pt], self._events + [transition_evt])
+            # The checks below use the stats of this path, so the next path is created only if it passes
 
             # Max transfer check
-            if 0 <= config.max_transfer < path.trip_count - 1:
+            if 0 <= config.max_transfer < summary.get_next_trip_count(next_pt) - 1:
                 # Beyond the max transfer limit
                 continue
 
             # Detouring path inclusion check
-            if config.with_detoured or not path.detouring:
-                result.add_path(path)
+            if config.with_detoured or not summary.is_next_detouring(transition_evt, next_pt):
+                result.add_path(SimPath(next_pt, transition_evt, self, summary.extend(next_pt, transition_evt)))
+
+        if result.paths:
+            # Only the paths without extensions (leaves) keep the summary for getting their stats
+            self._summary = None
 
         return result
 
+    def _get_summary(self) -> _PathSummary:
+        """Get the summary of this path. If not held, this walks through the whole path."""
+        if self._summary is not None:
+            return self._summary
+
+        paths = list(self._iter_reversed())
+
+        summary = _PathSummary.from_root(paths[-1].point)
+        for path in reversed(paths[:-1]):
+            summary = summary.extend(path.point, path.event)
+
+        return summary
+
+    def _get_root(self) -> "SimPath":
+        path = self
+        while path.parent is not None:
+            path = path.parent
+
+        return path
+
     @property
-    def path_head_coord(self) -> Tuple[float, float]:
-        """
-        Get the coordinate of the point at the path head.
+    def parent(self) -> Optional["SimPath"]:
+        """Get the parent path, which is this path without the last point. ``None`` if this is the root."""
+        return self._parent
 
-        :raises ValueError: if the path is empty
-        """
-        if not self._points:
-            raise ValueError("Path is empty")
+    @property
+    def point(self) -> StaticPoint:
+        """Get the last point of this path."""
+        return self._point
 
-        return self._points[0].coordinate
+    @property
+    def event(self) -> Optional[MoveEvent]:
+        """Get the event transitioned to the last point of this path. ``None`` if this is the root."""
+        return self._event
+
+    def _iter_reversed(self) -> Generator["SimPath", None, None]:
+        path = self
+        while path is not None:
+            yield path
+            path = path.parent
 
     @property
-    def path_tail_coord(self) -> Tuple[float, float]:
+    def points(self) -> List[StaticPoint]:
+        """Get the points of this path in order. This walks through the whole path."""
+        return [path.point for path in self._iter_reversed()][::-1]
+
+    @property
+    def events(self) -> List[Optional[MoveEvent]]:
         """
-        Get the coordinate of the point at the path tail.
+        Get the events of this path in order. This walks through the whole path.
 
-        :raises ValueError: if the path is empty
+        The first event is always ``None`` because it is the starting point.
         """
-        if not self._points:
-            raise ValueError("Path is empty")
+        return [path.event for path in self._iter_reversed()][::-1]
 
-        return self._points[-1].coordinate
+    @property
+    def path_head_coord(self) -> Tuple[float, float]:
+        """Get the coordinate of the point at the path head."""
+        if self._summary is not None:
+            return self._summary.context.head_coord
+
+        return self._get_root().point.coordinate
+
+    @property
+    def path_tail_coord(self) -> Tuple[float, float]:
+        """Get the coordinate of the point at the path tail."""
+        return self._point.coordinate
 
     @property
     def traveled_distance(self) -> float:
-        """Get the total distance traveled in **km**."""
-        return sum(event.traveled_dist for event in self._events if event)
+        """Get the total distance traveled in **km**. This walks through the whole path if no summary is held."""
+        if self._summary is not None:
+            return self._summary.traveled_distance
+
+        traveled_distance = 0
+
+        for event in self.events:
+            if event and event.traveled_dist:
+                traveled_distance += event.traveled_dist
+
+        return traveled_distance
 
     @property
     def displacement(self) -> float:
@@ -145,15 +318,41 @@ class SimPath:
 
     @property
     def event_counter(self) -> Counter:
-        """Get the distribution of the move event of this path."""
-        return self._counter_evt
+        """Get the distribution of the move event of this path. This walks through the whole path."""
+        return Counter([path.event.event_type for path in self._iter_reversed() if path.event])
+
+    @property
+    def trip_ids(self) -> FrozenSet[int]:
+        """Get the IDs of the bus trips included in this path. This walks through the path if no summary is held."""
+        if self._summary is not None:
+            return self._summary.trip_ids
+
+        return frozenset(path.point.trip_id for path in self._iter_reversed() if isinstance(path.point, StopBase))
+
+    @property
+    def stop_ids(self) -> FrozenSet[int]:
+        """Get the IDs of the scheduled stops included in this path. This walks through the whole path."""
+        return frozenset(path.point.stop_id for path in self._iter_reversed()
+                         if isinstance(path.point, ScheduledStop))
+
+    def has_stop(self, stop_id: int) -> bool:
+        """
+        Check if the scheduled stop of ``stop_id`` is included in this path.
+
+        This walks through the path if no summary is held.
+        """
+        if self._summary is not None:
+            return self._summary.has_stop(stop_id)
+
+        return any(isinstance(path.point, ScheduledStop) and path.point.stop_id == stop_id
+                   for path in self._iter_reversed())
 
     @property
     def trip_count(self):
-        """Get the count of bus trips included in this path."""
-        return len(set(pt.trip_id for pt in self._points if isinstance(pt, StopBase)))
+        """Get the count of bus trips included in this path. This walks through the path if no summary is held."""
+        return len(self.trip_ids)
 
     @staticmethod
     def from_single_point(start_pt: StaticPoint) -> "SimPath":
         """Initialize a path from a single starting point."""
-        return SimPath([start_pt], [None])
+        return SimPath(start_pt)
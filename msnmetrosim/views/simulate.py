@@ -1,8 +1,10 @@
 """Main script to construct and run a simulation."""
 from datetime import datetime
 
-from .controllers import ctrl_calendar, ctrl_stops, ctrl_stop_schedule, ctrl_trips
-from .sim_graph import SimulationStaticPoints, StaticPointConfig, SimulationMap, SimulationConfig
+from . import controllers
+from .sim_graph import (
+    SimulationStaticPoints, StaticPointConfig, SimulationMap, SimulationConfig, PathDiscoveryResult
+)
 
 __all__ = ("test_run",)
 
@@ -28,21 +30,25 @@ def test_run():
 
     # Generate static points and the simulation map
     print("Generating the points...")
-    sim_points = SimulationStaticPoints(config_points, ctrl_calendar, ctrl_stops, ctrl_stop_schedule, ctrl_trips)
+    sim_points = SimulationStaticPoints(config_points, controllers.ctrl_calendar, controllers.ctrl_stops,
+                                        controllers.ctrl_stop_schedule, controllers.ctrl_trips)
     print("Generating the map...")
-    sim_map = SimulationMap(config_sim, sim_points, ctrl_stops)
+    sim_map = SimulationMap(config_sim, sim_points, controllers.ctrl_stops)
 
-    # Get the possible paths
+    # Get the possible paths - only the stats are needed, so the paths are not held
     print("Getting possible paths...")
-    possible_paths = sim_map.get_possible_paths_top_down().paths
+    discovery_result = PathDiscoveryResult()
+    for _ in sim_map.iter_possible_paths(discovery_result=discovery_result):
+        pass
 
     print()
-    print(f"The map contains {sim_map.point_count} points. There are {len(possible_paths)} possible paths.")
+    print(f"The map contains {sim_map.point_count} points. "
+          f"There are {discovery_result.count_discovered} possible paths.")
     print()
 
     # Get distance metrics and print it
     name_dist = "Distance traveled for each simulated path"
-    metrics_dist = SimulationMap.distance_metrics(possible_paths, name=name_dist)
+    metrics_dist = discovery_result.distance_metrics(name=name_dist)
     metrics_dist.print_stats()
 
     # ---- > 1 km only
@@ -52,7 +58,7 @@ def test_run():
 
     # Get displacement metrics and print it
     name_disp = "Displacement for each simulated path"
-    metrics_disp = SimulationMap.displacement_metrics(possible_paths, name=name_disp)
+    metrics_disp = discovery_result.displacement_metrics(name=name_disp)
     metrics_disp.print_stats()
 
     # ---- > 1 km only
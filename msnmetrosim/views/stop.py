@@ -2,7 +2,7 @@
 import matplotlib.pyplot as plt
 
 from msnmetrosim.utils import generate_points
-from msnmetrosim.views.controllers import ctrl_stops, ctrl_stops_cross, ctrl_ridership_stop
+from msnmetrosim.views import controllers
 
 __all__ = ("get_stops_without_ridership", "get_distance_to_stop")
 
@@ -11,8 +11,8 @@ def get_stops_without_ridership():
     """Print the stops that do not have ridership data."""
     no_data = []
 
-    for stop in ctrl_stops.all_data:
-        ridership = ctrl_ridership_stop.get_stop_data_by_id(stop.stop_id)
+    for stop in controllers.ctrl_stops.all_data:
+        ridership = controllers.ctrl_ridership_stop.get_stop_data_by_id(stop.stop_id)
         if ridership is None:
             no_data.append(stop)
 
@@ -27,14 +27,16 @@ def get_stops_without_ridership():
 def get_distance_to_stop():
     """Get the travel time to ``target_stop``."""
     # Controllers to traverse
-    target_stop = ctrl_stops_cross.get_grouped_stop_by_street_names("Inwood", "Open Wood")
-    stop_cross_no_target = ctrl_stops_cross.duplicate(lambda data: data.unique_cross_id != target_stop.unique_cross_id)
+    target_stop = controllers.ctrl_stops_cross.get_grouped_stop_by_street_names("Inwood", "Open Wood")
+    stop_cross_no_target = controllers.ctrl_stops_cross.duplicate(
+        lambda data: data.unique_cross_id != target_stop.unique_cross_id
+    )
 
     # Create simulated agents
     sim_agents = generate_points(target_stop.coordinate, 0.5, 0.02)
 
     # Get the distance metrics
-    metrics_original = ctrl_stops_cross.get_distance_metrics_to_closest(sim_agents, name="Original")
+    metrics_original = controllers.ctrl_stops_cross.get_distance_metrics_to_closest(sim_agents, name="Original")
     metrics_after = stop_cross_no_target.get_distance_metrics_to_closest(sim_agents, name="Original")
 
     # ----- Plot histogram
@@ -47,8 +49,8 @@ def get_distance_to_stop():
     plt.title(f"Distance to stop change between before and after removing {target_stop.cross_name}")
 
     # Plot histogram
-    plt.hist(metrics_original.data, bins=20, alpha=0.5, label="Original")
-    plt.hist(metrics_after.data, bins=20, alpha=0.5, label="After")
+    plt.hist(metrics_original.data, weights=metrics_original.weights, bins=20, alpha=0.5, label="Original")
+    plt.hist(metrics_after.data, weights=metrics_after.weights, bins=20, alpha=0.5, label="After")
 
     # Output plot image
     plt.legend(loc="upper right")
@@ -0,0 +1,145 @@
+import os
+
+from datetime import time
+
+import numpy as np
+import pytest
+
+from msnmetrosim.controllers import MMTCalendarController, MMTStopScheduleController, MMTTripDataController
+from msnmetrosim.controllers.base import cache, fromcsv
+
+_TRIPS_CSV = """route_id,route_short_name,service_id,trip_id,trip_headsign,direction_id,direction_name,\
+block_id,shape_id,shape_code,trip_type,trip_sort,wheelchair_accessible,bikes_allowed
+9041,16,92_WKD,1,EAST TRANSFER,0,East Transfer,193133,55293,P16E,D,19620,1,1
+9028,02,92_SAT,2,NORTH TRANSFER,1,North Transfer,194263,55156,2S,W,20100,1,1
+"""
+
+_STOP_TIMES_CSV = """trip_id,stop_sequence,stop_id,pickup_type,drop_off_type,arrival_time,departure_time,\
+timepoint,stop_headsign,shape_dist_traveled
+1,1,100,0,0,05:27:00,05:27:00,1,,0.0
+1,2,101,0,0,05:30:00,05:31:00,0,,0.5
+2,1,101,0,0,05:20:00,05:20:00,1,,0.0
+"""
+
+_CALENDAR_CSV = """service_id,service_name,monday,tuesday,wednesday,thursday,friday,saturday,sunday,\
+start_date,end_date
+92_WKD,Weekday,1,1,1,1,1,0,0,20200901,20200930
+"""
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    ret = str(tmp_path / "cache")
+    monkeypatch.setattr(fromcsv, "DATA_CACHE_DIR", ret)
+
+    return ret
+
+
+def _write_csv(path, content):
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(content)
+
+
+def test_cache_hit(tmp_path, cache_dir):
+    """Test if the data loaded from the cache is the same as the data parsed from the csv file."""
+    csv_path = str(tmp_path / "trips.csv")
+    _write_csv(csv_path, _TRIPS_CSV)
+
+    parsed = MMTTripDataController.load_csv(csv_path)
+    assert os.listdir(cache_dir)
+
+    # Cache should be used even if the csv file is not parsable
+    stat = os.stat(csv_path)
+    _write_csv(csv_path, "x" * len(_TRIPS_CSV))
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    cached = MMTTripDataController.load_csv(csv_path)
+
+    assert cached.all_data == parsed.all_data
+    assert cached.get_trip_ids("92_SAT") == {2}
+
+
+def test_cache_outdated(tmp_path, cache_dir):
+    """Test if the csv file is parsed again after it is modified."""
+    csv_path = str(tmp_path / "trips.csv")
+    _write_csv(csv_path, _TRIPS_CSV)
+    MMTTripDataController.load_csv(csv_path)
+
+    _write_csv(csv_path, _TRIPS_CSV.replace("92_SAT", "92_SUNDAY"))
+
+    assert MMTTripDataController.load_csv(csv_path).get_trip_ids("92_SUNDAY") == {2}
+
+
+def test_cache_unsupported(tmp_path, cache_dir):
+    """Test if the data which cannot be cached is still loaded."""
+    csv_path = str(tmp_path / "calendar.csv")
+    _write_csv(csv_path, _CALENDAR_CSV)
+
+    # ``running_dates`` is a list, which cannot be cached
+    assert len(MMTCalendarController.load_csv(csv_path).all_data) == 1
+    assert not os.path.exists(cache_dir) or not os.listdir(cache_dir)
+
+
+def test_cache_disabled(tmp_path, cache_dir):
+    """Test if the cache is not used if disabled."""
+    csv_path = str(tmp_path / "trips.csv")
+    _write_csv(csv_path, _TRIPS_CSV)
+
+    MMTTripDataController.load_csv(csv_path, use_cache=False)
+
+    assert not os.path.exists(cache_dir)
+
+
+def test_cache_parser_changed(tmp_path, cache_dir, monkeypatch):
+    """Test if the cache is discarded after the source code of the parser or the data entry class is changed."""
+    csv_path = str(tmp_path / "trips.csv")
+    _write_csv(csv_path, _TRIPS_CSV)
+    MMTTripDataController.load_csv(csv_path)
+
+    options = {"delimiter": ",", "has_header": True}
+    assert cache.load_cached_entries(cache_dir, csv_path, MMTTripDataController.on_row_read, options)
+
+    monkeypatch.setattr(cache, "_get_source_hash", lambda obj: "changed")
+
+    assert cache.load_cached_entries(cache_dir, csv_path, MMTTripDataController.on_row_read, options) is None
+
+
+def test_cache_columns(tmp_path, cache_dir):
+    """Test if the columns of the stop schedules are cached and memory-mapped without creating the entries."""
+    csv_path = str(tmp_path / "stop_times.csv")
+    _write_csv(csv_path, _STOP_TIMES_CSV)
+
+    parsed = MMTStopScheduleController.load_csv(csv_path)
+
+    stat = os.stat(csv_path)
+    _write_csv(csv_path, "x" * len(_STOP_TIMES_CSV))
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    cached = MMTStopScheduleController.load_csv(csv_path)
+
+    assert isinstance(cached._columns["trip_id"], np.memmap)
+    assert isinstance(cached._col_arrival, np.memmap)
+    assert cached._data is None
+
+    assert cached.get_stop_schedules_of_trip(1) == parsed.get_stop_schedules_of_trip(1)
+    assert [(data.trip_id, data.stop_sequence) for data in cached.get_stop_schedules_by_arrival(time(5), time(6))] \
+           == [(2, 1), (1, 1), (1, 2)]
+    assert cached.all_data == parsed.all_data
+
+
+def test_cache_columns_changed(tmp_path, cache_dir):
+    """Test if the cached columns are discarded if the requested columns are changed."""
+    csv_path = str(tmp_path / "stop_times.csv")
+    _write_csv(csv_path, _STOP_TIMES_CSV)
+
+    columns = {"trip_id": np.array([1, 2], dtype=np.int64), "arrival": np.array([0.5, 1.5])}
+    options = {"delimiter": ","}
+    assert cache.save_cached_columns(cache_dir, csv_path, MMTStopScheduleController.on_row_read, options, columns)
+
+    loaded = cache.load_cached_columns(cache_dir, csv_path, MMTStopScheduleController.on_row_read, options,
+                                       {"trip_id": np.int64, "arrival": np.float64})
+    assert loaded["arrival"].tolist() == [0.5, 1.5]
+
+    for dtypes in ({"trip_id": np.int64}, {"trip_id": np.int64, "arrival": np.int64}):
+        assert cache.load_cached_columns(cache_dir, csv_path, MMTStopScheduleController.on_row_read, options,
+                                         dtypes) is None
@@ -0,0 +1,88 @@
+from msnmetrosim.controllers import MMTStopDataController, MMTStopScheduleController, MMTTripDataController
+
+_TRIPS_CSV = """route_id,route_short_name,service_id,trip_id,trip_headsign,direction_id,direction_name,\
+block_id,shape_id,shape_code,trip_type,trip_sort,wheelchair_accessible,bikes_allowed
+9041,16,92_WKD,1,EAST TRANSFER,0,East Transfer,193133,55293,P16E,D,19620,1,1
+9028,02,92_SAT,2,NORTH TRANSFER,1,North Transfer,194263,55156,2S,W,20100,1,1
+9028,02,92_WKD,3,NORTH TRANSFER,1,North Transfer,194263,55156,2S,W,20700,1,1
+"""
+
+_STOP_TIMES_CSV = """trip_id,stop_sequence,stop_id,pickup_type,drop_off_type,arrival_time,departure_time,\
+timepoint,stop_headsign,shape_dist_traveled
+1,1,100,0,0,05:27:00,05:27:00,1,,0.0
+1,2,101,0,0,05:30:00,05:30:00,0,,0.5
+2,1,101,0,0,05:35:00,05:35:00,1,,0.0
+3,1,102,0,0,24:10:00,24:10:00,1,,0.0
+"""
+
+_STOPS_CSV = """stop_id,stop_code,stop_name,stop_desc,stop_lat,stop_lon,agency_id,jurisdiction_id,location_type,\
+parent_station,relative_position,cardinal_direction,wheelchair_boarding,primary_street,address_range,cross_location
+100,0100,A & B (EB),,43.07,-89.40,MMT,CMAD,0,,3,90,1,A,100,B
+101,0101,A & C (EB),,43.08,-89.38,MMT,CMAD,0,,3,90,1,A,200,C
+102,0102,D & E (NB),,43.20,-89.38,MMT,CMAD,0,,3,90,0,D,300,E
+"""
+
+
+def _write_csv(tmp_path, name, content):
+    path = str(tmp_path / name)
+
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(content)
+
+    return path
+
+
+def test_iter_chunks(tmp_path):
+    """Test if the csv file is parsed in chunks of the given size."""
+    csv_path = _write_csv(tmp_path, "trips.csv", _TRIPS_CSV)
+
+    chunks = list(MMTTripDataController.iter_csv_chunks(csv_path, chunk_size=2))
+
+    assert [[trip.trip_id for trip in chunk] for chunk in chunks] == [[1, 2], [3]]
+
+
+def test_filter_services(tmp_path):
+    """Test if only the trips of the given services are loaded."""
+    csv_path = _write_csv(tmp_path, "trips.csv", _TRIPS_CSV)
+
+    ctrl = MMTTripDataController.load_csv(
+        csv_path, row_filter=MMTTripDataController.get_services_row_filter(["92_WKD"])
+    )
+
+    assert [trip.trip_id for trip in ctrl.all_data] == [1, 3]
+
+
+def test_filter_trips(tmp_path):
+    """Test if only the stop schedules of the given trips are loaded."""
+    csv_path = _write_csv(tmp_path, "stop_times.csv", _STOP_TIMES_CSV)
+
+    ctrl = MMTStopScheduleController.load_csv(
+        csv_path, row_filter=MMTStopScheduleController.get_trips_row_filter([1, 3])
+    )
+
+    assert [(data.trip_id, data.stop_sequence) for data in ctrl.all_data] == [(1, 1), (1, 2), (3, 1)]
+
+
+def test_filter_bbox(tmp_path):
+    """Test if only the stops in the bounding box are loaded."""
+    csv_path = _write_csv(tmp_path, "stops.csv", _STOPS_CSV)
+
+    ctrl = MMTStopDataController.load_csv(
+        csv_path, row_filter=MMTStopDataController.get_bbox_row_filter((43.0, 43.1), (-89.39, -89.3))
+    )
+
+    assert [stop.stop_id for stop in ctrl.all_data] == [101]
+
+
+def test_stop_schedules_from_chunks(tmp_path):
+    """Test if the stop schedules consumed chunk by chunk are the same as the parsed stop schedules."""
+    csv_path = _write_csv(tmp_path, "stop_times.csv", _STOP_TIMES_CSV)
+
+    parsed = [data for chunk in MMTStopScheduleController.iter_csv_chunks(csv_path) for data in chunk]
+    ctrl = MMTStopScheduleController.from_chunks(MMTStopScheduleController.iter_csv_chunks(csv_path, chunk_size=1))
+
+    # Stop schedules are not created until requested
+    assert ctrl._data is None
+    assert ctrl.get_stop_schedules_of_trip(1) == parsed[:2]
+    assert not ctrl.get_stop_schedules_of_trip(4)
+    assert ctrl.all_data == parsed
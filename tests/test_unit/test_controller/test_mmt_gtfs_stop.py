@@ -1,3 +1,6 @@
+import numpy as np
+import pytest
+
 from msnmetrosim.controllers import MMTStopDataController
 from msnmetrosim.utils import time_function
 
@@ -11,8 +14,8 @@ def test_closest_stop():
     assert closest_stop.data.stop_id == 7811
 
     closest_stop = mmt_stop_controller.find_closest_stop(43.006027, -89.524661)
-    assert abs(1.5473440806767247 - closest_stop.distance) < 0.003
-    assert closest_stop.data.stop_id == 8379
+    assert abs(1.3956774235099787 - closest_stop.distance) < 0.003
+    assert closest_stop.data.stop_id == 4838
 
     closest_stop = mmt_stop_controller.find_closest_stop(43.084163, -89.324808)
     assert abs(0.019202918428765734 - closest_stop.distance) < 0.003
@@ -44,3 +47,53 @@ def test_closest_stop_performance(performance_tolerance):
     result = time_function(mmt_stop_controller.find_closest_stop, 43.073746, -89.406702, count=1000)
     # Expected to be 90~130 ms
     assert result.execution_ms < 220 * performance_tolerance
+
+
+def test_data_order_by_dist():
+    """Test if the data are returned in the order of the distance, including the points far from the stops."""
+    for lat, lon in [(43.086601, -89.208467), (43.073746, -89.406702), (40.0, -80.0)]:
+        expected = sorted(stop.distance(lat, lon) for stop in mmt_stop_controller.all_data)
+        actual = [data.distance for data in mmt_stop_controller.find_data_order_by_dist(lat, lon)]
+
+        assert actual == expected
+
+
+def test_data_within_range():
+    """Test if the data inside the search box can be acquired."""
+    lat, lon, search_range = 43.073746, -89.406702, 0.01
+
+    expected = [stop for stop in mmt_stop_controller.all_data
+                if lat - search_range <= stop.lat <= lat + search_range
+                and lon - search_range <= stop.lon <= lon + search_range]
+
+    assert mmt_stop_controller.get_data_within_range(lat, lon, search_range) == expected
+
+
+def test_closest_stop_batch():
+    """Test if the closest stops of multiple locations can be acquired at once."""
+    coords = np.array([(43.086601, -89.208467), (43.006027, -89.524661),
+                       (43.084163, -89.324808), (43.073746, -89.406702)])
+
+    indices, distances = mmt_stop_controller.find_closest_data_batch(coords, chunk_size=3)
+
+    for coord, idx, dist in zip(coords, indices, distances):
+        closest_stop = mmt_stop_controller.find_closest_stop(*coord)
+
+        assert mmt_stop_controller.all_data[idx] is closest_stop.data
+        assert dist == pytest.approx(closest_stop.distance)
+
+
+def test_walk_graph():
+    """Test if the walk graph contains the stops within the walking distance ordered by the distance."""
+    walk_graph = mmt_stop_controller.get_walk_graph(0.5, 4.2)
+
+    assert mmt_stop_controller.get_walk_graph(0.5, 4.2) is walk_graph
+    assert len(walk_graph) == len(mmt_stop_controller.all_data)
+
+    for stop in mmt_stop_controller.all_data[:50]:
+        expected = [close_data.data for close_data in mmt_stop_controller.find_data_order_by_dist(*stop.coordinate)
+                    if 0 < close_data.distance <= 0.5]
+        neighbors = walk_graph[stop.stop_id]
+
+        assert [neighbor.stop for neighbor in neighbors] == expected
+        assert all(neighbor.walk_time == pytest.approx(neighbor.distance / 4.2 * 3600) for neighbor in neighbors)
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from msnmetrosim.controllers import MMTStopDataController, MMTStopsAtCrossDataController
+from msnmetrosim.utils import generate_points
+
+_stops = MMTStopDataController.load_csv("mmt_gtfs/stops.csv")
+_stops_cross = MMTStopsAtCrossDataController.from_stop_controller(_stops)
+
+
+def test_single_stop_removal_incremental():
+    """Test if the incremental stop removal yields the same result as the recalculated one."""
+    for stop in _stops_cross.all_data[:20]:
+        agents = generate_points(stop.coordinate, 0.5, 0.1)
+        weights = [idx % 3 for idx in range(len(agents))]
+
+        expected = _stops_cross.get_metrics_of_single_stop_removal(
+            stop.primary, stop.secondary, agents, weights, incremental=False)
+        actual = _stops_cross.get_metrics_of_single_stop_removal(
+            stop.primary, stop.secondary, agents, weights, incremental=True)
+
+        assert actual.stop_removed is expected.stop_removed
+
+        for metrics_actual, metrics_expected in ((actual.metrics_before, expected.metrics_before),
+                                                 (actual.metrics_after, expected.metrics_after)):
+            assert metrics_actual.name == metrics_expected.name
+            assert metrics_actual.data == pytest.approx(metrics_expected.data)
+            assert metrics_actual.weights == pytest.approx(metrics_expected.weights)
+
+
+def test_all_stop_removal_parallel():
+    """Test if the stop removal results evaluated in multiple processes are the same and in the same order."""
+    cross_ids = {stop.unique_cross_id for stop in _stops_cross.all_data[:50]}
+    stops_cross = _stops_cross.duplicate(lambda data: data.unique_cross_id in cross_ids)
+
+    expected = stops_cross.get_all_stop_remove_results(0.5, 0.1)
+    actual = stops_cross.get_all_stop_remove_results(0.5, 0.1, workers=2)
+
+    assert len(actual) == len(expected)
+
+    for result_actual, result_expected in zip(actual, expected):
+        assert result_actual.stop_removed is result_expected.stop_removed
+        assert np.array_equal(result_actual.metrics_before.data, result_expected.metrics_before.data)
+        assert np.array_equal(result_actual.metrics_after.data, result_expected.metrics_after.data)
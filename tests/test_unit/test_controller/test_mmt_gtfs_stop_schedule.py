@@ -0,0 +1,109 @@
+from datetime import datetime, time
+
+import pytest
+
+from msnmetrosim.controllers import MMTStopScheduleController, MMTTripDataController
+from msnmetrosim.controllers.trip import ServiceIdNotFoundError
+from msnmetrosim.models import MMTStopSchedule, MMTTrip, MMTTripType
+from msnmetrosim.utils import time_to_seconds
+
+
+def _stop_schedule(trip_id: int, stop_sequence: int, stop_id: int, arrival: time, day_offset: int = 0) \
+        -> MMTStopSchedule:
+    # Stop schedules after midnight are later than 24:00 as in GTFS
+    arrival_secs = time_to_seconds(arrival) + day_offset * 86400
+
+    return MMTStopSchedule(trip_id, stop_sequence, stop_id, arrival_secs, arrival_secs, False, stop_sequence * 0.5)
+
+
+# Sorted by the trip ID first, then the stop sequence, same as ``stop_times.csv``
+stop_schedule_controller = MMTStopScheduleController([
+    _stop_schedule(1, 1, 100, time(15, 50)),
+    _stop_schedule(1, 2, 101, time(16, 5)),
+    _stop_schedule(1, 3, 102, time(16, 20)),
+    _stop_schedule(2, 1, 101, time(15, 55)),
+    _stop_schedule(2, 2, 103, time(16, 1)),
+    _stop_schedule(3, 1, 104, time(23, 50)),
+    _stop_schedule(3, 2, 105, time(0, 10), day_offset=1),
+])
+
+
+def _trip(trip_id: int, service_id: str) -> MMTTrip:
+    return MMTTrip(1, "1", service_id, trip_id, "", 0, "", 0, 0, "", MMTTripType.WEEKDAY, 0)
+
+
+trip_controller = MMTTripDataController([_trip(1, "WKD"), _trip(2, "SAT"), _trip(3, "WKD")])
+stop_schedule_controller.index_services(trip_controller)
+
+
+def test_by_arrival_all_trips():
+    """Test if the stop schedules of all trips are returned if not filtered."""
+    result = stop_schedule_controller.get_stop_schedules_by_arrival(time(16), time(16, 59, 59))
+
+    assert [(data.trip_id, data.stop_sequence) for data in result] == [(2, 2), (1, 2), (1, 3)]
+
+
+def test_by_arrival_service_ids():
+    """Test if the stop schedules can be filtered by the service IDs."""
+    result = stop_schedule_controller.get_stop_schedules_by_arrival(time(15), time(23, 59, 59), service_ids=["WKD"])
+    assert [(data.trip_id, data.stop_sequence) for data in result] == [(1, 1), (1, 2), (1, 3), (3, 1)]
+
+    result = stop_schedule_controller.get_stop_schedules_by_arrival(time(15), time(23, 59, 59),
+                                                                    trip_ids=[1, 2], service_ids=["SAT", "WKD"])
+    assert [(data.trip_id, data.stop_sequence) for data in result] == [(1, 1), (2, 1), (2, 2), (1, 2), (1, 3)]
+
+    result = stop_schedule_controller.get_stop_schedule_sim_by_arrival(datetime(2020, 9, 2, 23), 7200,
+                                                                       service_ids=["WKD"])
+    assert [(data.trip_id, data.stop_sequence) for data in result] == [(3, 1), (3, 2)]
+
+    with pytest.raises(ServiceIdNotFoundError):
+        stop_schedule_controller.get_stop_schedules_by_arrival(time(15), time(16), service_ids=["SUN"])
+
+
+def test_sim_by_arrival_window():
+    """Test if the stop schedules arriving in the time window are returned in the order of the arrival time."""
+    result = stop_schedule_controller.get_stop_schedule_sim_by_arrival(datetime(2020, 9, 2, 15, 55), 900)
+
+    assert [(data.trip_id, data.stop_sequence) for data in result] == [(2, 1), (2, 2), (1, 2)]
+    assert [data.arrival_time for data in result] == [
+        datetime(2020, 9, 2, 15, 55), datetime(2020, 9, 2, 16, 1), datetime(2020, 9, 2, 16, 5)
+    ]
+
+
+def test_sim_by_arrival_trip_ids():
+    """Test if only the stop schedules of the given trips are returned."""
+    result = stop_schedule_controller.get_stop_schedule_sim_by_arrival(datetime(2020, 9, 2, 15), 7200, trip_ids={1})
+
+    assert [(data.trip_id, data.stop_sequence) for data in result] == [(1, 1), (1, 2), (1, 3)]
+
+    assert not stop_schedule_controller.get_stop_schedule_sim_by_arrival(datetime(2020, 9, 2, 15), 7200, trip_ids=[])
+
+
+def test_sim_by_arrival_next_stop():
+    """Test if the next stop of the returned stop schedules is linked."""
+    result = stop_schedule_controller.get_stop_schedule_sim_by_arrival(datetime(2020, 9, 2, 15, 45), 1500)
+
+    first, second = [data for data in result if data.trip_id == 1]
+
+    assert first.next_stop is second
+    # Next stop out of the window
+    assert second.next_stop.stop_sequence == 3
+    assert second.next_stop.arrival_time == datetime(2020, 9, 2, 16, 20)
+
+
+def test_sim_by_arrival_cross_day():
+    """Test if the stop schedules arriving after midnight are dated on the next day."""
+    result = stop_schedule_controller.get_stop_schedule_sim_by_arrival(datetime(2020, 9, 2, 23, 30), 3600)
+
+    assert [(data.trip_id, data.stop_sequence) for data in result] == [(3, 1), (3, 2)]
+    assert result[0].arrival_time == datetime(2020, 9, 2, 23, 50)
+    assert result[1].arrival_time == datetime(2020, 9, 3, 0, 10)
+    assert result[0].next_stop is result[1]
+
+
+def test_parse_after_midnight():
+    """Test if the stop schedule after midnight is parsed as the seconds since the start of the service day."""
+    data = MMTStopSchedule.parse_from_row(["3", "2", "105", "0", "0", "24:10:00", "24:11:30", "1", "", "1.5"])
+
+    assert (data.arrival_secs, data.departure_secs) == (87000, 87090)
+    assert (data.arrival_time, data.departure_time) == (time(0, 10), time(0, 11, 30))
@@ -1,4 +1,7 @@
-from msnmetrosim.utils import distance, offset, time_function, generate_points
+import numpy as np
+import pytest
+
+from msnmetrosim.utils import distance, distance_array, offset, time_function, generate_points
 
 
 def test_offset_performance(performance_tolerance):
@@ -19,6 +22,20 @@ def test_distance_performance(performance_tolerance):
     assert isinstance(returned_dist, float)
 
 
+def test_distance_array():
+    coords = np.array([(43.084163, -89.324808), (43.073746, -89.406702), (43.006027, -89.524661)])
+
+    result = distance_array((43.086601, -89.208467), coords)
+    assert result.shape == (3,)
+    for coord, dist in zip(coords, result):
+        assert dist == pytest.approx(distance((43.086601, -89.208467), coord))
+
+    result = distance_array(coords[:, np.newaxis, :], coords[np.newaxis, :, :])
+    assert result.shape == (3, 3)
+    assert result[0, 1] == pytest.approx(distance(coords[0], coords[1]))
+    assert result[2, 2] == pytest.approx(0)
+
+
 def test_points_in_range():
     result = time_function(generate_points, (43.084163, -89.324808), 2.0, 0.1)
     assert len(result.return_) == 1681
@@ -0,0 +1,73 @@
+from statistics import fmean, median, quantiles
+
+import pytest
+
+from msnmetrosim.utils import DataMetrics
+
+_data = [3.2, 0.5, 1.7, 4.4, 2.9, 0.8, 3.3]
+_weights = [2, 0, 5, 1, 3, 4, 2]
+_data_expanded = [data for data, weight in zip(_data, _weights) for _ in range(weight)]
+
+
+def test_metrics():
+    metrics = DataMetrics(_data)
+
+    assert metrics.average == fmean(_data)
+    assert metrics.median == median(_data)
+    assert metrics.minimum == min(_data)
+    assert metrics.maximum == max(_data)
+    assert metrics.get_quantile(4) == quantiles(_data, n=4)
+    assert metrics.get_quantile(10) == quantiles(_data, n=10)
+
+
+def test_metrics_weighted():
+    metrics = DataMetrics(_data, weights=_weights)
+
+    assert metrics.count == len(_data_expanded)
+    assert metrics.average == pytest.approx(fmean(_data_expanded))
+    assert metrics.median == median(_data_expanded)
+    assert metrics.minimum == min(_data_expanded)
+    assert metrics.maximum == max(_data_expanded)
+    assert metrics.get_quantile(4) == quantiles(_data_expanded, n=4)
+    assert metrics.get_quantile(10) == quantiles(_data_expanded, n=10)
+
+
+def test_metrics_weighted_filtered():
+    metrics = DataMetrics(_data, weights=_weights).filtered(lambda data: data > 1)
+    expected = [data for data in _data_expanded if data > 1]
+
+    assert metrics.count == len(expected)
+    assert metrics.median == median(expected)
+    assert metrics.get_quantile(4) == quantiles(expected, n=4)
+
+
+def test_metrics_weights_length_mismatch():
+    with pytest.raises(ValueError):
+        DataMetrics(_data, weights=_weights[:-1])
+
+
+def test_metrics_data_kept():
+    metrics = DataMetrics(_data, weights=_weights)
+
+    assert metrics.data is _data
+    assert metrics.weights is _weights
+    assert metrics.minimum == min(data for data, weight in zip(_data, _weights) if weight > 0)
+
+    filtered = metrics.filtered(lambda data: data > 1)
+
+    assert filtered.data == [3.2, 1.7, 4.4, 2.9, 3.3]
+    assert filtered.weights == [2, 5, 1, 3, 2]
+
+
+def test_metrics_eq():
+    metrics = DataMetrics(_data, weights=_weights)
+
+    assert metrics == metrics
+    assert metrics != DataMetrics(_data, weights=_weights)
+
+
+def test_metrics_cut_points():
+    metrics = DataMetrics(_data, weights=_weights)
+
+    assert metrics.cut_points == quantiles(_data_expanded, n=10)
+    assert metrics.cut_points is metrics.cut_points
@@ -0,0 +1,123 @@
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from msnmetrosim.controllers import MMTRouteDataController, MMTStopDataController, MMTTripDataController
+from msnmetrosim.views import controllers
+
+_TEST_NAME = "ctrl_test"
+
+
+@pytest.fixture
+def load_counter(monkeypatch):
+    counter = {"count": 0}
+
+    def loader():
+        time.sleep(0.05)  # Leave the time for the other threads to access at the same time
+        counter["count"] += 1
+
+        return object()
+
+    monkeypatch.setitem(controllers._loaders, _TEST_NAME, loader)
+    monkeypatch.setitem(controllers._locks, _TEST_NAME, threading.Lock())
+
+    yield counter
+
+    vars(controllers).pop(_TEST_NAME, None)
+
+
+_ROUTES_CSV = """route_id,service_id,agency_id,route_short_name,route_long_name,route_service_name,route_desc,\
+route_type,route_url,route_color,route_text_color,bikes_allowed
+9027,92,MMT,01,,OLD UNIV:CAP SQR,,3,,E3D23E,000000,1
+"""
+
+_STOPS_CSV = """stop_id,stop_code,stop_name,stop_desc,stop_lat,stop_lon,agency_id,jurisdiction_id,location_type,\
+parent_station,relative_position,cardinal_direction,wheelchair_boarding,primary_street,address_range,cross_location
+100,0100,A & B (EB),,43.07,-89.40,MMT,CMAD,0,,3,90,1,A,100,B
+101,0101,A & B (WB),,43.07,-89.41,MMT,CMAD,0,,3,270,1,A,100,B
+"""
+
+
+@pytest.fixture
+def empty_registry():
+    """Unload all controllers during the test and restore them afterwards."""
+    loaded = {name: vars(controllers).pop(name) for name in controllers._loaders if name in vars(controllers)}
+
+    yield
+
+    for name in controllers._loaders:
+        vars(controllers).pop(name, None)
+
+    vars(controllers).update(loaded)
+
+
+def _write_csv(tmp_path, name, content):
+    path = str(tmp_path / name)
+
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(content)
+
+    return path
+
+
+def test_load_all(tmp_path, monkeypatch, empty_registry):
+    """Test if loading all controllers sequentially fills the registry and skips the missing files."""
+    monkeypatch.setattr(controllers, "_csv_sources", {
+        "ctrl_routes": (MMTRouteDataController, _write_csv(tmp_path, "routes.csv", _ROUTES_CSV)),
+        "ctrl_stops": (MMTStopDataController, _write_csv(tmp_path, "stops.csv", _STOPS_CSV)),
+        "ctrl_trips": (MMTTripDataController, str(tmp_path / "missing.csv")),
+    })
+
+    loaded = controllers.load_all(parallel=False)
+
+    assert set(loaded) == {"ctrl_routes", "ctrl_stops", "ctrl_stops_cross"}
+    assert all(vars(controllers)[name] is ctrl for name, ctrl in loaded.items())
+    assert len(controllers.ctrl_stops.all_data) == 2
+    assert len(controllers.ctrl_stops_cross.all_data) == 1
+    assert "ctrl_trips" not in vars(controllers)
+
+
+def test_import_not_loading():
+    """Test if importing the module loads no controller."""
+    code = "from msnmetrosim.views import controllers; " \
+           "print([name for name in controllers._loaders if name in vars(controllers)])"
+
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, check=True, text=True)
+
+    assert result.stdout.strip() == "[]"
+
+
+def test_load_once(load_counter):
+    """Test if the controller is only loaded once even if accessed by multiple threads at the same time."""
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(getattr(controllers, _TEST_NAME))) for _ in range(8)]
+
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert load_counter["count"] == 1
+    assert all(result is results[0] for result in results)
+    # Later accesses do not call ``__getattr__()``
+    assert vars(controllers)[_TEST_NAME] is results[0]
+
+
+def test_prewarm(load_counter):
+    """Test if the controllers are loaded in the background by prewarming."""
+    futures = controllers.prewarm([_TEST_NAME])
+
+    assert futures[0].result() is getattr(controllers, _TEST_NAME)
+    assert load_counter["count"] == 1
+
+
+def test_unknown_name():
+    """Test if accessing an unknown name raises :class:`AttributeError`."""
+    with pytest.raises(AttributeError):
+        _ = controllers.ctrl_unknown
+
+    with pytest.raises(AttributeError):
+        controllers.prewarm(["ctrl_unknown"])
@@ -0,0 +1,131 @@
+from datetime import date, datetime, time
+
+import numpy as np
+import pytest
+
+from msnmetrosim.controllers import (
+    MMTCalendarController, MMTStopDataController, MMTStopScheduleController, MMTTripDataController
+)
+from msnmetrosim.models import MMTCalendar, MMTStop, MMTStopSchedule, MMTTrip, MMTTripType
+from msnmetrosim.utils import distance_array, time_to_seconds
+from msnmetrosim.views.sim_arrival import ArrivalProfile, ServiceTimetable, get_earliest_arrivals, get_isochrone
+from msnmetrosim.views.sim_graph import SimulationConfig, StaticPointConfig
+
+_SERVICE_DATE = date(2020, 9, 2)
+
+_KM_PER_LAT = 111.195
+
+
+def _coord(km_north: float):
+    """Get the coordinate ``km_north`` km to the north of the origin of the synthetic network."""
+    return 43.0 + km_north / _KM_PER_LAT, -89.4
+
+
+def _stop(stop_id: int, km_north: float) -> MMTStop:
+    return MMTStop(*_coord(km_north), "A", "B", stop_id, str(stop_id), f"Stop {stop_id}", True)
+
+
+def _stop_schedule(trip_id: int, stop_sequence: int, stop_id: int, arrival: time, day_offset: int = 0) \
+        -> MMTStopSchedule:
+    arrival_secs = time_to_seconds(arrival) + day_offset * 86400
+
+    return MMTStopSchedule(trip_id, stop_sequence, stop_id, arrival_secs, arrival_secs, False, stop_sequence * 0.5)
+
+
+def _trip(trip_id: int) -> MMTTrip:
+    return MMTTrip(trip_id, str(trip_id), "WKD", trip_id, "", 0, "", 0, 0, "", MMTTripType.WEEKDAY, 0)
+
+
+# Stops along a straight line to the north
+#
+# - Trip 1 goes from stop 1 to stop 2
+# - Stop 3 is 0.2 km from stop 2, agents transfer by walking to it
+# - Trip 2 goes from stop 3 to stop 4
+# - Trip 3 goes from stop 4 to stop 5 after midnight
+timetable = ServiceTimetable(
+    _SERVICE_DATE,
+    MMTCalendarController([MMTCalendar("WKD", "Weekday", [_SERVICE_DATE], _SERVICE_DATE, _SERVICE_DATE)]),
+    MMTStopDataController([_stop(1, 0.1), _stop(2, 2), _stop(3, 2.2), _stop(4, 5), _stop(5, 12)]),
+    MMTStopScheduleController([
+        _stop_schedule(1, 1, 1, time(8)),
+        _stop_schedule(1, 2, 2, time(8, 10)),
+        _stop_schedule(2, 1, 3, time(8, 15)),
+        _stop_schedule(2, 2, 4, time(8, 30)),
+        _stop_schedule(3, 1, 4, time(23, 50)),
+        _stop_schedule(3, 2, 5, time(0, 10), day_offset=1),
+    ]),
+    MMTTripDataController([_trip(1), _trip(2), _trip(3)])
+)
+
+
+def _get_config(km_north: float = 0, max_transfer: int = -1) -> SimulationConfig:
+    return SimulationConfig(_coord(km_north), max_transfer=max_transfer, max_walk_distance=0.3)
+
+
+def test_raptor_transfer():
+    """Test if the stops are reached by transferring to another trip after walking."""
+    start_dt = datetime(2020, 9, 2, 7, 55)
+
+    result = get_earliest_arrivals(timetable, _get_config(), StaticPointConfig(start_dt, 3600))
+
+    assert result.get_arrival_dt(2) == datetime(2020, 9, 2, 8, 10)
+    assert result.get_arrival_dt(4) == datetime(2020, 9, 2, 8, 30)
+    assert [result.get_trip_count(stop_id) for stop_id in (1, 2, 3, 4, 5)] == [0, 1, 1, 2, -1]
+    assert result.get_travel_time(3) == pytest.approx(900 + 0.2 / 4.2 * 3600, rel=1e-3)
+    assert result.get_reachable_stop_ids() == [1, 2, 3, 4]
+
+
+def test_raptor_after_midnight():
+    """Test if the trip running across midnight is taken."""
+    start_dt = datetime(2020, 9, 2, 23, 40)
+
+    result = get_earliest_arrivals(timetable, _get_config(km_north=4.9), StaticPointConfig(start_dt, 3600))
+
+    assert result.get_arrival_dt(5) == datetime(2020, 9, 3, 0, 10)
+    assert result.get_trip_count(5) == 1
+
+
+def test_raptor_max_transfer():
+    """Test if the trip count is limited by the max transfer."""
+    start_dt = datetime(2020, 9, 2, 7, 55)
+
+    result = get_earliest_arrivals(timetable, _get_config(max_transfer=0), StaticPointConfig(start_dt, 3600))
+
+    assert result.get_reachable_stop_ids() == [1, 2, 3]
+    assert np.isinf(result.get_travel_time(4))
+    assert result.get_trip_count(4) == -1
+
+
+@pytest.mark.parametrize("max_transfer", [0, 1, -1])
+def test_csa_same_as_raptor(max_transfer):
+    """Test if the earliest arrivals of the arrival profile are the same as RAPTOR for each trip count limit."""
+    config = _get_config(max_transfer=max_transfer)
+    config_points = StaticPointConfig(datetime(2020, 9, 2, 7, 50), 3600)
+    profile = ArrivalProfile(timetable, config, config_points, datetime(2020, 9, 2, 8, 5))
+
+    for start_dt in (datetime(2020, 9, 2, 7, 50), datetime(2020, 9, 2, 7, 58), datetime(2020, 9, 2, 8, 5)):
+        expected = get_earliest_arrivals(timetable, config, StaticPointConfig(start_dt, 3600))
+        actual = profile.get_earliest_arrivals(start_dt)
+
+        np.testing.assert_allclose(actual.travel_times, expected.travel_times)
+        np.testing.assert_array_equal(actual.trip_counts, expected.trip_counts)
+        np.testing.assert_allclose(actual.bus_travel_times, expected.bus_travel_times)
+
+
+def test_isochrone_egress_after_bus():
+    """Test if agents only walk to the points from the starting location or the stops where a bus is alighted."""
+    config = _get_config(km_north=-0.15)
+    result = get_earliest_arrivals(timetable, config, StaticPointConfig(datetime(2020, 9, 2, 7, 55), 3600))
+
+    assert np.isinf(result.bus_travel_times[timetable.get_stop_idx(1)])
+    assert result.bus_travel_times[timetable.get_stop_idx(2)] == 900
+
+    isochrone = get_isochrone(timetable, result, config, 2.2, 0.2)
+
+    def get_travel_time(km_north: float) -> float:
+        return isochrone.travel_times[np.argmin(distance_array(isochrone.points, np.array(_coord(km_north))))]
+
+    # Walking from the starting location to stop 1 then to the point is walking twice
+    assert np.isinf(get_travel_time(0.25))
+    # Walking from stop 2 after alighting the bus
+    assert get_travel_time(2.05) == pytest.approx(900 + 0.05 / 4.2 * 3600, abs=5)
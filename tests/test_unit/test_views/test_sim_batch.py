@@ -0,0 +1,104 @@
+import csv
+from dataclasses import replace
+from datetime import datetime
+
+import pytest
+
+from msnmetrosim.views import controllers
+from msnmetrosim.views.sim_batch import OriginSummary, _simulate_origin, run_batch_simulation
+from msnmetrosim.views.sim_graph import (
+    PathDiscoveryResult, SimulationConfig, SimulationMap, SimulationStaticPoints, StaticPointConfig
+)
+from .test_sim_map import _get_controllers
+
+_CONFIG_POINTS = StaticPointConfig(datetime(2020, 9, 2, 15), 1800)
+_CONFIG_SIM = SimulationConfig((0, 0), max_walk_distance=0.6)
+
+# The reachable stops of the origins overlap
+_ORIGINS = [(43.0, -89.4), (43.005, -89.395), (43.0, -89.4)]
+
+
+@pytest.fixture(name="synthetic_controllers")
+def fixture_synthetic_controllers(monkeypatch):
+    """Use the controllers of the synthetic network for the batch simulation."""
+    ctrl_calendar, ctrl_stop, ctrl_stop_schedule, ctrl_trips = _get_controllers()
+
+    # Set as the module attributes directly, so the controllers are not loaded from the data files
+    for name, ctrl in (("ctrl_calendar", ctrl_calendar), ("ctrl_stops", ctrl_stop),
+                       ("ctrl_stop_schedule", ctrl_stop_schedule), ("ctrl_trips", ctrl_trips)):
+        monkeypatch.setitem(vars(controllers), name, ctrl)
+
+    return ctrl_calendar, ctrl_stop, ctrl_stop_schedule, ctrl_trips
+
+
+def _get_summary_row(origin, ctrl_calendar, ctrl_stop, ctrl_stop_schedule, ctrl_trips):
+    """Get the summary row of ``origin`` simulated on the static points generated only for it."""
+    static_points = SimulationStaticPoints(_CONFIG_POINTS, ctrl_calendar, ctrl_stop, ctrl_stop_schedule, ctrl_trips)
+    sim_map = SimulationMap(replace(_CONFIG_SIM, start_coord=origin), static_points, ctrl_stop)
+
+    result = PathDiscoveryResult()
+    for _ in sim_map.iter_possible_paths(None, result):
+        pass
+
+    return OriginSummary.from_discovery_result(origin, sim_map.point_count, result, 0).to_row()
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_batch_same_as_single(synthetic_controllers, tmp_path, workers):
+    """Test if each row of the batch is in the order of the origins and the same as simulating the origin alone."""
+    output_path = str(tmp_path / "summary.csv")
+
+    assert run_batch_simulation(_ORIGINS, _CONFIG_POINTS, _CONFIG_SIM, output_path, workers=workers) == 3
+
+    with open(output_path, newline="", encoding="utf-8") as output:
+        header, *rows = list(csv.reader(output))
+
+    assert tuple(header) == OriginSummary.CSV_HEADER
+    assert len(rows) == len(_ORIGINS)
+
+    for row, origin in zip(rows, _ORIGINS):
+        expected = _get_summary_row(origin, *synthetic_controllers)
+
+        assert expected[2] > 10
+        # Processing time excluded
+        assert [float(value) for value in row[:-1]] == pytest.approx(expected[:-1])
+
+
+def test_map_clear_next_points(synthetic_controllers):
+    """Test if only the static points attached by the map are cleared, then a new map is the same as a fresh one."""
+    ctrl_calendar, ctrl_stop, ctrl_stop_schedule, ctrl_trips = synthetic_controllers
+
+    static_points = SimulationStaticPoints(_CONFIG_POINTS, ctrl_calendar, ctrl_stop, ctrl_stop_schedule, ctrl_trips)
+    sim_map = SimulationMap(replace(_CONFIG_SIM, start_coord=_ORIGINS[0]), static_points, ctrl_stop)
+
+    attached = [point for point in static_points._static_points if point.next_points]
+    assert attached
+    assert len(attached) <= sim_map.expanded_count < len(static_points._static_points)
+
+    sim_map.clear_next_points()
+
+    assert not any(point.next_points for point in static_points._static_points)
+
+    sim_map = SimulationMap(replace(_CONFIG_SIM, start_coord=_ORIGINS[1]), static_points, ctrl_stop)
+    result = PathDiscoveryResult()
+    for _ in sim_map.iter_possible_paths(None, result):
+        pass
+
+    assert OriginSummary.from_discovery_result(_ORIGINS[1], sim_map.point_count, result, 0).to_row() == \
+           _get_summary_row(_ORIGINS[1], *synthetic_controllers)
+
+
+def test_failed_origin_clear_next_points(synthetic_controllers, monkeypatch):
+    """Test if the static points are cleared even if the path discovery of an origin fails."""
+    static_points = SimulationStaticPoints(_CONFIG_POINTS, *synthetic_controllers)
+
+    def iter_possible_paths(*_):
+        yield from ()
+        raise RuntimeError("Discovery failed")
+
+    monkeypatch.setattr(SimulationMap, "iter_possible_paths", iter_possible_paths)
+
+    with pytest.raises(RuntimeError):
+        _simulate_origin(_ORIGINS[0], static_points, _CONFIG_SIM, None)
+
+    assert not any(point.next_points for point in static_points._static_points)
@@ -0,0 +1,88 @@
+from dataclasses import fields
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from msnmetrosim.models import MMTStopScheduleSim
+from msnmetrosim.views.sim_graph import SimulationMapCSR
+from msnmetrosim.views.sim_graph.csr import (
+    EDGE_TYPE_NONE, NODE_TYPE_POINT, NODE_TYPE_SCHEDULED_STOP, NODE_TYPE_STOP_WAIT
+)
+from msnmetrosim.views.sim_graph.event_move import MoveEvent, MoveEventType
+from msnmetrosim.views.sim_graph.event_static import ScheduledStop, StaticPoint, StopWait
+
+_START_DT = datetime(2020, 9, 2, 15)
+
+
+def _dt(secs: float) -> datetime:
+    return _START_DT + timedelta(seconds=secs)
+
+
+def _get_root() -> StaticPoint:
+    """
+    Get the root of a map.
+
+    The agent walks to stop 100 and waits for trip 1 to stop 101,
+    or walks to stop 101 directly and takes trip 1 there.
+    """
+    stop_sim_a = MMTStopScheduleSim(1, 1, 100, _dt(300), _dt(330), False, 0, None)
+    stop_sim_b = MMTStopScheduleSim(1, 2, 101, _dt(600), _dt(630), False, 1, None)
+
+    root = StaticPoint(_START_DT, _START_DT, (43.0, -89.4))
+    wait_a = StopWait(_dt(100), _dt(300), stop_sim_a, (43.001, -89.4))
+    stop_a = ScheduledStop.from_stop_schedule_sim(stop_sim_a, (43.001, -89.4))
+    wait_b = StopWait(_dt(500), _dt(600), stop_sim_b, (43.01, -89.4))
+    stop_b = ScheduledStop.from_stop_schedule_sim(stop_sim_b, (43.01, -89.4))
+
+    root.add_next_point(MoveEvent(MoveEventType.WALK, 100, 0.1), wait_a)
+    root.add_next_point(MoveEvent(MoveEventType.WALK, 500, 1.1), wait_b)
+    wait_a.add_next_point(MoveEvent(MoveEventType.WAIT, 200, 0), stop_a)
+    wait_b.add_next_point(None, stop_b)
+    stop_a.add_next_point(MoveEvent(MoveEventType.BUS_TRIP, 270, 1.6), stop_b)
+
+    return root
+
+
+def test_from_root():
+    """Test if the nodes are indexed in the traversal order and the edges are grouped by the nodes."""
+    csr = SimulationMapCSR.from_root(_get_root())
+
+    assert (csr.node_count, csr.edge_count) == (5, 5)
+    assert csr.start_dt == _START_DT
+
+    # Root, wait at 100, wait at 101, scheduled stop 100, scheduled stop 101
+    np.testing.assert_array_equal(csr.node_type, [NODE_TYPE_POINT, NODE_TYPE_STOP_WAIT, NODE_TYPE_STOP_WAIT,
+                                                  NODE_TYPE_SCHEDULED_STOP, NODE_TYPE_SCHEDULED_STOP])
+    np.testing.assert_array_equal(csr.node_stop_id, [-1, 100, 101, 100, 101])
+    np.testing.assert_array_equal(csr.node_trip_id, [-1, 1, 1, 1, 1])
+    np.testing.assert_array_equal(csr.node_dt_in, [0, 100, 500, 300, 600])
+    np.testing.assert_array_equal(csr.node_dt_out, [0, 300, 600, 330, 630])
+    np.testing.assert_array_equal(csr.node_lat, [43.0, 43.001, 43.01, 43.001, 43.01])
+
+    np.testing.assert_array_equal(csr.edge_offset, [0, 2, 3, 4, 5, 5])
+    np.testing.assert_array_equal(csr.edge_target, [1, 2, 3, 4, 4])
+    np.testing.assert_array_equal(csr.edge_type, [MoveEventType.WALK.value, MoveEventType.WALK.value,
+                                                  MoveEventType.WAIT.value, EDGE_TYPE_NONE,
+                                                  MoveEventType.BUS_TRIP.value])
+    np.testing.assert_array_equal(csr.edge_time, [100, 500, 200, 0, 270])
+    np.testing.assert_array_equal(csr.edge_distance, [0.1, 1.1, 0, 0, 1.6])
+
+    assert csr.get_edge_slice(0) == slice(0, 2)
+    assert csr.get_edge_slice(4) == slice(5, 5)
+
+
+def test_save_load(tmp_path):
+    """Test if the saved map is loaded with the same arrays."""
+    csr = SimulationMapCSR.from_root(_get_root())
+
+    file_path = str(tmp_path / "map.npz")
+    csr.save(file_path)
+    loaded = SimulationMapCSR.load(file_path)
+
+    assert loaded.start_dt == csr.start_dt
+    assert (loaded.node_count, loaded.edge_count) == (csr.node_count, csr.edge_count)
+
+    for fld in fields(SimulationMapCSR):
+        if fld.name != "start_dt":
+            np.testing.assert_array_equal(getattr(loaded, fld.name), getattr(csr, fld.name))
+            assert getattr(loaded, fld.name).dtype == getattr(csr, fld.name).dtype
@@ -0,0 +1,325 @@
+import random
+from collections import Counter, deque
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pytest
+
+from msnmetrosim.controllers import (
+    MMTCalendarController, MMTStopDataController, MMTStopScheduleController, MMTTripDataController
+)
+from msnmetrosim.models import MMTCalendar, MMTStop, MMTStopSchedule, MMTTrip, MMTTripType
+from msnmetrosim.utils import distance
+from msnmetrosim.views.sim_graph import (
+    PathDiscoveryConfig, SimulationConfig, SimulationMap, SimulationStaticPoints, StaticPointConfig
+)
+from msnmetrosim.views.sim_graph.event_move import MoveEventType
+from msnmetrosim.views.sim_graph.event_static import ScheduledStop, StaticPoint, StopBase
+from msnmetrosim.views.sim_graph.path import SimPath
+
+_SERVICE_DATE = date(2020, 9, 2)
+
+_GRID_SIZE = 6
+_GRID_SPACING = 0.25  # km
+
+
+def _get_controllers(seed: int = 2):
+    """
+    Get the controllers of a random network on a grid of stops.
+
+    Each trip starts from a random stop within the first 20 minutes after 15:00,
+    then moves to an adjacent stop every 90 seconds.
+    """
+    rnd = random.Random(seed)
+
+    stops = [MMTStop(43.0 + row * _GRID_SPACING / 111.195, -89.4 + col * _GRID_SPACING / 81.2, "A", "B",
+                     row * _GRID_SIZE + col + 1, "", "", True)
+             for row in range(_GRID_SIZE) for col in range(_GRID_SIZE)]
+
+    trips = []
+    stop_schedules = []
+
+    for trip_id in range(1, 31):
+        row, col = rnd.randrange(_GRID_SIZE), rnd.randrange(_GRID_SIZE)
+        departure_secs = 15 * 3600 + rnd.randrange(0, 1200, 30)
+
+        trips.append(MMTTrip(trip_id, "", "WKD", trip_id, "", 0, "", 0, 0, "", MMTTripType.WEEKDAY, departure_secs))
+
+        for idx in range(15):
+            secs = departure_secs + idx * 90
+            stop_schedules.append(MMTStopSchedule(trip_id, idx + 1, row * _GRID_SIZE + col + 1, secs, secs, False,
+                                                  idx * _GRID_SPACING / 1.609))
+
+            d_row, d_col = rnd.choice([(0, 1), (1, 0), (0, -1), (-1, 0)])
+            row = min(max(row + d_row, 0), _GRID_SIZE - 1)
+            col = min(max(col + d_col, 0), _GRID_SIZE - 1)
+
+    return (MMTCalendarController([MMTCalendar("WKD", "Weekday", [_SERVICE_DATE], _SERVICE_DATE, _SERVICE_DATE)]),
+            MMTStopDataController(stops), MMTStopScheduleController(stop_schedules), MMTTripDataController(trips))
+
+
+def _get_static_points(controllers, max_travel_time: float = 1800) -> SimulationStaticPoints:
+    return SimulationStaticPoints(StaticPointConfig(datetime(2020, 9, 2, 15), max_travel_time), *controllers)
+
+
+def _get_map(max_travel_time: float = 1800) -> SimulationMap:
+    controllers = _get_controllers()
+
+    return SimulationMap(SimulationConfig((43.0, -89.4), max_walk_distance=0.6),
+                         _get_static_points(controllers, max_travel_time), controllers[1])
+
+
+def _get_paths_bfs(sim_map: SimulationMap, config: PathDiscoveryConfig):
+    """Get the paths and the pruned count by discovering the paths breadth-first as the previous implementation."""
+    queue = deque([SimPath.from_single_point(sim_map._start)])
+
+    paths = []
+    pruned = 0
+
+    while queue:
+        path = queue.popleft()
+        result = path.get_possible_next_paths(config)
+
+        pruned += result.pruned
+        if result.paths:
+            queue.extend(result.paths)
+        else:
+            paths.append(path)
+
+    return paths, pruned
+
+
+def _get_path_key(path):
+    return tuple(id(point) for point in path.points), tuple(id(event) for event in path.events)
+
+
+def _get_stats(result):
+    return (result.count_discovered, result.total_pruned, result.total_detoured, result.path_move_distribution,
+            result.trip_count_distribution, sorted(result.traveled_distances), sorted(result.displacements))
+
+
+@pytest.mark.parametrize("with_detoured", [True, False])
+def test_parallel_same_as_single(with_detoured):
+    """Test if discovering the paths in the worker processes gives the same paths and stats."""
+    sim_map = _get_map()
+
+    expected = sim_map.get_possible_paths_top_down(PathDiscoveryConfig(with_detoured=with_detoured))
+    actual = sim_map.get_possible_paths_top_down(PathDiscoveryConfig(with_detoured=with_detoured), workers=2)
+
+    assert expected.count_discovered > 10
+    assert _get_stats(actual) == _get_stats(expected)
+    assert [(path.points, path.events) for path in actual.paths] == \
+           [(path.points, path.events) for path in expected.paths]
+
+
+def test_parallel_without_paths():
+    """Test if only the stats are returned if the paths are not requested."""
+    sim_map = _get_map()
+
+    expected = sim_map.get_possible_paths_top_down(PathDiscoveryConfig())
+    actual = sim_map.get_possible_paths_top_down(PathDiscoveryConfig(), workers=2, with_paths=False)
+
+    assert not actual.paths
+    assert _get_stats(actual) == _get_stats(expected)
+
+
+def test_to_csr():
+    """Test if the exported map contains all points reachable from the root and all of their edges."""
+    sim_map = _get_map()
+
+    csr = sim_map.to_csr()
+
+    # Points reachable from the root
+    points = {}
+    stack = [sim_map._start]
+    while stack:
+        point = stack.pop()
+        if id(point) not in points:
+            points[id(point)] = point
+            stack.extend(next_pt for _, next_pt in point.next_points)
+
+    assert csr.node_count == len(points)
+    assert csr.edge_count == sum(len(point.next_points) for point in points.values())
+    assert csr.edge_offset.shape == (csr.node_count + 1,)
+    assert csr.edge_offset[-1] == csr.edge_count
+    assert all(getattr(csr, name).shape == (csr.node_count,)
+               for name in ("node_type", "node_dt_in", "node_dt_out", "node_stop_id", "node_trip_id"))
+    assert csr.edge_target.max() < csr.node_count
+
+
+@pytest.mark.parametrize("with_detoured,max_transfer", [(True, -1), (False, -1), (False, 1)])
+def test_dfs_same_as_bfs(with_detoured, max_transfer):
+    """Test if the depth-first discovery gives the same paths and stats as the previous breadth-first discovery."""
+    sim_map = _get_map()
+    config = sim_map._get_discovery_config(PathDiscoveryConfig(with_detoured=with_detoured,
+                                                               max_transfer=max_transfer))
+
+    expected_paths, expected_pruned = _get_paths_bfs(sim_map, config)
+    result = sim_map.get_possible_paths_top_down(config)
+
+    assert expected_paths
+    assert sorted(map(_get_path_key, result.paths)) == sorted(map(_get_path_key, expected_paths))
+
+    assert result.count_discovered == len(expected_paths)
+    # Pruned count was added again on each progress print previously
+    assert result.total_pruned == expected_pruned
+    assert result.total_detoured == sum(path.detouring for path in expected_paths)
+    assert result.path_move_distribution == sum((path.event_counter for path in expected_paths), Counter())
+    assert result.trip_count_distribution == Counter(path.trip_count for path in expected_paths)
+    assert sorted(result.traveled_distances) == sorted(path.traveled_distance for path in expected_paths)
+
+
+def test_get_next_scheduled_stop():
+    """Test if the next scheduled stop is the earliest one in the time range found by scanning all static points."""
+    static_points = _get_static_points(_get_controllers(), 3600)
+    scheduled_stops = [point for point in static_points._static_points if isinstance(point, ScheduledStop)]
+
+    # Includes the time ranges across the hours and out of the static points
+    start_dts = [datetime(2020, 9, 2, 14, 50) + timedelta(seconds=secs) for secs in range(0, 3600, 150)]
+    durations = [timedelta(seconds=secs) for secs in (0, 60, 300, 1200)]
+
+    for stop_id in range(_GRID_SIZE * _GRID_SIZE + 2):
+        stops = [stop for stop in scheduled_stops if stop.stop_id == stop_id]
+
+        for start_dt in start_dts:
+            for duration in durations:
+                end_dt = start_dt + duration
+
+                expected = min((stop for stop in stops if start_dt <= stop.stop_sim.arrival_time <= end_dt),
+                               key=lambda stop: stop.stop_sim.arrival_time, default=None)
+
+                assert static_points.get_next_scheduled_stop(start_dt, end_dt, stop_id) is expected
+
+
+def _get_map_previous(config: SimulationConfig, static_points: SimulationStaticPoints, ctrl_stop):
+    """
+    Generate the map by removing every traversed stop from the new candidates as the previous implementation.
+
+    Returns the map, and the counts of the visited stops, the expanded stops and the peak frontier size.
+    """
+    sim_map = SimulationMap.__new__(SimulationMap)
+    sim_map._start = StaticPoint(static_points.start_dt, static_points.start_dt, config.start_coord)
+    sim_map._point_count = 1
+    sim_map._config = config
+
+    frontier = sim_map._init_starting_frontier(config, static_points, ctrl_stop)
+    frontier_past = set(frontier.keys())
+
+    expanded = 0
+    frontier_peak = len(frontier)
+
+    while frontier:
+        _, stop = frontier.popitem()
+
+        if isinstance(stop, ScheduledStop):
+            frontiers = sim_map._init_handle_frontier_stop(stop, config, static_points, ctrl_stop)
+
+            for id_past in frontier_past:
+                frontiers.pop(id_past, None)
+
+            frontier_past.update(frontiers.keys())
+            frontier.update(frontiers)
+
+            frontier_peak = max(frontier_peak, len(frontier))
+
+        expanded += 1
+
+    return sim_map, len(frontier_past), expanded, frontier_peak
+
+
+@pytest.mark.parametrize("start_coord", [(43.0, -89.4), (43.006, -89.394)])
+def test_map_counters(start_coord):
+    """Test if the generated map and its counters are the same as the previous map generation."""
+    controllers = _get_controllers()
+    config = SimulationConfig(start_coord, max_walk_distance=0.6)
+
+    sim_map = SimulationMap(config, _get_static_points(controllers), controllers[1])
+    expected_map, visited, expanded, frontier_peak = \
+        _get_map_previous(config, _get_static_points(controllers), controllers[1])
+
+    assert visited > 10
+    assert (sim_map.visited_count, sim_map.expanded_count, sim_map.frontier_peak_count) == \
+           (visited, expanded, frontier_peak)
+    # Each visited stop is added to the frontier once, then expanded once
+    assert sim_map.visited_count == sim_map.expanded_count
+    assert sim_map.point_count == expected_map._point_count
+
+    csr = sim_map.to_csr()
+    expected_csr = expected_map.to_csr()
+
+    for name in ("node_type", "node_dt_in", "node_dt_out", "node_stop_id", "node_trip_id",
+                 "edge_offset", "edge_target", "edge_type", "edge_time", "edge_distance"):
+        np.testing.assert_array_equal(getattr(csr, name), getattr(expected_csr, name))
+
+
+def _get_next_paths_previous(path: SimPath, config: PathDiscoveryConfig):
+    """
+    Get the next paths and the pruned count by checking each extended path as the previous implementation.
+
+    A wait-less move event (``None``) is not pruned as a non-sense path.
+    """
+    next_paths = []
+    pruned = 0
+
+    for transition_evt, next_pt in path.point.next_points:
+        if config.prune_non_sense:
+            if path.event and transition_evt:
+                if (path.event.event_type, transition_evt.event_type) in (
+                        (MoveEventType.WAIT, MoveEventType.WAIT), (MoveEventType.WAIT, MoveEventType.WALK),
+                        (MoveEventType.WALK, MoveEventType.WALK)
+                ):
+                    pruned += 1
+                    continue
+            if isinstance(next_pt, StopBase) and next_pt.stop_id in path.stop_ids:
+                pruned += 1
+                continue
+
+        next_path = path.extend(next_pt, transition_evt)
+
+        if 0 <= config.max_transfer < next_path.trip_count - 1:
+            continue
+
+        if config.with_detoured or not next_path.detouring:
+            next_paths.append(next_path)
+
+    return next_paths, pruned
+
+
+@pytest.mark.parametrize("with_detoured,max_transfer", [(True, -1), (False, -1), (False, 1), (True, 2)])
+def test_next_paths_pruning(with_detoured, max_transfer):
+    """Test if the next paths of each path in the map are the same as checking the extended paths."""
+    sim_map = _get_map()
+    config = sim_map._get_discovery_config(PathDiscoveryConfig(with_detoured=with_detoured,
+                                                               max_transfer=max_transfer))
+    # Includes all paths which are not non-sense
+    config_all = sim_map._get_discovery_config(PathDiscoveryConfig(with_detoured=True))
+
+    stack = [SimPath.from_single_point(sim_map._start)]
+    count_checked = 0
+
+    while stack:
+        path = stack.pop()
+        points = path.points
+        events = path.events
+        summary = path._get_summary()
+
+        for transition_evt, next_pt in path.point.next_points:
+            # Stats of the extended path obtained from its points and events
+            trip_ids = {point.trip_id for point in points + [next_pt] if isinstance(point, StopBase)}
+            traveled_distance = sum(event.traveled_dist for event in events + [transition_evt] if event)
+
+            assert summary.get_next_trip_count(next_pt) == len(trip_ids)
+            assert summary.is_next_detouring(transition_evt, next_pt) == \
+                   (traveled_distance > distance(points[0].coordinate, next_pt.coordinate) * 3)
+
+            count_checked += 1
+
+        result = path.get_possible_next_paths(config)
+        expected_paths, expected_pruned = _get_next_paths_previous(path, config)
+
+        assert result.pruned == expected_pruned
+        assert list(map(_get_path_key, result.paths)) == list(map(_get_path_key, expected_paths))
+
+        stack.extend(path.get_possible_next_paths(config_all).paths)
+
+    assert count_checked > 100
@@ -0,0 +1,144 @@
+from collections import Counter
+from datetime import datetime, timedelta
+
+from msnmetrosim.models import MMTStopScheduleSim
+from msnmetrosim.views.sim_graph.config import PathDiscoveryConfig
+from msnmetrosim.views.sim_graph.event_move import MoveEvent, MoveEventType
+from msnmetrosim.views.sim_graph.event_static import ScheduledStop, StaticPoint, StopBase, StopWait
+from msnmetrosim.views.sim_graph.path import SimPath
+
+_START_DT = datetime(2020, 9, 2, 15)
+
+
+def _stop_sim(trip_id: int, stop_id: int, minutes: int) -> MMTStopScheduleSim:
+    arrival = _START_DT + timedelta(minutes=minutes)
+
+    return MMTStopScheduleSim(trip_id, 1, stop_id, arrival, arrival, False, 0, None)
+
+
+def _scheduled_stop(trip_id: int, stop_id: int, minutes: int, lat: float) -> ScheduledStop:
+    return ScheduledStop.from_stop_schedule_sim(_stop_sim(trip_id, stop_id, minutes), (lat, -89.4))
+
+
+def _get_path():
+    """Get a path walking to a stop, taking a bus, walking to another stop, then waiting for another bus."""
+    wait_stop_sim = _stop_sim(3, 102, 20)
+
+    points = [
+        StaticPoint(_START_DT, _START_DT, (43.0, -89.4)),
+        _scheduled_stop(1, 100, 5, 43.001),
+        _scheduled_stop(1, 101, 10, 43.02),
+        _scheduled_stop(2, 102, 15, 43.021),
+        StopWait(_START_DT + timedelta(minutes=15), wait_stop_sim.arrival_time, wait_stop_sim, (43.021, -89.4)),
+    ]
+    events = [
+        None,
+        MoveEvent(MoveEventType.WALK, 100, 0.1),
+        MoveEvent(MoveEventType.BUS_TRIP, 300, 2.1),
+        MoveEvent(MoveEventType.WALK, 60, 0.1),
+        MoveEvent(MoveEventType.WAIT, 300, 0),
+    ]
+
+    path = SimPath.from_single_point(points[0])
+    for point, event in zip(points[1:], events[1:]):
+        path = path.extend(point, event)
+
+    return path, points, events
+
+
+def test_extend():
+    """Test if extending a path keeps the original path and shares the prefix."""
+    path, points, events = _get_path()
+
+    assert path.points == points
+    assert path.events == events
+    assert len(path) == 5
+    assert path.traveled_distance == sum(event.traveled_dist for event in events if event)
+
+    extended = path.extend(_scheduled_stop(3, 103, 30, 43.05), MoveEvent(MoveEventType.BUS_TRIP, 600, 3))
+
+    assert len(extended) == 6
+    assert len(path) == 5
+    assert extended.parent is path
+    assert extended.points[:-1] == path.points
+
+
+def test_event_counter():
+    """Test if the event counts are the same as counting the events of the path."""
+    path, _, events = _get_path()
+
+    assert path.event_counter == Counter(event.event_type for event in events if event)
+    assert path.event_counter == Counter({MoveEventType.WALK: 2, MoveEventType.BUS_TRIP: 1, MoveEventType.WAIT: 1})
+    assert SimPath.from_single_point(path.points[0]).event_counter == Counter()
+
+
+def test_trip_stop_ids():
+    """Test if the trip and stop IDs are the same as collecting them from the points of the path."""
+    path, points, _ = _get_path()
+
+    for sub_path in (path, path.parent, path.parent.parent.parent):
+        sub_points = sub_path.points
+
+        assert sub_path.trip_ids == {point.trip_id for point in sub_points if isinstance(point, StopBase)}
+        assert sub_path.stop_ids == {point.stop_id for point in sub_points if isinstance(point, ScheduledStop)}
+        assert sub_path.trip_count == len(sub_path.trip_ids)
+
+    assert path.trip_ids == {1, 2, 3}
+    # The stop of waiting is not a scheduled stop
+    assert path.stop_ids == {100, 101, 102}
+    assert SimPath.from_single_point(points[0]).stop_ids == frozenset()
+
+
+def test_has_stop():
+    """Test if the scheduled stops in the path are checked the same as checking the points of the path."""
+    path, points, _ = _get_path()
+
+    for stop_id in (100, 101, 102, 103):
+        assert path.has_stop(stop_id) == any(isinstance(point, ScheduledStop) and point.stop_id == stop_id
+                                             for point in points)
+
+    # Stops added after the path are not included
+    assert path.parent.parent.has_stop(101)
+    assert not path.parent.parent.has_stop(102)
+
+
+def test_stop_ids_separate_roots():
+    """Test if the stop IDs are correct for the paths of different roots meeting the stops in different orders."""
+    path, _, _ = _get_path()
+
+    other = SimPath.from_single_point(StaticPoint(_START_DT, _START_DT, (43.0, -89.4)))
+    for stop_id in (104, 102, 100):
+        other = other.extend(_scheduled_stop(4, stop_id, 5, 43.0), MoveEvent(MoveEventType.BUS_TRIP, 60, 0.5))
+
+    assert other.stop_ids == {104, 102, 100}
+    assert other.has_stop(100) and not other.has_stop(101)
+    assert path.stop_ids == {100, 101, 102}
+    assert not path.has_stop(104)
+
+
+def test_discovered_path_stats():
+    """Test if the stats of a discovered path are the same as the same path extended point by point."""
+    expected, points, events = _get_path()
+
+    for point, next_point, event in zip(points, points[1:], events[1:]):
+        point.add_next_point(event, next_point)
+
+    config = PathDiscoveryConfig(prune_non_sense=False, with_detoured=True, max_transfer=-1)
+
+    path = SimPath.from_single_point(points[0])
+    while next_paths := path.get_possible_next_paths(config).paths:
+        path, = next_paths
+
+    assert path.points == expected.points
+    assert len(path) == len(expected)
+    assert path.path_head_coord == expected.path_head_coord
+    assert path.traveled_distance == expected.traveled_distance
+    assert path.displacement == expected.displacement
+    assert path.detouring == expected.detouring
+    assert path.event_counter == expected.event_counter
+    assert path.trip_ids == expected.trip_ids
+    assert path.stop_ids == expected.stop_ids
+    assert [path.has_stop(stop_id) for stop_id in (100, 101, 102, 103)] == [True, True, True, False]
+    # The extended paths do not hold the stats of their own
+    assert path.parent.traveled_distance == expected.parent.traveled_distance
+    assert path.parent.trip_ids == expected.parent.trip_ids